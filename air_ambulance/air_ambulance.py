@@ -1,122 +1,88 @@
-#Generate air ambulance data (assuming a tilt-rotor configuration)
+#Generate air ambulance data (assuming a tilt-rotor configuration). The range x hover-time sweep
+#is solved in parallel; rows are streamed to air_ambulance_data.txt as solves finish, and a
+#killed job resumes where it stopped (see sweep_tools.py).
 
 import os
 import sys
-sys.path.append(os.path.abspath(os.path.dirname(__file__) + '/..'))
+sys.path.append(os.path.dirname(os.path.abspath(__file__)) + '/..')
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 import numpy as np
 from gpkit import Variable, Model, Vectorize, ureg
-from matplotlib import pyplot as plt
 from aircraft_models import OnDemandAircraft
 from mission_profiles import AirAmbulanceSizingMission, AirAmbulanceMissionCost
 from study_input_data import generic_data, configuration_data
-from noise_models import vortex_noise
-
-#Unput assumptions
-eta_cruise = generic_data["\eta_{cruise}"] 
-eta_electric = generic_data["\eta_{electric}"]
-C_m = generic_data["C_m"]
-n = generic_data["n"]
-B = generic_data["B"]
-	
-reserve_type = generic_data["reserve_type"]
-autonomousEnabled = generic_data["autonomousEnabled"]
-charger_power = generic_data["charger_power"]
-	
-vehicle_cost_per_weight = generic_data["vehicle_cost_per_weight"]
-battery_cost_per_C = generic_data["battery_cost_per_C"]
-pilot_wrap_rate = 0.0001*ureg.hr**-1 #Pilot cost not included
-mechanic_wrap_rate = generic_data["mechanic_wrap_rate"]
-MMH_FH = generic_data["MMH_FH"]
-deadhead_ratio = generic_data["deadhead_ratio"]
-	
-delta_S = generic_data["delta_S"]
-	
+from sweep_tools import sweep, grid_points, status_names
+
 config = "Tilt rotor"
-print "Solving configuration: " + config
-configs = configuration_data.copy()
-c = configs[config]
-	
-V_cruise = c["V_{cruise}"]
-L_D_cruise = c["L/D"]
-T_A = c["T/A"]
-Cl_mean_max = c["Cl_{mean_{max}}"]
-N = c["N"]
-loiter_type = c["loiter_type"]
-tailRotor_power_fraction_hover = c["tailRotor_power_fraction_hover"]
-tailRotor_power_fraction_levelFlight = c["tailRotor_power_fraction_levelFlight"]
-weight_fraction = c["weight_fraction"]
-
-#Mission parameter (over which to iterate)
-mission_range_array = np.linspace(20,90,10)*ureg.nautical_mile #range of the 1st, 2nd cruise segments
-
-output_data = [{} for i in range(np.size(mission_range_array))]
-
-#
-for i,mission_range in enumerate(mission_range_array):
-	
-	t_hover_array = [30,120,30,30,30,30]*ureg.second
-	
-	Aircraft = OnDemandAircraft(N=N,L_D_cruise=L_D_cruise,eta_cruise=eta_cruise,C_m=C_m,
-		Cl_mean_max=Cl_mean_max,weight_fraction=weight_fraction,n=n,eta_electric=eta_electric,
-		cost_per_weight=vehicle_cost_per_weight,cost_per_C=battery_cost_per_C,
-		autonomousEnabled=autonomousEnabled)
-
-	SizingMission = AirAmbulanceSizingMission(Aircraft,V_cruise=V_cruise,N_crew=3,
-		N_passengers=1,reserve_type=reserve_type,loiter_type=loiter_type,
-		tailRotor_power_fraction_hover=tailRotor_power_fraction_hover,
-		tailRotor_power_fraction_levelFlight=tailRotor_power_fraction_levelFlight)
-	SizingMission.substitutions.update({SizingMission.fs0.topvar("T/A"):T_A})
-	
+third_segment_range = 10*ureg.nautical_mile
+output_columns = ["MTOW (lbf)","W_{battery} (lbf)","t_{mission} (minutes)","Mission cost ($)",
+	"Purchase price ($)"]
+
+def solve_air_ambulance(mission_range,t_hover_patient,config=config,g=generic_data):
+	#Sizes the air-ambulance mission. mission_range is the range of each of the first two cruise
+	#segments; t_hover_patient is the hover time at the patient location.
+
+	c = configuration_data[config]
+	pilot_wrap_rate = 0.0001*ureg.hr**-1 #Pilot cost not included
+	t_hover_array = [30,t_hover_patient.to(ureg.s).magnitude,30,30,30,30]*ureg.second
+
+	Aircraft = OnDemandAircraft(N=c["N"],L_D_cruise=c["L/D"],eta_cruise=g["\eta_{cruise}"],
+		C_m=g["C_m"],Cl_mean_max=c["Cl_{mean_{max}}"],weight_fraction=c["weight_fraction"],
+		n=g["n"],eta_electric=g["\eta_{electric}"],cost_per_weight=g["vehicle_cost_per_weight"],
+		cost_per_C=g["battery_cost_per_C"],autonomousEnabled=g["autonomousEnabled"])
+
+	SizingMission = AirAmbulanceSizingMission(Aircraft,V_cruise=c["V_{cruise}"],N_crew=3,
+		N_passengers=1,reserve_type=g["reserve_type"],loiter_type=c["loiter_type"],
+		tailRotor_power_fraction_hover=c["tailRotor_power_fraction_hover"],
+		tailRotor_power_fraction_levelFlight=c["tailRotor_power_fraction_levelFlight"])
+	SizingMission.substitutions.update({SizingMission.fs0.topvar("T/A"):c["T/A"]})
+
 	segment_range_array = [mission_range.to(ureg.nmi).magnitude,\
-		mission_range.to(ureg.nmi).magnitude,10]*ureg.nautical_mile
-	
+		mission_range.to(ureg.nmi).magnitude,third_segment_range.to(ureg.nmi).magnitude]\
+		*ureg.nautical_mile
+
 	for j,segment_range in enumerate(segment_range_array):
 		SizingMission.substitutions.update({SizingMission.topvar("segment_range")[j]:segment_range})
 	for j,t_hover in enumerate(t_hover_array):
 		SizingMission.substitutions.update({SizingMission.topvar("t_{hover}")[j]:t_hover})
-	
+
 	MissionCost = AirAmbulanceMissionCost(Aircraft,SizingMission,pilot_wrap_rate=pilot_wrap_rate)
-	
+
 	problem = Model(MissionCost.topvar("cost_per_mission"),[Aircraft, SizingMission, MissionCost])
-	solution = problem.solve(verbosity=0)
-	output_data[i] = solution
-
-	
-#Print data to text file
-text_file = open("air_ambulance_data.txt","w")
-
-text_file.write("Configuration: %s\n" % config)
-text_file.write("\n")
-text_file.write("The mission profile includes three cruise segments. ")
-text_file.write("The range of the first two segments is set equal, and is the independent variable. ")
-text_file.write("The third segment is %0.1f nmi long.\n" \
-	% segment_range_array[-1].to(ureg.nmi).magnitude)
-text_file.write("\n")
-text_file.write("Note: pilot, crew are not included in cost estimates.\n")
-text_file.write("\n")
-
-text_file.write("R_segment (nmi)\tMTOW (lbf)\tW_{battery} (lbf)\tt_{mission} (minutes)\t")
-text_file.write("Mission cost ($)\tPurchase price ($)\t")
-text_file.write("\n")
-
-for i,range in enumerate(mission_range_array):
-	sol = output_data[i]
-	
-	text_file.write("%0.1f\t" % range.to(ureg.nmi).magnitude)
-	text_file.write("%0.1f\t" % sol("MTOW").to(ureg.lbf).magnitude)
-	text_file.write("%0.1f\t" % sol("W_OnDemandAircraft/Battery").to(ureg.lbf).magnitude)
-	text_file.write("%0.1f\t" % sol("t_{mission}").to(ureg.minute).magnitude)
-	text_file.write("%0.2f\t" % sol("cost_per_mission_AirAmbulanceMissionCost"))
-	
+	return problem.solve(verbosity=0)
+
+def air_ambulance_row(point):
+	#One sweep row (plain floats), for sweep_tools.sweep()
+	sol = solve_air_ambulance(point["R_segment (nmi)"]*ureg.nautical_mile,
+		point["t_{hover} (s)"]*ureg.s)
 	purchase_price = sol("purchase_price_OnDemandAircraft")\
 		+ sol("purchase_price_OnDemandAircraft/Battery") + sol("purchase_price_OnDemandAircraft/Avionics")
-	text_file.write("%0.2f\t" % purchase_price)
-	
-	text_file.write("\n")
-	
-text_file.close()
+	return {"MTOW (lbf)":sol("MTOW").to(ureg.lbf).magnitude,
+		"W_{battery} (lbf)":sol("W_OnDemandAircraft/Battery").to(ureg.lbf).magnitude,
+		"t_{mission} (minutes)":sol("t_{mission}").to(ureg.minute).magnitude,
+		"Mission cost ($)":float(sol("cost_per_mission_AirAmbulanceMissionCost")),
+		"Purchase price ($)":float(purchase_price)}
+
+
+if __name__=="__main__":
 
+	#Mission parameters (over which to iterate)
+	mission_range_array = np.linspace(20,90,10) #range of the 1st, 2nd cruise segments (nmi)
+	t_hover_array = np.array([120]) #hover time at the patient location (s)
 
+	points = grid_points(**{"R_segment (nmi)":mission_range_array,"t_{hover} (s)":t_hover_array})
 
+	comments = ["Configuration: %s" % config,
+		"The mission profile includes three cruise segments. The range of the first two segments "
+		+ "is set equal, and is an independent variable, as is the hover time at the patient "
+		+ "location. The third segment is %0.1f nmi long." \
+		% third_segment_range.to(ureg.nmi).magnitude,
+		"Note: pilot, crew are not included in cost estimates.",
+		"Rows are written in order of completion; index is the grid point number.",
+		"Status: %s (by position)" % ", ".join(status_names)]
 
+	print "Solving configuration: " + config
+	filename = os.path.dirname(os.path.abspath(__file__)) + "/air_ambulance_data.txt"
+	N_solved = sweep(air_ambulance_row,points,filename,output_columns,comments=comments,timeout=300)
+	print "%d of %d points solved (the rest were already in %s)" % (N_solved,len(points),filename)
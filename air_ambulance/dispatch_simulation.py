@@ -0,0 +1,259 @@
+#Air-ambulance dispatch simulation over a service region. Not GP-compatible. Emergency calls are
+#generated over the region; each is served by a vehicle from one of the bases, which flies
+#base -> patient -> nearest hospital -> base with the segment performance of a sized aircraft
+#(AirAmbulanceSizingMission). Batteries are swapped at the base when the remaining energy is low.
+#Distances, energies and flight times are computed for every (call, base) pair in array
+#operations; only the vehicle assignment is sequential.
+
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.abspath(__file__)) + '/..')
+
+import numpy as np
+from gpkit import ureg
+from mission_evaluation import battery_energy
+
+#Segment indices in AirAmbulanceSizingMission
+hover_segments = [0,2,3,5,6,9]
+cruise_segments = [1,4,7]
+reserve_segment = 8
+
+def design_performance(solution,n=1.):
+	#Segment performance of a solved AirAmbulanceSizingMission (at its mission weight).
+	#n is the battery discharge parameter; it is not a GP variable.
+	mission_name = "AirAmbulanceSizingMission"
+	E = solution("E_" + mission_name)
+	P_battery = solution("P_{battery}_" + mission_name)
+	segment_range = solution("segment_range_" + mission_name)
+
+	#Cruise speed, from the first cruise segment (BatteryPerformance inverted for time)
+	Rt = 1*ureg.hr
+	i = cruise_segments[0]
+	t_cruise = Rt*((E[i]/(P_battery[i]*Rt)).to(ureg.dimensionless).magnitude)**n
+
+	performance = {}
+	performance["P_hover"] = P_battery[hover_segments]
+	performance["t_hover"] = solution("t_{hover}_" + mission_name)
+	performance["P_cruise"] = P_battery[i]
+	performance["V_cruise"] = (segment_range[0]/t_cruise).to(ureg.knot)
+	performance["E_reserve"] = E[reserve_segment]
+	performance["C_eff"] = solution("C_{eff}_OnDemandAircraft")
+	performance["n"] = n
+	return performance
+
+def mission_energy(performance,segment_range):
+	#Energy (including the reserve) and flight time of base -> patient -> hospital -> base
+	#missions. segment_range has the three cruise-segment ranges along its last axis.
+	n = performance["n"]
+	t_cruise = (segment_range/performance["V_cruise"]).to(ureg.s)
+	E_cruise = battery_energy(performance["P_cruise"],t_cruise,n)
+	E_hover = np.sum(battery_energy(performance["P_hover"],performance["t_hover"],n))
+	E = E_hover + np.sum(E_cruise,axis=-1) + performance["E_reserve"]
+	t_flight = np.sum(performance["t_hover"]) + np.sum(t_cruise,axis=-1)
+	return E.to(ureg.kWh), t_flight.to(ureg.s)
+
+def generate_calls(call_rate,region,duration=365*ureg.day,rate_profile=None,centers=None,
+	weights=None,spread=10*ureg.nautical_mile,seed=None):
+	#Poisson emergency calls. region is [[x_min,y_min],[x_max,y_max]]; rate_profile (optional)
+	#gives hourly multipliers. Locations are uniform over the region, or (if centers are given)
+	#normally distributed around population centers with the given weights, clipped to the region.
+	#Returns calls in time order.
+
+	random = np.random.RandomState(seed)
+	num_hours = int(np.ceil(duration.to(ureg.hr).magnitude))
+	if rate_profile is None:
+		rate_profile = np.ones(1)
+	hours = np.arange(num_hours)
+	bin_length = np.minimum(1.,duration.to(ureg.hr).magnitude - hours)
+	counts = random.poisson(call_rate.to(ureg.hr**-1).magnitude \
+		*np.asarray(rate_profile)[hours % len(rate_profile)]*bin_length)
+	t = 3600*(np.repeat(hours,counts) + np.repeat(bin_length,counts)*random.uniform(size=np.sum(counts)))
+	t = np.sort(t)
+
+	bounds = region.to(ureg.nautical_mile).magnitude
+	if centers is None:
+		xy = bounds[0] + (bounds[1] - bounds[0])*random.uniform(size=(np.size(t),2))
+	else:
+		weights = np.ones(len(centers)) if weights is None else np.asarray(weights,dtype=float)
+		center = random.choice(len(centers),size=np.size(t),p=weights/np.sum(weights))
+		xy = centers.to(ureg.nautical_mile).magnitude[center] \
+			+ spread.to(ureg.nautical_mile).magnitude*random.normal(size=(np.size(t),2))
+		xy = np.clip(xy,bounds[0],bounds[1])
+	return {"t":t*ureg.s,"location":xy*ureg.nautical_mile}
+
+def _distances(a,b):
+	#Straight-line distances between two sets of points (nautical miles, as plain arrays)
+	return np.sqrt(np.sum((a[:,np.newaxis,:] - b[np.newaxis,:,:])**2,axis=-1))
+
+def simulate_dispatch(performance,calls,bases,hospitals,N_vehicles,t_prep=3*ureg.minute,
+	t_turnaround=10*ureg.minute,t_swap=5*ureg.minute,swap_fraction=0.5):
+	#Calls are assigned in time order to the vehicle that reaches the patient first (waiting
+	#for busy vehicles if necessary). A vehicle without enough energy for the mission (plus
+	#reserve) has its battery swapped before launch; after each mission, it is swapped if the
+	#usable energy left is below swap_fraction of capacity. Calls that no vehicle can fly on a
+	#full battery are unserved. Response time is measured from the call to arrival at the patient.
+	#N_vehicles: vehicles per base (one value, or one per base).
+
+	#Working units: s, nautical miles, kWh
+	xy_call = calls["location"].to(ureg.nautical_mile).magnitude
+	xy_base = bases.to(ureg.nautical_mile).magnitude
+	xy_hospital = hospitals.to(ureg.nautical_mile).magnitude
+	t_call = calls["t"].to(ureg.s).magnitude
+	num_calls, num_bases = np.size(t_call), len(xy_base)
+
+	#Mission data for every (call, base) pair
+	d_patient = _distances(xy_call,xy_base)
+	d_hospital = _distances(xy_call,xy_hospital)
+	hospital = np.argmin(d_hospital,axis=1)
+	d_return = _distances(xy_hospital[hospital],xy_base)
+	segment_range = np.stack([d_patient,np.broadcast_to(d_hospital[np.arange(num_calls),
+		hospital][:,np.newaxis],np.shape(d_patient)),d_return],axis=-1)*ureg.nautical_mile
+	E_mission, t_flight = mission_energy(performance,segment_range)
+	E_mission, t_flight = E_mission.magnitude, t_flight.magnitude
+	t_response = (performance["t_hover"][0] + segment_range[...,0]/performance["V_cruise"])\
+		.to(ureg.s).magnitude #launch to arrival at the patient
+
+	C_eff = performance["C_eff"].to(ureg.kWh).magnitude
+	E_reserve = performance["E_reserve"].to(ureg.kWh).magnitude
+	t_prep, t_turnaround = t_prep.to(ureg.s).magnitude, t_turnaround.to(ureg.s).magnitude
+	t_swap = t_swap.to(ureg.s).magnitude
+
+	#Vehicle state
+	vehicle_base = np.repeat(np.arange(num_bases),np.broadcast_to(N_vehicles,(num_bases,)))
+	num_vehicles = np.size(vehicle_base)
+	t_free = np.zeros(num_vehicles)
+	E_vehicle = C_eff*np.ones(num_vehicles)
+	t_busy = np.zeros(num_vehicles)
+
+	#Per-call results
+	served = np.zeros(num_calls,dtype=bool)
+	vehicle = -np.ones(num_calls,dtype=int)
+	response = np.nan*np.ones(num_calls)
+	wait = np.nan*np.ones(num_calls)
+	swaps = np.zeros(num_calls,dtype=int)
+	E_used = np.nan*np.ones(num_calls)
+
+	for c in range(num_calls):
+		E_need = E_mission[c,vehicle_base]
+		swap = E_vehicle < E_need
+		t_launch = np.maximum(t_call[c],t_free) + t_prep + swap*t_swap
+		arrival = np.where(E_need <= C_eff,t_launch + t_response[c,vehicle_base],np.inf)
+
+		v = np.argmin(arrival)
+		if np.isinf(arrival[v]):
+			continue
+		b = vehicle_base[v]
+		served[c], vehicle[c] = True, v
+		response[c] = arrival[v] - t_call[c]
+		t_start = max(t_call[c],t_free[v])
+		wait[c] = t_start - t_call[c]
+		E_used[c] = E_need[v] - E_reserve
+		swaps[c] = swap[v]
+
+		E_vehicle[v] = (C_eff if swap[v] else E_vehicle[v]) - E_used[c]
+		t_free[v] = t_launch[v] + t_flight[c,b] + t_turnaround
+		if E_vehicle[v] - E_reserve < swap_fraction*(C_eff - E_reserve):
+			E_vehicle[v] = C_eff
+			t_free[v] += t_swap
+			swaps[c] += 1
+		t_busy[v] += t_free[v] - t_start
+
+	duration = max(np.max(t_free) if num_vehicles else 0.,t_call[-1] if num_calls else 0.,1.)
+
+	output = {}
+	output["N_calls"] = num_calls
+	output["N_served"] = np.sum(served)
+	output["served"] = served
+	output["base"] = np.where(served,vehicle_base[vehicle],-1)
+	output["vehicle"] = vehicle
+	output["hospital"] = hospital
+	output["response_time"] = (response*ureg.s).to(ureg.minute)
+	output["t_wait"] = (wait*ureg.s).to(ureg.minute)
+	output["E_{call}"] = E_used*ureg.kWh
+	output["swaps"] = swaps
+	output["response_mean"] = (np.mean(response[served]) if np.any(served) else 0.)*ureg.s
+	output["response_90"] = (np.percentile(response[served],90) if np.any(served) else 0.)*ureg.s
+	output["swaps_per_call"] = np.mean(swaps[served]) if np.any(served) else 0.
+	output["swaps_per_base"] = np.bincount(output["base"][served],weights=swaps[served],
+		minlength=num_bases)
+	output["vehicle_utilization"] = t_busy/duration
+	return output
+
+
+def test():
+	#Synthetic performance typical of a sized tilt-rotor air ambulance
+	performance = {"P_hover":550*np.ones(6)*ureg.kW,"t_hover":[30,120,30,30,30,30]*ureg.s,
+		"P_cruise":140*ureg.kW,"V_cruise":150*ureg.mph,"E_reserve":40*ureg.kWh,
+		"C_eff":180*ureg.kWh,"n":1.}
+	bases = np.array([[0,0],[60,0]])*ureg.nautical_mile
+	hospitals = np.array([[30,0]])*ureg.nautical_mile
+
+	#One call: nearest base, response time from the segment data
+	calls = {"t":[100.]*ureg.s,"location":np.array([[10,0]])*ureg.nautical_mile}
+	data = simulate_dispatch(performance,calls,bases,hospitals,N_vehicles=1)
+	t_expected = 3*ureg.minute + 30*ureg.s + 10*ureg.nautical_mile/(150*ureg.mph)
+	assert data["base"][0] == 0 and data["hospital"][0] == 0
+	assert abs(data["response_time"][0]/t_expected - 1) < 1e-9
+	E, t = mission_energy(performance,[10,20,30]*ureg.nautical_mile)
+	assert abs(data["E_{call}"][0]/(E - 40*ureg.kWh) - 1) < 1e-9
+
+	#Out of range on a full battery: not served
+	calls = {"t":[100.]*ureg.s,"location":np.array([[30,500]])*ureg.nautical_mile}
+	assert simulate_dispatch(performance,calls,bases,hospitals,N_vehicles=1)["N_served"] == 0
+
+	#A year of calls: all served; swaps happen; more vehicles give faster responses
+	region = np.array([[10,-15],[50,15]])*ureg.nautical_mile
+	calls = generate_calls(1*ureg.hr**-1,region,seed=0)
+	assert np.all(np.diff(calls["t"].magnitude) >= 0)
+	assert abs(np.size(calls["t"])/8760. - 1) < 0.05
+	data1 = simulate_dispatch(performance,calls,bases,hospitals,N_vehicles=1)
+	data3 = simulate_dispatch(performance,calls,bases,hospitals,N_vehicles=3)
+	assert data1["N_served"] == data1["N_calls"]
+	assert data1["swaps_per_call"] > 0
+	assert data3["response_mean"] < data1["response_mean"]
+	assert np.all(data1["vehicle_utilization"] < 1)
+
+	#Mission energy agrees with the solved sizing mission
+	from air_ambulance import solve_air_ambulance
+	solution = solve_air_ambulance(40*ureg.nautical_mile,120*ureg.s)
+	performance = design_performance(solution)
+	E, t = mission_energy(performance,[40,40,10]*ureg.nautical_mile)
+	assert abs(E/solution("E_{mission}_AirAmbulanceSizingMission") - 1) < 1e-4
+	t_reserve = 20*ureg.minute #FAA_heli loiter; not flown on dispatch missions
+	assert abs((t + t_reserve)/solution("t_{flight}_AirAmbulanceSizingMission") - 1) < 1e-4
+
+
+if __name__=="__main__":
+
+	#Tilt-rotor air ambulance sized for 40-nm segments; a year of calls over an 80 x 50 nm region
+	#with 3 bases and 2 hospitals
+	import time
+	from air_ambulance import solve_air_ambulance
+
+	solution = solve_air_ambulance(40*ureg.nautical_mile,120*ureg.s)
+	performance = design_performance(solution)
+
+	region = np.array([[0,0],[80,50]])*ureg.nautical_mile
+	bases = np.array([[15,15],[40,35],[65,15]])*ureg.nautical_mile
+	hospitals = np.array([[30,25],[60,30]])*ureg.nautical_mile
+	centers = np.array([[30,25],[60,30],[15,45]])*ureg.nautical_mile #population centers
+
+	rate_profile = np.array([0.5,0.4,0.4,0.4,0.5,0.7,0.9,1.1,1.2,1.2,1.2,1.2,1.2,1.2,1.2,1.2,
+		1.3,1.3,1.3,1.2,1.1,1.,0.8,0.6]) #hourly call multipliers
+	calls = generate_calls(30*ureg.day**-1,region,rate_profile=rate_profile,centers=centers,
+		weights=[3,2,1],spread=10*ureg.nautical_mile,seed=0)
+
+	print
+	print "%d calls over one year (cruise speed %0.0f kts, battery %0.0f kWh)" % \
+		(np.size(calls["t"]),performance["V_cruise"].to(ureg.knot).magnitude,
+		performance["C_eff"].to(ureg.kWh).magnitude)
+	print
+	print "Vehicles/base\tServed (%)\tMean response (min)\t90% response (min)\t" \
+		+ "Swaps/call\tUtilization (%)\tRun time (s)"
+	for N_vehicles in [1,2,3,4]:
+		t0 = time.time()
+		data = simulate_dispatch(performance,calls,bases,hospitals,N_vehicles)
+		print "%d\t\t%0.1f\t\t%0.1f\t\t\t%0.1f\t\t\t%0.2f\t\t%0.0f\t\t%0.2f" % (N_vehicles,
+			100.*data["N_served"]/data["N_calls"],data["response_mean"].to(ureg.minute).magnitude,
+			data["response_90"].to(ureg.minute).magnitude,data["swaps_per_call"],
+			100*np.mean(data["vehicle_utilization"]),time.time() - t0)
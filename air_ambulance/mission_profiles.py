@@ -2,7 +2,7 @@
 
 import os
 import sys
-sys.path.append(os.path.abspath(os.path.dirname(__file__) + '/..'))
+sys.path.append(os.path.dirname(os.path.abspath(__file__)) + '/..')
 
 import numpy as np
 from gpkit import Variable, Model, Vectorize, ureg
@@ -10,6 +10,7 @@ from matplotlib import pyplot as plt
 from aircraft_models import OnDemandAircraft, OnDemandMissionCost
 from aircraft_models import Crew, Passengers, FlightState 
 from aircraft_models import Hover, LevelFlight, TimeOnGround
+from aircraft_models import SegmentedMission, reserve_segment_spec
 from aircraft_models import CapitalExpenses, OperatingExpenses
 from study_input_data import generic_data, configuration_data
 from noise_models import vortex_noise
@@ -125,7 +126,7 @@ class AirAmbulanceSizingMission(Model):
 			p_ratio = Variable("p_{ratio}","-","Sound pressure ratio in hover")
 
 		constraints += [self.flight_segments, self.time_on_ground]
-		constraints += [self.crew, self.passengers]
+		constraints += [self.crew, self.passengers, self.medical_equipment]
 		constraints += [W >= aircraft.topvar("W_{empty}") + self.passengers.topvar("W") \
 			+ self.crew.topvar("W") + self.medical_equipment.topvar("W")]
 		constraints += [aircraft.topvar("MTOW") >= W]
@@ -163,6 +164,31 @@ class AirAmbulanceSizingMission(Model):
 		
 		return constraints
 
+def air_ambulance_segments(segment_range=[40,60,40]*ureg.nautical_mile,
+	t_hover=[30,120,30,30,30,30]*ureg.s,reserve_type="FAA_heli",loiter_type="level_flight"):
+	#Segment specifications (see SegmentedMission) for the AirAmbulanceSizingMission profile
+	return [{"type":"hover","t":t_hover[0]},#takeoff from base
+		{"type":"cruise","range":segment_range[0]},#fly to patient location
+		{"type":"hover","t":t_hover[1]},#hover/land at patient location
+		{"type":"hover","t":t_hover[2]},#takeoff from patient location
+		{"type":"cruise","range":segment_range[1]},#fly to hospital
+		{"type":"hover","t":t_hover[3]},#hover/land at hospital
+		{"type":"hover","t":t_hover[4]},#takeoff from hospital
+		{"type":"cruise","range":segment_range[2]},#fly to base
+		reserve_segment_spec(reserve_type,loiter_type),
+		{"type":"hover","t":t_hover[5]}]#land at base
+
+def air_ambulance_segmented_mission(aircraft,segments,V_cruise=150*ureg.mph,N_crew=3,
+	N_passengers=1,mission_type="piloted",tailRotor_power_fraction_hover=0.0001,
+	tailRotor_power_fraction_levelFlight=0.0001):
+	#Same mission as AirAmbulanceSizingMission (crew, patient, and medical equipment), built from
+	#segment specifications; any number of legs can be flown
+	return SegmentedMission(aircraft,segments,V_cruise=V_cruise,N_passengers=N_passengers,
+		W_onePassenger=225*ureg.lbf,N_crew=N_crew,W_oneCrew=225*ureg.lbf,
+		W_payload=150*ureg.lbf,charger_power=200*ureg.kW,#payload: medical equipment
+		mission_type=mission_type,tailRotor_power_fraction_hover=tailRotor_power_fraction_hover,
+		tailRotor_power_fraction_levelFlight=tailRotor_power_fraction_levelFlight)
+
 class AirAmbulanceMissionCost(Model):
 	#Cost for one mission. Exactly the same code as DeadheadMissionCost.
 	def setup(self,aircraft,mission,pilot_wrap_rate=70*ureg.hr**-1,
@@ -186,7 +212,43 @@ class AirAmbulanceMissionCost(Model):
 		constraints += [cost_per_mission == t_mission*cost_per_time]
 
 		return constraints
-	
+
+
+def test():
+	#Segmented mission must reproduce AirAmbulanceSizingMission
+	c = configuration_data["Tilt rotor"]
+	g = generic_data
+
+	solutions = []
+	for mission_builder in ["AirAmbulanceSizingMission","SegmentedMission"]:
+		Aircraft = OnDemandAircraft(N=c["N"],L_D_cruise=c["L/D"],eta_cruise=g["\eta_{cruise}"],
+			C_m=g["C_m"],Cl_mean_max=c["Cl_{mean_{max}}"],weight_fraction=c["weight_fraction"],
+			n=g["n"],eta_electric=g["\eta_{electric}"],
+			cost_per_weight=g["vehicle_cost_per_weight"],cost_per_C=g["battery_cost_per_C"],
+			autonomousEnabled=g["autonomousEnabled"])
+
+		if mission_builder == "AirAmbulanceSizingMission":
+			SizingMission = AirAmbulanceSizingMission(Aircraft,V_cruise=c["V_{cruise}"],
+				reserve_type=g["reserve_type"],loiter_type=c["loiter_type"])
+			SizingMission.substitutions.update({SizingMission.fs0.topvar("T/A"):c["T/A"]})
+			SizingMission.substitutions.update({SizingMission.topvar("segment_range"):
+				[40,60,40]*ureg.nautical_mile,
+				SizingMission.topvar("t_{hover}"):[30,120,30,30,30,30]*ureg.s})
+		else:
+			SizingMission = air_ambulance_segmented_mission(Aircraft,
+				air_ambulance_segments(reserve_type=g["reserve_type"],loiter_type=c["loiter_type"]),
+				V_cruise=c["V_{cruise}"])
+			SizingMission.substitutions.update({SizingMission.segment_variable("T/A",0):c["T/A"]})
+
+		MissionCost = AirAmbulanceMissionCost(Aircraft,SizingMission)
+		problem = Model(MissionCost.topvar("cost_per_mission"),[Aircraft,SizingMission,MissionCost])
+		solutions += [problem.solve(verbosity=0)]
+
+	for name in ["MTOW_OnDemandAircraft","C_{eff}_OnDemandAircraft",
+		"cost_per_mission_AirAmbulanceMissionCost"]:
+		assert abs(solutions[1](name)/solutions[0](name) - 1) < 1e-4
+
+
 if __name__=="__main__":
 	
 	eta_cruise = generic_data["\eta_{cruise}"] 
@@ -8,7 +8,7 @@ from standard_atmosphere import stdatmo
 class OnDemandAircraft(Model):
 	def setup(self,N,L_D_cruise,eta_cruise,weight_fraction,C_m,Cl_mean_max,s=0.1,n=1.,eta_electric=0.9,
 		cost_per_weight=350*ureg.lbf**-1,vehicle_life=20000*ureg.hour,cost_per_C=400*ureg.kWh**-1,
-		autonomousEnabled=False):
+		cycle_life=2000,peukert_mode="exponent",autonomousEnabled=False):
 		
 		MTOW = Variable("MTOW","lbf","Aircraft maximum takeoff weight")
 		W_empty = Variable("W_{empty}","lbf","Weight without passengers or crew")
@@ -26,7 +26,8 @@ class OnDemandAircraft(Model):
 		self.autonomousEnabled = autonomousEnabled
 
 		self.rotors = Rotors(N=N,Cl_mean_max=Cl_mean_max,s=s)
-		self.battery = Battery(C_m=C_m,n=n,cost_per_C=cost_per_C)
+		self.battery = Battery(C_m=C_m,n=n,cost_per_C=cost_per_C,cycle_life=cycle_life,
+			peukert_mode=peukert_mode)
 		self.structure = Structure(weight_fraction)
 		self.electricalSystem = ElectricalSystem(eta=eta_electric)
 		self.avionics = Avionics(autonomousEnabled=autonomousEnabled)
@@ -160,7 +161,7 @@ class Battery(Model):
 
 	#Requires a substitution or constraint for g (gravitational acceleration)
 	def setup(self,C_m=350*ureg.Wh/ureg.kg,usable_energy_fraction=0.8,P_m=3000*ureg.W/ureg.kg,
-		n=1.,cost_per_C=400*ureg.kWh**-1):
+		n=1.,cost_per_C=400*ureg.kWh**-1,cycle_life=2000,peukert_mode="exponent"):
 		
 		g = Variable("g","m/s**2","Gravitational acceleration")
 		
@@ -178,11 +179,12 @@ class Battery(Model):
 		cost_per_C = Variable("cost_per_C",cost_per_C,"kWh**-1",
 			"Battery cost per unit energy stored")
 		purchase_price = Variable("purchase_price","-","Purchase price of the battery")
-		cycle_life = Variable("cycle_life",2000,"-",
+		cycle_life = Variable("cycle_life",cycle_life,"-",
 			"Number of cycles before battery needs replacement")
 
 		self.P_max = P_max
 		self.n = n #battery discharge parameter (needed for Peukert effect)
+		self.peukert_mode = peukert_mode #"exponent" or "factor" (see BatteryPerformance)
 
 		constraints = []
 
@@ -201,7 +203,18 @@ class BatteryPerformance(Model):
 
 		self.t = t
 
-		constraints = [E==P*Rt*((t/Rt)**(1/battery.n)), P<=battery.P_max]
+		constraints = [P<=battery.P_max]
+
+		if battery.peukert_mode == "exponent":
+			constraints += [E==P*Rt*((t/Rt)**(1/battery.n))]
+
+		#Peukert effect as a substituted factor, f_Peukert = (t/Rt)**(1/n - 1). The model
+		#structure does not depend on n, so n can be swapped via substitutions only.
+		if battery.peukert_mode == "factor":
+			f_Peukert = Variable("f_{Peukert}",1.,"-","Peukert energy factor")
+			self.f_Peukert = f_Peukert
+			constraints += [E==P*t*f_Peukert]
+
 		return constraints
 
 class Crew(Model):
@@ -406,29 +419,26 @@ class OnDemandSizingMission(Model):
 		self.fs1 = LevelFlight(self,aircraft,V=V_cruise,
 			tailRotor_power_fraction=tailRotor_power_fraction_levelFlight)#fly to destination
 		
-		#Reserve segment
-		if reserve_type == "FAA_aircraft" or reserve_type == "FAA_heli":
+		#Reserve segment (see reserve_segment_spec)
+		reserve = reserve_segment_spec(reserve_type,loiter_type)
+		if reserve["type"] == "loiter" or reserve["type"] == "hover":
 			V_reserve = ((1/3.)**(1/4.))*V_cruise #Approximation for max-endurance speed
-			
-			if reserve_type == "FAA_aircraft":
-				#30-minute loiter time, as per VFR rules for aircraft (daytime only)
-				t_loiter = Variable("t_{loiter}",30,"minutes","Loiter time")
-			elif reserve_type == "FAA_heli":
-				#20-minute loiter time, as per VFR rules for helicopters
-				t_loiter = Variable("t_{loiter}",20,"minutes","Loiter time")
-
-			if loiter_type == "level_flight":#loiter segment is a level-flight segment
+			t_loiter = Variable("t_{loiter}",reserve["t"].to(ureg.minute).magnitude,"minutes",
+				"Loiter time")
+
+			if reserve["type"] == "loiter":
 				self.fs2 = LevelFlight(self,aircraft,V=V_reserve,segment_type="loiter",
 					tailRotor_power_fraction=tailRotor_power_fraction_levelFlight)
-			elif loiter_type == "hover":#loiter segment is a hover segment
+			else:
 				self.fs2 = Hover(self,aircraft,hoverState,
 					tailRotor_power_fraction=tailRotor_power_fraction_hover)
 
 			constraints += [t_loiter == self.fs2.topvar("t")]
 
-		if reserve_type == "Uber":#2-nautical-mile diversion distance; used by McDonald & German
+		if reserve["type"] == "cruise":#diversion
 			V_reserve = V_cruise
-			R_divert = Variable("R_{divert}",2,"nautical_mile","Diversion distance")
+			R_divert = Variable("R_{divert}",reserve["range"].to(ureg.nautical_mile).magnitude,
+				"nautical_mile","Diversion distance")
 			self.fs2 = LevelFlight(self,aircraft,V=V_reserve,segment_type="cruise",
 				tailRotor_power_fraction=tailRotor_power_fraction_levelFlight)#reserve segment
 			constraints += [R_divert == self.fs2.topvar("segment_range")]
@@ -680,6 +690,128 @@ class OnDemandDeadheadMission(Model):
 
         return constraints
 
+def reserve_segment_spec(reserve_type="FAA_heli",loiter_type="level_flight"):
+	#Reserve segment of a sizing mission, as a segment specification for SegmentedMission. Used by
+	#OnDemandSizingMission and mission_evaluation.reserve_segment.
+	if reserve_type == "FAA_aircraft":
+		t_loiter = 30*ureg.minute #VFR rules for aircraft (daytime only)
+	elif reserve_type == "FAA_heli":
+		t_loiter = 20*ureg.minute #VFR rules for helicopters
+	elif reserve_type == "Uber":#2-nautical-mile diversion distance; used by McDonald & German
+		return {"type":"cruise","range":2*ureg.nautical_mile}
+	else:
+		raise ValueError("Unknown reserve type: %s" % reserve_type)
+
+	if loiter_type == "level_flight":#loiter segment is a level-flight segment
+		return {"type":"loiter","t":t_loiter}
+	if loiter_type == "hover":#loiter segment is a hover segment
+		return {"type":"hover","t":t_loiter}
+	raise ValueError("Unknown loiter type: %s" % loiter_type)
+
+class SegmentedMission(Model):
+	#Mission built from a list of segment specifications. All segments of one type (hover, cruise,
+	#or loiter) share a single vectorized segment model, so the model size in Python objects does
+	#not grow with the number of segments. Segment specifications are dicts, e.g.
+	#	{"type":"hover","t":30*ureg.s}
+	#	{"type":"cruise","range":40*ureg.nautical_mile} (optional "V"; default V_cruise)
+	#	{"type":"loiter","t":20*ureg.minute} (optional "V"; default is the max-endurance speed)
+	#Values left out of a specification must be set via substitution (see segment_variable()).
+	#Time on ground (charging) is included if charger_power is given.
+	def setup(self,aircraft,segments,V_cruise=150*ureg.mph,N_passengers=1,
+		W_onePassenger=200*ureg.lbf,N_crew=1,W_oneCrew=190*ureg.lbf,W_payload=0*ureg.lbf,
+		charger_power=None,mission_type="piloted",tailRotor_power_fraction_hover=0.0001,
+		tailRotor_power_fraction_levelFlight=0.0001):
+
+		if not(aircraft.autonomousEnabled) and (mission_type != "piloted"):
+			raise ValueError("Autonomy is not enabled for Aircraft() model.")
+
+		W = Variable("W_{mission}","lbf","Weight of the aircraft during the mission")
+		W_payload = Variable("W_{payload}",W_payload,"lbf",
+			"Payload weight (other than passengers and crew)")
+
+		C_eff = aircraft.battery.topvar("C_{eff}") #effective battery capacity
+		E_mission = Variable("E_{mission}","kWh","Electrical energy used during mission")
+
+		self.W = W
+		self.E_mission = E_mission
+		self.mission_type = mission_type
+		self.crew = Crew(mission_type=mission_type,N_crew=N_crew,W_oneCrew=W_oneCrew)
+		self.passengers = Passengers(N_passengers=N_passengers,W_onePassenger=W_onePassenger)
+
+		hoverState = FlightState(h=0*ureg.ft)
+		V_reserve = ((1/3.)**(1/4.))*V_cruise #Approximation for max-endurance speed
+
+		#Index of each segment within the segment model of its type
+		self.segment_types = [segment["type"] for segment in segments]
+		self.segment_index = []
+		count = {"hover":0,"cruise":0,"loiter":0}
+		for segment_type in self.segment_types:
+			if segment_type not in count:
+				raise ValueError("Unknown segment type: %s" % segment_type)
+			self.segment_index += [count[segment_type]]
+			count[segment_type] += 1
+
+		self.segment_models = {}
+		if count["hover"]:
+			with Vectorize(count["hover"]):
+				self.segment_models["hover"] = Hover(self,aircraft,hoverState,
+					tailRotor_power_fraction=tailRotor_power_fraction_hover)
+		for segment_type, V_default in [("cruise",V_cruise),("loiter",V_reserve)]:
+			if count[segment_type]:
+				V = np.array([segment.get("V",V_default).to(ureg.mph).magnitude
+					for segment in segments if segment["type"] == segment_type])
+				with Vectorize(count[segment_type]):
+					self.segment_models[segment_type] = LevelFlight(self,aircraft,V=V,
+						segment_type=segment_type,
+						tailRotor_power_fraction=tailRotor_power_fraction_levelFlight)
+
+		#Power, energy, and time by mission segment
+		with Vectorize(len(segments)):
+			P_battery = Variable("P_{battery}","kW","Segment power draw")
+			E = Variable("E","kWh","Segment energy use")
+			t = Variable("t","s","Segment time")
+
+		constraints = []
+		constraints += [self.segment_models.values()]
+		constraints += [self.crew,self.passengers]
+
+		constraints += [W >= aircraft.topvar("W_{empty}") + self.passengers.topvar("W") \
+			+ self.crew.topvar("W") + W_payload]
+		constraints += [aircraft.topvar("MTOW") >= W]
+		constraints += [hoverState]
+
+		for i in range(len(segments)):
+			constraints += [P_battery[i] == self.segment_variable("P_{battery}",i),
+				E[i] == self.segment_variable("E",i), t[i] == self.segment_variable("t",i)]
+
+		constraints += [E_mission >= E.sum()]
+		constraints += [C_eff >= E_mission]
+
+		#Mission time (only bounded if the mission is costed, so only included with charging)
+		if charger_power is not None:
+			self.time_on_ground = TimeOnGround(self,charger_power=charger_power)
+			t_flight = Variable("t_{flight}","minutes","Time in flight")
+			t_mission = Variable("t_{mission}","minutes",
+				"Time to complete mission (including charging)")
+			constraints += [self.time_on_ground]
+			constraints += [t_flight >= t.sum()]
+			constraints += [t_mission >= t_flight + self.time_on_ground.topvar("t")]
+
+		#Segment values given in the specifications
+		substitutions = {}
+		for i,segment in enumerate(segments):
+			if "t" in segment:
+				substitutions[self.segment_variable("t",i)] = segment["t"]
+			if "range" in segment:
+				substitutions[self.segment_variable("segment_range",i)] = segment["range"]
+
+		return constraints, substitutions
+
+	def segment_variable(self,name,i):
+		#Variable of segment i (e.g. "t", "E", "segment_range", or "T/A" for hover segments)
+		segment_model = self.segment_models[self.segment_types[i]]
+		return segment_model.topvar(name)[self.segment_index[i]]
+
 class OnDemandMissionCost(Model):
 	#Includes both revenue and deadhead missions
 	def setup(self,aircraft,revenue_mission,deadhead_mission,pilot_wrap_rate=70*ureg.hr**-1,
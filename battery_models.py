@@ -0,0 +1,255 @@
+#Time-domain battery models. Not GP-compatible. Used to check the batteries sized by the GP models
+#against the power profiles of solved missions, and to estimate their cycle life.
+
+import math
+import numpy as np
+from gpkit import ureg
+
+#Representative lithium-ion (NMC) cell. Open-circuit voltage is tabulated against state of charge.
+default_cell = {}
+default_cell["Q"] = 3.0*ureg.A*ureg.hr #cell charge capacity
+default_cell["V_nominal"] = 3.6*ureg.V
+default_cell["SOC"] = np.array([0., 0.05, 0.1, 0.2, 0.3, 0.4, 0.5, 0.6, 0.7, 0.8, 0.9, 1.])
+default_cell["OCV"] = np.array([3.0, 3.3, 3.45, 3.55, 3.61, 3.66, 3.72, 3.8, 3.89, 3.98, 4.08,
+	4.2])*ureg.V
+default_cell["R_internal"] = 0.025*ureg.ohm #at T_ref
+default_cell["T_ref"] = 298.15*ureg.K
+default_cell["E_a/R"] = 3000*ureg.K #resistance temperature dependence (Arrhenius)
+default_cell["m"] = 0.048*ureg.kg
+default_cell["c_p"] = 1000*ureg.J/(ureg.kg*ureg.K)
+default_cell["hA"] = 0.01*ureg.W/ureg.K #cooling (per cell)
+default_cell["V_cutoff"] = 3.0*ureg.V
+default_cell["T_max"] = 333.15*ureg.K #60 deg C
+
+def mission_power_profile(solution,mission):
+	#Segment battery power and duration of a solved mission (any mission with flight_segments)
+	P = [solution(segment.topvar("P_{battery}")).to(ureg.kW).magnitude
+		for segment in mission.flight_segments]
+	t = [solution(segment.topvar("t")).to(ureg.s).magnitude
+		for segment in mission.flight_segments]
+	return {"P":np.array(P)*ureg.kW,"t":np.array(t)*ureg.s}
+
+def stack_power_profiles(profiles):
+	#Stacks profiles with different numbers of segments into (missions x segments) arrays.
+	#Missing segments are padded with zero duration.
+	num_segments = max(np.size(profile["t"]) for profile in profiles)
+	P = np.zeros([len(profiles),num_segments])
+	t = np.zeros([len(profiles),num_segments])
+	for i,profile in enumerate(profiles):
+		P[i,:np.size(profile["P"])] = profile["P"].to(ureg.kW).magnitude
+		t[i,:np.size(profile["t"])] = profile["t"].to(ureg.s).magnitude
+	return {"P":P*ureg.kW,"t":t*ureg.s}
+
+def simulate_discharge(P,t,C,cell=default_cell,V_pack=400*ureg.V,dt=1*ureg.s,SOC_0=1.,
+	T_0=298.15*ureg.K,T_ambient=298.15*ureg.K,save_history=False):
+	#Equivalent-circuit (open-circuit voltage + internal resistance) discharge simulation, with a
+	#lumped thermal model. P and t are (missions x segments) arrays of segment battery power and
+	#duration; C is the pack capacity (one value, or one per mission). All missions are simulated
+	#together. Pack layout: cells in series to reach V_pack; parallel strings to reach C.
+
+	P = np.atleast_2d(P.to(ureg.W).magnitude)
+	t = np.atleast_2d(t.to(ureg.s).magnitude)
+	num_missions, num_segments = np.shape(P)
+
+	Q = cell["Q"].to(ureg.A*ureg.s).magnitude
+	OCV_table = cell["OCV"].to(ureg.V).magnitude
+	R_ref = cell["R_internal"].to(ureg.ohm).magnitude
+	T_ref = cell["T_ref"].to(ureg.K).magnitude
+	Ea_R = cell["E_a/R"].to(ureg.K).magnitude
+	thermal_mass = (cell["m"]*cell["c_p"]).to(ureg.J/ureg.K).magnitude
+	hA = cell["hA"].to(ureg.W/ureg.K).magnitude
+	T_ambient = T_ambient.to(ureg.K).magnitude
+	dt = dt.to(ureg.s).magnitude
+
+	N_series = math.ceil((V_pack/cell["V_nominal"]).to(ureg.dimensionless).magnitude)
+	E_cell = (cell["Q"]*cell["V_nominal"]).to(ureg.kWh).magnitude
+	N_parallel = np.broadcast_to(C.to(ureg.kWh).magnitude/(N_series*E_cell),(num_missions,))
+	P_cell = P/(N_series*N_parallel[:,np.newaxis])
+
+	t_end = np.cumsum(t,axis=1) #segment end times
+	num_steps = int(math.ceil(np.max(t_end[:,-1])/dt))
+	rows = np.arange(num_missions)
+
+	SOC = SOC_0*np.ones(num_missions)
+	T = T_0.to(ureg.K).magnitude*np.ones(num_missions)
+	V_min = np.inf*np.ones(num_missions)
+	T_max = np.array(T)
+	I_max = np.zeros(num_missions)
+	I_sum = np.zeros(num_missions) #for time averages (over the active part of each mission)
+	T_sum = np.zeros(num_missions)
+	num_active = np.zeros(num_missions)
+	power_limited = np.zeros(num_missions,dtype=bool)
+
+	if save_history:
+		history = dict((key,np.zeros([num_steps,num_missions])) for key in ["V","I","SOC","T"])
+
+	for k in range(num_steps):
+		segment = np.sum((k + 0.5)*dt >= t_end,axis=1)
+		active = segment < num_segments
+		p = np.where(active,P_cell[rows,np.minimum(segment,num_segments-1)],0.)
+
+		OCV = np.interp(SOC,cell["SOC"],OCV_table)
+		R = R_ref*np.exp(Ea_R*(1/T - 1/T_ref))
+
+		#Current needed to deliver p (V*I = p, with V = OCV - I*R)
+		discriminant = OCV**2 - 4*R*p
+		power_limited |= active & (discriminant < 0)
+		I = (OCV - np.sqrt(np.maximum(discriminant,0)))/(2*R)
+		V = OCV - I*R
+
+		SOC = SOC - I*dt/Q
+		T = T + ((I**2)*R - hA*(T - T_ambient))*dt/thermal_mass
+
+		V_min = np.where(active,np.minimum(V_min,V),V_min)
+		T_max = np.maximum(T_max,T)
+		I_max = np.maximum(I_max,I)
+		I_sum += np.where(active,I,0.)
+		T_sum += np.where(active,T,0.)
+		num_active += active
+
+		if save_history:
+			history["V"][k], history["I"][k], history["SOC"][k], history["T"][k] = V, I, SOC, T
+
+	output = {}
+	output["N_series"] = N_series
+	output["N_parallel"] = N_parallel
+	output["V_cell_min"] = V_min*ureg.V
+	output["V_pack_min"] = N_series*V_min*ureg.V
+	output["T_max"] = T_max*ureg.K
+	output["SOC_final"] = SOC
+	output["C_rate_max"] = I_max/(Q/3600.)
+	output["C_rate_mean"] = I_sum/np.maximum(num_active,1)/(Q/3600.)
+	output["T_mean"] = (T_sum/np.maximum(num_active,1))*ureg.K
+	output["DoD"] = SOC_0 - SOC
+	output["power_limited"] = power_limited
+	output["voltage_ok"] = (V_min >= cell["V_cutoff"].to(ureg.V).magnitude) & ~power_limited
+	output["thermal_ok"] = T_max <= cell["T_max"].to(ureg.K).magnitude
+
+	if save_history:
+		output["time"] = (np.arange(num_steps) + 1)*dt*ureg.s
+		output["V_cell"] = history["V"]*ureg.V
+		output["I_cell"] = history["I"]*ureg.A
+		output["SOC"] = history["SOC"]
+		output["T"] = history["T"]*ureg.K
+	return output
+
+
+#Cycle-life model: number of cycles to end of life (capacity fade of fade_EOL) at the reference
+#depth of discharge, C-rate, and temperature, with stress factors for each.
+default_degradation = {}
+default_degradation["N_ref"] = 2000 #cycles to end of life at reference conditions
+default_degradation["fade_EOL"] = 0.2 #capacity fade at end of life
+default_degradation["DoD_ref"] = 0.8
+default_degradation["C_rate_ref"] = 1.
+default_degradation["T_ref"] = 298.15*ureg.K
+default_degradation["k_DoD"] = 1.5 #cycle life ~ DoD^-k_DoD
+default_degradation["k_C"] = 0.25 #cycle life ~ exp(-k_C*(C_rate - C_rate_ref))
+default_degradation["E_a/R"] = 3700*ureg.K #Arrhenius temperature dependence
+
+def capacity_fade(DoD,C_rate,T,parameters=default_degradation):
+	#Capacity fade (fraction of initial capacity) caused by one mission. Inputs are arrays (one
+	#entry per mission record), broadcast against each other.
+	p = parameters
+	T = T.to(ureg.K).magnitude
+	T_ref = p["T_ref"].to(ureg.K).magnitude
+	Ea_R = p["E_a/R"].to(ureg.K).magnitude
+
+	damage = ((np.asarray(DoD)/p["DoD_ref"])**p["k_DoD"]) \
+		*np.exp(p["k_C"]*(np.asarray(C_rate) - p["C_rate_ref"])) \
+		*np.exp(Ea_R*(1/T_ref - 1/T))
+	return p["fade_EOL"]*damage/p["N_ref"]
+
+def effective_cycle_life(DoD,C_rate,T,weights=None,parameters=default_degradation):
+	#Number of missions to end of life, for a mix of missions (weights: relative frequency of
+	#each mission record). This is the cycle_life to use in Battery and BatteryAcquisitionCost.
+	fade = capacity_fade(DoD,C_rate,T,parameters)
+	return parameters["fade_EOL"]/np.average(fade,weights=weights)
+
+def simulation_cycle_life(simulation,weights=None,parameters=default_degradation):
+	#Effective cycle life from the output of simulate_discharge()
+	return effective_cycle_life(simulation["DoD"],simulation["C_rate_mean"],
+		simulation["T_mean"],weights,parameters)
+
+
+def test():
+	P = np.array([[300.,100.,300.],[200.,150.,0.],[400.,400.,400.]])*ureg.kW
+	t = np.array([[60.,600.,60.],[60.,1200.,0.],[30.,30.,30.]])*ureg.s
+	C = np.array([80.,100.,60.])*ureg.kWh
+
+	#Vectorized simulation must match single-mission simulations (padding has no effect)
+	data = simulate_discharge(P,t,C)
+	for i in range(3):
+		num_segments = 2 if i == 1 else 3
+		single = simulate_discharge(P[i,:num_segments],t[i,:num_segments],C[i])
+		assert abs(single["SOC_final"][0] - data["SOC_final"][i]) < 1e-12
+		assert abs(single["V_cell_min"][0] - data["V_cell_min"][i]) < 1e-12*ureg.V
+
+	#Lossless cell with constant voltage: charge used must equal mission energy
+	cell = dict(default_cell)
+	cell["OCV"] = 3.6*np.ones(np.size(cell["SOC"]))*ureg.V
+	cell["R_internal"] = 1e-9*ureg.ohm
+	data = simulate_discharge(P,t,C,cell=cell)
+	E = np.sum(P*t,axis=1).to(ureg.kWh).magnitude
+	assert np.all(np.abs((1 - data["SOC_final"]) - E/C.magnitude) < 1e-6)
+
+	#Cycle life at reference conditions; shorter for deeper, faster, or hotter discharges
+	p = default_degradation
+	N = effective_cycle_life(p["DoD_ref"],p["C_rate_ref"],p["T_ref"])
+	assert abs(N - p["N_ref"]) < 1e-9
+	for DoD, C_rate, T in [(0.9,1.,p["T_ref"]),(0.8,2.,p["T_ref"]),(0.8,1.,p["T_ref"]+10*ureg.K)]:
+		assert effective_cycle_life(DoD,C_rate,T) < p["N_ref"]
+
+	#A mix of missions wears the battery at the average rate
+	DoD = np.array([0.2,0.8,0.8])
+	N = effective_cycle_life(DoD,1.,p["T_ref"],weights=[2,1,0])
+	fade = capacity_fade(DoD,1.,p["T_ref"])
+	assert abs(N*(2*fade[0] + fade[1])/3 - p["fade_EOL"]) < 1e-12
+
+
+if __name__=="__main__":
+
+	#Replay the sizing, revenue, and deadhead missions of every configuration in one simulation
+	from study_input_data import generic_data, configuration_data
+	from on_demand_model import build_problem
+
+	profiles = []
+	C = []
+	labels = []
+
+	for config in configuration_data:
+		problem = build_problem(configuration_data[config])
+		Aircraft, SizingMission, RevenueMission, DeadheadMission = problem[0:4]
+
+		try:
+			solution = problem.solve(verbosity=0)
+		except Exception:
+			print "Configuration not solved: " + config
+			continue
+
+		for mission_name, mission in zip(["Sizing","Revenue","Deadhead"],
+			[SizingMission, RevenueMission, DeadheadMission]):
+			profiles += [mission_power_profile(solution,mission)]
+			C += [solution(Aircraft.battery.topvar("C")).to(ureg.kWh).magnitude]
+			labels += [(config, mission_name)]
+
+	profiles = stack_power_profiles(profiles)
+	data = simulate_discharge(profiles["P"],profiles["t"],np.array(C)*ureg.kWh)
+
+	print
+	print "Configuration\tMission\t\tMin. voltage (V/cell)\tMax. T (deg C)\tMax. C-rate\tFinal SOC"
+	for i,(config,mission_name) in enumerate(labels):
+		flag = "" if (data["voltage_ok"][i] and data["thermal_ok"][i]) else "\t(limit exceeded)"
+		print "%s\t%s\t\t%0.3f\t\t\t%0.1f\t\t%0.2f\t\t%0.3f%s" % (config[:13],mission_name,
+			data["V_cell_min"][i].to(ureg.V).magnitude,
+			data["T_max"][i].to(ureg.K).magnitude - 273.15,data["C_rate_max"][i],
+			data["SOC_final"][i],flag)
+
+	#Effective cycle life of each configuration, for its revenue/deadhead mission mix
+	deadhead_ratio = generic_data["deadhead_ratio"]
+	print
+	print "Configuration\tEffective cycle life (missions)"
+	for i in range(0,len(labels),3):
+		weights = [0.,1 - deadhead_ratio,deadhead_ratio]
+		N = effective_cycle_life(data["DoD"][i:i+3],data["C_rate_mean"][i:i+3],
+			data["T_mean"][i:i+3],weights)
+		print "%s\t%0.0f" % (labels[i][0][:13],N)
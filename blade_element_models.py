@@ -0,0 +1,209 @@
+#Blade-element/momentum (BEMT) rotor analysis, using XROTOR-format input files. Not GP-compatible.
+#Used to check the assumptions (ki, Cd0) of the GP rotor model. Coefficients follow the same
+#convention as RotorsAero: T = 0.5*rho*A*(VT**2)*CT and P = 0.5*rho*A*(VT**3)*CP.
+
+import os
+import math
+import numpy as np
+from gpkit import ureg
+
+def read_xrotor_file(filename):
+	#Parses an XROTOR save file (as written by the XROTOR SAVE command)
+
+	with open(filename) as f:
+		lines = [line.strip() for line in f]
+
+	#Data lines only (comment lines start with "!")
+	data = [line.split() for line in lines[2:] if line and not line.startswith("!")]
+
+	rotor = {}
+	rotor["version"] = lines[0].split(":")[-1].strip()
+	rotor["name"] = lines[1]
+
+	rho, a, mu, h = [float(value) for value in data[0]]
+	rotor["rho"] = rho*ureg.kg/ureg.m**3
+	rotor["a"] = a*ureg.m/ureg.s
+	rotor["mu"] = mu*ureg.kg/(ureg.m*ureg.s)
+	rotor["h"] = h*ureg.km
+
+	R, V, adv, rake = [float(value) for value in data[1]]
+	rotor["R"] = R*ureg.m
+	rotor["V"] = V*ureg.m/ureg.s
+	rotor["adv"] = adv
+	rotor["rake"] = rake
+
+	rotor["XI0"], rotor["XIW"] = [float(value) for value in data[2]]
+
+	#Aerodynamic sections
+	num_aero_sections = int(data[3][0])
+	rotor["aero_sections"] = []
+	i = 4
+	for j in range(num_aero_sections):
+		section = {}
+		section["Xisection"] = float(data[i][0])
+		section["A0deg"], section["dCLdA"], section["CLmax"], section["CLmin"] = \
+			[float(value) for value in data[i+1]]
+		section["dCLdAstall"], section["dCLstall"], section["Cmconst"], section["Mcrit"] = \
+			[float(value) for value in data[i+2]]
+		section["CDmin"], section["CLCDmin"], section["dCDdCL^2"] = \
+			[float(value) for value in data[i+3]]
+		section["REref"], section["REexp"] = [float(value) for value in data[i+4]]
+		rotor["aero_sections"] += [section]
+		i += 5
+
+	rotor["LVDuct"], rotor["LDuct"], rotor["LWind"] = [value == "T" for value in data[i][:3]]
+	i += 1
+
+	#Blade geometry
+	num_stations = int(data[i][0])
+	rotor["B"] = int(data[i][1])
+	i += 1
+	geometry = np.array([[float(value) for value in line] for line in data[i:i+num_stations]])
+	rotor["r/R"] = geometry[:,0]
+	rotor["c/R"] = geometry[:,1]
+	rotor["beta"] = geometry[:,2]*ureg.degree
+	rotor["Ubody"] = geometry[:,3]
+	i += num_stations
+
+	if rotor["LDuct"] and i < len(data):
+		rotor["URDuct"] = float(data[i][0])
+
+	return rotor
+
+def bemt_hover(rotor,VT,collective=0*ureg.degree,V_climb=0*ureg.ft/ureg.s,rho=None,
+	tip_loss=True,num_iterations=20):
+	#Hover (or axial-climb) performance. VT and collective can be arrays (they are broadcast
+	#against each other), so that a whole sweep is evaluated at once. Uses the combined
+	#blade-element/momentum inflow equation (Leishman, Ch. 3) with Prandtl tip losses;
+	#incompressible, small inflow angles.
+
+	if rotor["LDuct"]:
+		raise ValueError("Ducted rotors are not supported.")
+
+	pi = math.pi
+
+	if rho is None:
+		rho = rotor["rho"]
+	rho = rho.to(ureg.kg/ureg.m**3).magnitude
+	mu = rotor["mu"].to(ureg.kg/(ureg.m*ureg.s)).magnitude
+	R = rotor["R"].to(ureg.m).magnitude
+	B = rotor["B"]
+
+	VT, collective = np.broadcast_arrays(VT.to(ureg.m/ureg.s).magnitude,
+		collective.to(ureg.rad).magnitude)
+	VT = VT[...,np.newaxis] #last axis is the blade station
+	collective = collective[...,np.newaxis]
+	lambda_c = V_climb.to(ureg.m/ureg.s).magnitude/VT
+
+	#Stations are at panel centers; panels extend from the hub (XI0) to the tip
+	r = rotor["r/R"]
+	r_edges = np.concatenate(([rotor["XI0"]],(r[:-1]+r[1:])/2,[1.]))
+	dr = np.diff(r_edges)
+
+	sigma = B*rotor["c/R"]/pi #local solidity
+	aero = _aero_coefficients(rotor)
+	theta = rotor["beta"].to(ureg.rad).magnitude + collective - aero["alpha_0"]
+
+	#Inflow (with Prandtl tip-loss factor F)
+	F = np.ones(np.shape(theta))
+	for i in range(num_iterations if tip_loss else 1):
+		k = sigma*aero["dCLdA"]/(16*F) - lambda_c/2
+		inflow = np.sqrt(np.maximum(k**2 + sigma*aero["dCLdA"]*theta*r/(8*F),0)) - k
+
+		if tip_loss:
+			phi = np.maximum(inflow/r,1e-6)
+			f = (B/2.)*(1-r)/(r*phi)
+			F = np.maximum((2/pi)*np.arccos(np.exp(-f)),1e-3)
+
+	#Blade-element loads
+	alpha = theta - inflow/r
+	Cl = np.clip(aero["dCLdA"]*alpha,aero["CLmin"],aero["CLmax"])
+	Re = rho*VT*np.sqrt(r**2 + inflow**2)*(rotor["c/R"]*R)/mu
+	Cd = (aero["CDmin"] + aero["dCDdCL^2"]*(Cl-aero["CLCDmin"])**2) \
+		*(Re/aero["REref"])**aero["REexp"]
+
+	#Coefficients, in the standard convention (T = rho*A*VT^2*CT)
+	dCT = 0.5*sigma*Cl*(r**2)*dr
+	CT = np.sum(dCT,axis=-1)
+	CPi = np.sum(inflow*dCT,axis=-1)
+	CPp = np.sum(0.5*sigma*Cd*(r**3)*dr,axis=-1)
+
+	#Thrust-weighted solidity
+	s = 3*np.sum(sigma*(r**2)*dr)
+
+	#Convert to the RotorsAero convention
+	output = {}
+	output["CT"] = 2*CT
+	output["CPi"] = 2*CPi
+	output["CPp"] = 2*CPp
+	output["CP"] = output["CPi"] + output["CPp"]
+	output["s"] = s
+
+	CPi_ideal = 0.5*np.maximum(output["CT"],0)**1.5
+	output["FOM"] = CPi_ideal/output["CP"]
+	output["Cl_mean"] = 3*output["CT"]/s
+	output["ki"] = output["CPi"]/CPi_ideal #induced power factor
+	output["Cd0"] = output["CPp"]/(0.25*s) #equivalent profile drag coefficient
+
+	A = pi*R**2
+	VT = VT[...,0]
+	output["T"] = (0.5*rho*A*(VT**2)*output["CT"])*ureg.N
+	output["P"] = (0.5*rho*A*(VT**3)*output["CP"])*ureg.W
+	return output
+
+def _aero_coefficients(rotor):
+	#Airfoil parameters at each blade station (interpolated between aero sections)
+	sections = rotor["aero_sections"]
+	xi = [section["Xisection"] for section in sections]
+
+	aero = {}
+	for key in ["A0deg","dCLdA","CLmax","CLmin","CDmin","CLCDmin","dCDdCL^2","REref","REexp"]:
+		aero[key] = np.interp(rotor["r/R"],xi,[section[key] for section in sections])
+	aero["alpha_0"] = np.radians(aero["A0deg"])
+	return aero
+
+
+xrotor_directory = os.path.dirname(os.path.abspath(__file__)) + "/xrotor_analysis"
+
+def test():
+	rotor = read_xrotor_file(xrotor_directory + "/lift_cruise_rotor")
+	assert rotor["B"] == 4
+	assert np.size(rotor["r/R"]) == 30
+
+	VT = np.linspace(100,200,5)*ureg.m/ureg.s
+	collective = np.linspace(0,10,4)*ureg.degree
+	data = bemt_hover(rotor,VT[:,np.newaxis],collective[np.newaxis,:])
+	assert np.shape(data["CT"]) == (5,4)
+
+	#Vectorized evaluation must match point-by-point evaluation
+	point = bemt_hover(rotor,VT[2],collective[3])
+	assert abs(point["CT"] - data["CT"][2,3]) < 1e-12
+	assert abs(point["CP"] - data["CP"][2,3]) < 1e-12
+
+	#Thrust increases with collective; induced losses and FOM must be physical
+	assert np.all(np.diff(data["CT"],axis=1) > 0)
+	assert np.all(data["ki"][:,1:] >= 1)
+	assert np.all((data["FOM"] > 0) & (data["FOM"] < 1))
+
+
+if __name__=="__main__":
+
+	#Hover sweeps of the rotors in xrotor_analysis/, compared with the GP-model assumptions
+	VT = np.linspace(400,800,5)*ureg.ft/ureg.s
+	collective = np.linspace(0,12,7)*ureg.degree
+
+	for filename in ["lift_cruise_rotor","test_prop"]:
+		rotor = read_xrotor_file(xrotor_directory + "/" + filename)
+		data = bemt_hover(rotor,VT[:,np.newaxis],collective[np.newaxis,:])
+
+		print
+		print "Rotor: %s (%s; R = %0.3f m; %d blades; s = %0.3f)" % (filename, rotor["name"],
+			rotor["R"].to(ureg.m).magnitude, rotor["B"], data["s"])
+		print
+		print "VT (ft/s)\tCollective (deg)\tCT\t\tCP\t\tFOM\tki\tCd0"
+		for i in range(np.size(VT)):
+			for j in range(np.size(collective)):
+				print "%0.0f\t\t%0.1f\t\t\t%0.5f\t\t%0.6f\t%0.3f\t%0.3f\t%0.4f" \
+					% (VT[i].to(ureg.ft/ureg.s).magnitude,
+					collective[j].to(ureg.degree).magnitude, data["CT"][i,j],
+					data["CP"][i,j], data["FOM"][i,j], data["ki"][i,j], data["Cd0"][i,j])
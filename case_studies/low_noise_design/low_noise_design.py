@@ -14,6 +14,7 @@ from study_input_data import generic_data, configuration_data
 from copy import deepcopy
 from collections import OrderedDict
 from noise_models import vortex_noise
+from sweep_tools import load_checkpoint, checkpoint_solve
 
 import matplotlib as mpl
 mpl.style.use("classic")
@@ -157,6 +158,19 @@ for config in configs:
 		del pared_configs[config]
 configs = deepcopy(pared_configs)
 
+#Solved points are checkpointed; rerun with --resume to skip them. Points that cannot be solved
+#(or not within solve_timeout) are reported once the others are solved, and left out of the
+#plots.
+solve_timeout = 300*ureg.s
+failed_points = []
+checkpoint = load_checkpoint(os.path.join(os.path.dirname(os.path.abspath(__file__)),
+	"low_noise_design_checkpoint.txt"),resume="--resume" in sys.argv)
+saved_variables = ["MTOW_OnDemandAircraft","W_OnDemandAircraft/Battery",
+	"cost_per_trip_per_passenger_OnDemandMissionCost","T_perRotor_OnDemandSizingMission",
+	"Q_perRotor_OnDemandSizingMission","R","VT_OnDemandSizingMission","s","Cl_{mean_{max}}","N",
+	"\omega_OnDemandSizingMission","t_{loiter}_OnDemandSizingMission"]
+saved_constants = ["R_{divert}_OnDemandSizingMission"]
+
 #Optimize remaining configurations
 for config in configs:
 	
@@ -211,7 +225,11 @@ for config in configs:
 		problem = Model(MissionCost["cost_per_trip"],
 			[Aircraft, SizingMission, RevenueMission, DeadheadMission, MissionCost])
 	
-		solution = problem.solve(verbosity=0)
+		solution = checkpoint_solve(checkpoint,"%s; %s" % (config,case),problem,saved_variables,
+			saved_constants,timeout=solve_timeout.to(ureg.s).magnitude)
+		if solution["status"] != "solved":
+			failed_points += ["%s; %s: %s" % (config,case,solution["status"])]
+			continue
 
 		configs[config][case]["solution"] = solution
 
@@ -242,6 +260,22 @@ for config in configs:
 		configs[config][case]["SPL_A"] = SPL
 		
 
+if failed_points:
+	print
+	print "Not solved (points that timed out are solved again with --resume):"
+	for point in failed_points:
+		print "\t" + point
+
+#Configuration in which each case is first solved (labelled in the legends)
+first_solved = {}
+for config in configs:
+	for case in configs[config]:
+		if "solution" in configs[config][case] and case not in first_solved:
+			first_solved[case] = config
+			solution = configs[config][case]["solution"] #for the reserve data, below
+if not first_solved:
+	sys.exit("No point was solved")
+
 # Plotting commands
 plt.ion()
 fig1 = plt.figure(figsize=(12,12), dpi=80)
@@ -266,10 +300,12 @@ plt.subplot(2,2,1)
 for i,config in enumerate(configs):
 	for j,case in enumerate(configs[config]):
 		c = configs[config][case]
+		if "solution" not in c:
+			continue
 		offset = offset_array[j]
 		MTOW = c["MTOW"].to(ureg.lbf).magnitude
 
-		if (i == 0):
+		if config == first_solved[case]:
 			plt.bar(i+offset,MTOW,align='center',alpha=1,width=width,color=colors[j],
 				label=case)
 		else:
@@ -292,10 +328,12 @@ plt.subplot(2,2,2)
 for i,config in enumerate(configs):
 	for j,case in enumerate(configs[config]):
 		c = configs[config][case]
+		if "solution" not in c:
+			continue
 		offset = offset_array[j]
 		cptpp = c["cost_per_trip_per_passenger"]
 
-		if (i == 0):
+		if config == first_solved[case]:
 			plt.bar(i+offset,cptpp,align='center',alpha=1,width=width,color=colors[j],
 				label=case)
 		else:
@@ -316,10 +354,12 @@ plt.subplot(2,2,3)
 for i,config in enumerate(configs):
 	for j,case in enumerate(configs[config]):
 		c = configs[config][case]
+		if "solution" not in c:
+			continue
 		offset = offset_array[j]
 		SPL_sizing = c["SPL"]
 
-		if (i == 0):
+		if config == first_solved[case]:
 			plt.bar(i+offset,SPL_sizing,align='center',alpha=1,width=width,color=colors[j],
 				label=case)
 		else:
@@ -339,10 +379,12 @@ plt.subplot(2,2,4)
 for i,config in enumerate(configs):
 	for j,case in enumerate(configs[config]):
 		c = configs[config][case]
+		if "solution" not in c:
+			continue
 		offset = offset_array[j]
 		SPL_sizing = c["SPL_A"]
 
-		if (i == 0):
+		if config == first_solved[case]:
 			plt.bar(i+offset,SPL_sizing,align='center',alpha=1,width=width,color=colors[j],
 				label=case)
 		else:
@@ -399,10 +441,12 @@ plt.subplot(2,2,1)
 for i,config in enumerate(configs):
 	for j,case in enumerate(configs[config]):
 		c = configs[config][case]
+		if "solution" not in c:
+			continue
 		offset = offset_array[j]
 		f_peak = c["f_{peak}"].to(ureg.turn/ureg.s).magnitude
 
-		if (i == 0):
+		if config == first_solved[case]:
 			plt.bar(i+offset,f_peak,align='center',alpha=1,width=width,color=colors[j],
 				label=case,log=True)
 		else:
@@ -424,10 +468,12 @@ plt.subplot(2,2,2)
 for i,config in enumerate(configs):
 	for j,case in enumerate(configs[config]):
 		c = configs[config][case]
+		if "solution" not in c:
+			continue
 		offset = offset_array[j]
 		R = c["solution"]("R").to(ureg.ft).magnitude
 
-		if (i == 0):
+		if config == first_solved[case]:
 			plt.bar(i+offset,R,align='center',alpha=1,width=width,color=colors[j],
 				label=case)
 		else:
@@ -446,10 +492,12 @@ plt.subplot(2,2,3)
 for i,config in enumerate(configs):
 	for j,case in enumerate(configs[config]):
 		c = configs[config][case]
+		if "solution" not in c:
+			continue
 		offset = offset_array[j]
 		rpm = c["solution"]("\omega_OnDemandSizingMission")[0].to(ureg.rpm).magnitude
 
-		if (i == 0):
+		if config == first_solved[case]:
 			plt.bar(i+offset,rpm,align='center',alpha=1,width=width,color=colors[j],
 				label=case)
 		else:
@@ -468,10 +516,12 @@ plt.subplot(2,2,4)
 for i,config in enumerate(configs):
 	for j,case in enumerate(configs[config]):
 		c = configs[config][case]
+		if "solution" not in c:
+			continue
 		offset = offset_array[j]
 		VT = c["solution"]("VT_OnDemandSizingMission")[0].to(ureg.ft/ureg.s).magnitude
 
-		if (i == 0):
+		if config == first_solved[case]:
 			plt.bar(i+offset,VT,align='center',alpha=1,width=width,color=colors[j],
 				label=case)
 		else:
@@ -489,4 +539,7 @@ plt.legend(loc='upper right', fontsize = 12)
 plt.suptitle(title_str,fontsize = 13.0)
 plt.tight_layout()
 plt.subplots_adjust(left=0.08,right=0.98,bottom=0.10,top=0.87)
-plt.savefig('low_noise_design_plot_02.pdf')
\ No newline at end of file
+plt.savefig('low_noise_design_plot_02.pdf')
+
+if failed_points:
+	sys.exit(1)
@@ -13,6 +13,7 @@ from aircraft_models import OnDemandDeadheadMission, OnDemandMissionCost
 from study_input_data import generic_data, configuration_data
 from noise_models import vortex_noise
 from scipy.interpolate import interp2d
+from sweep_tools import load_checkpoint, checkpoint_solve
 
 import matplotlib as mpl
 mpl.style.use("classic")
@@ -96,6 +97,17 @@ config = sizing_plot_config
 
 c = configs[config]
 
+#Solved points are checkpointed; rerun with --resume to skip them. Points that cannot be solved
+#(or not within solve_timeout) are left out of the plot, and of the interpolation.
+solve_timeout = 300*ureg.s
+checkpoint = load_checkpoint(os.path.join(os.path.dirname(os.path.abspath(__file__)),
+	"sizing_plot_checkpoint.txt"),resume="--resume" in sys.argv)
+saved_variables = ["MTOW_OnDemandAircraft","cost_per_trip_per_passenger_OnDemandMissionCost",
+	"T_perRotor_OnDemandSizingMission","Q_perRotor_OnDemandSizingMission","R",
+	"VT_OnDemandSizingMission","s","Cl_{mean_{max}}","N","t_{loiter}_OnDemandSizingMission"]
+saved_constants = ["R_{divert}_OnDemandSizingMission"]
+solved_point = None
+
 for i, T_A in enumerate(T_A_array[:,0]):
 	for j, L_D_cruise in enumerate(L_D_array[0]):
 		
@@ -132,7 +144,15 @@ for i, T_A in enumerate(T_A_array[:,0]):
 		problem = Model(MissionCost["cost_per_trip"],
 			[Aircraft, SizingMission, RevenueMission, DeadheadMission, MissionCost])
 	
-		solution = problem.solve(verbosity=0)
+		point = "%s; T/A = %0.6g lbf/ft^2; L/D = %0.6g" \
+			% (config,T_A.to(ureg.lbf/ureg.ft**2).magnitude,L_D_cruise)
+		solution = checkpoint_solve(checkpoint,point,problem,saved_variables,saved_constants,
+			timeout=solve_timeout.to(ureg.s).magnitude)
+		if solution["status"] != "solved":
+			print "%s: %s" % (point,solution["status"])
+			MTOW_array[i,j] = cptpp_array[i,j] = SPL_array[i,j] = SPL_A_array[i,j] = np.nan
+			continue
+		solved_point = solution
 
 		MTOW_array[i,j] = solution("MTOW_OnDemandAircraft").to(ureg.lbf).magnitude
 		cptpp_array[i,j] = solution("cost_per_trip_per_passenger_OnDemandMissionCost")
@@ -156,7 +176,11 @@ for i, T_A in enumerate(T_A_array[:,0]):
 			Cl_mean=Cl_mean,N=N,B=B,delta_S=delta_S,h=0*ureg.ft,t_c=0.12,St=0.28,
 			weighting="A")
 
+if solved_point is None:
+	sys.exit("No point of the sizing plot was solved (points that timed out are solved again "
+		+ "with --resume)")
 MTOW_array = MTOW_array*ureg.lbf
+solution = solved_point #for the reserve data, below
 
 
 #Add Boeing inputs to configs
@@ -165,11 +189,15 @@ for config in boeing_data:
 	configs[label] = boeing_data[config]
 
 	
-#Set up the bilinear interpolation functions
-cptpp_interp = interp2d(L_D_array,T_A_array.to(ureg.lbf/ureg.ft**2).magnitude,\
-	cptpp_array,kind="cubic")
-SPL_A_interp = interp2d(L_D_array,T_A_array.to(ureg.lbf/ureg.ft**2).magnitude,\
-	SPL_A_array,kind="cubic")
+#Set up the bilinear interpolation functions, from the solved points only
+solved = np.isfinite(cptpp_array) & np.isfinite(SPL_A_array)
+if np.sum(solved) < 16:
+	sys.exit("Too few points of the sizing plot were solved to interpolate (%d of %d)" \
+		% (np.sum(solved),np.size(solved)))
+cptpp_interp = interp2d(L_D_array[solved],T_A_array.to(ureg.lbf/ureg.ft**2).magnitude[solved],\
+	cptpp_array[solved],kind="cubic")
+SPL_A_interp = interp2d(L_D_array[solved],T_A_array.to(ureg.lbf/ureg.ft**2).magnitude[solved],\
+	SPL_A_array[solved],kind="cubic")
 	
 	
 #Estimated cptpp and SPL_A
@@ -195,9 +223,11 @@ for i,L_D in enumerate(L_D_array[0,:]):
 	cptpp_row = cptpp_array[:,i]
 	SPL_A_row = SPL_A_array[:,i]
 	plt.plot(cptpp_row,SPL_A_row,'k-',linewidth=2)
+	if not np.any(solved[:,i]):
+		continue
 	
-	x = cptpp_row[0]
-	y = SPL_A_row[0]
+	x = cptpp_row[solved[:,i]][0]
+	y = SPL_A_row[solved[:,i]][0]
 	label = "L/D = %0.1f" % L_D
 	plt.text(x+0.3,y-0.3,label,fontsize=16,rotation=-45)
 
@@ -206,9 +236,11 @@ for i,T_A in enumerate(T_A_array[:,0]):
 	cptpp_row = cptpp_array[i,:]
 	SPL_A_row = SPL_A_array[i,:]
 	plt.plot(cptpp_row,SPL_A_row,'k-',linewidth=2)
+	if not np.any(solved[i,:]):
+		continue
 	
-	x = cptpp_row[-1]
-	y = SPL_A_row[-1]
+	x = cptpp_row[solved[i,:]][-1]
+	y = SPL_A_row[solved[i,:]][-1]
 	label = "T/A = %0.1f lbf/ft$^2$" % T_A.to(ureg.lbf/ureg.ft**2).magnitude
 	plt.text(x-18,y-0.2,label,fontsize=16,rotation=0)
 
@@ -0,0 +1,145 @@
+#Vertiport charger planning. Not GP-compatible. Charger counts and queueing delays are computed
+#from a solved design (mission energies and times; see TimeOnGround) and a demand profile, with
+#an M/M/c (Erlang C) queue at each vertiport. All results are vectorized over candidate charger
+#power values and fleet sizes.
+
+import numpy as np
+from gpkit import ureg
+
+def mission_ground_data(solution):
+	#Mission energies and times of a solved design
+	data = {}
+	for mission_type in ["revenue","deadhead"]:
+		mission_name = "OnDemand" + mission_type.capitalize() + "Mission"
+		data[mission_type] = {
+			"E_{mission}":solution("E_{mission}_" + mission_name),
+			"t_{flight}":solution("t_{flight}_" + mission_name)}
+	data["t_{passenger}"] = solution("t_{passenger}_OnDemandRevenueMission/TimeOnGround")
+	data["charger_power"] = solution("charger_power_OnDemandRevenueMission/TimeOnGround")
+	return data
+
+def erlang_c(a,c_max):
+	#Probability of waiting in an M/M/c queue with offered load a (in Erlangs), for c = 1..c_max.
+	#Returns an array of shape (c_max,) + shape(a); 1 where the queue is unstable (a >= c).
+	#Uses the Erlang B recursion, which is numerically stable for large c.
+	a = np.asarray(a,dtype=float)
+	B = np.ones(np.shape(a))
+	C = np.ones((c_max,) + np.shape(a))
+	for c in range(1,c_max+1):
+		B = a*B/(c + a*B)
+		with np.errstate(divide="ignore",invalid="ignore"):
+			C[c-1] = np.where(a < c,c*B/(c - a*(1 - B)),1.)
+	return C
+
+def plan_chargers(data,trip_rate,charger_power,N_vehicles,deadhead_ratio=0.2,
+	max_wait=5*ureg.minute,c_max=100):
+	#Charger counts needed at each vertiport so that the mean wait for a charger stays below
+	#max_wait in every hour of the demand profile.
+	#trip_rate: (vertiports x hours) array of revenue-trip arrivals per unit time at each vertiport.
+	#charger_power, N_vehicles: arrays of candidate values. Results have leading dimensions
+	#(charger_power, N_vehicles).
+
+	P = np.atleast_1d(charger_power.to(ureg.kW).magnitude)[:,np.newaxis,np.newaxis,np.newaxis]
+	N = np.atleast_1d(N_vehicles).astype(float)[np.newaxis,:,np.newaxis,np.newaxis]
+	rate = trip_rate.to(ureg.hr**-1).magnitude[np.newaxis,np.newaxis,:,:]
+	NdNr = deadhead_ratio/(1 - deadhead_ratio) #deadhead missions per revenue mission
+
+	#Charge and flight times per arrival, averaged over revenue and deadhead missions (hours)
+	t_charge, t_flight = 0., 0.
+	for mission_type, weight in [("revenue",1.),("deadhead",NdNr)]:
+		t_charge = t_charge + weight*data[mission_type]["E_{mission}"].to(ureg.kWh).magnitude/P
+		t_flight = t_flight + weight*data[mission_type]["t_{flight}"].to(ureg.hr).magnitude
+	t_charge, t_flight = t_charge/(1 + NdNr), t_flight/(1 + NdNr)
+	t_passenger = data["t_{passenger}"].to(ureg.hr).magnitude
+	t_cycle = t_flight + np.maximum(t_passenger,t_charge) #per trip, excluding charger queueing
+
+	#Trips the fleet can fly; unserved demand is shed proportionally across vertiports
+	demand = np.sum(rate,axis=2,keepdims=True)*(1 + NdNr)
+	capacity = N/t_cycle
+	served_fraction = np.minimum(1.,capacity/np.maximum(demand,1e-12))
+
+	arrival_rate = rate*(1 + NdNr)*served_fraction #vehicles arriving to charge, per hour
+	a = arrival_rate*t_charge #offered load (Erlangs)
+
+	#Mean wait for a charger, for every candidate charger count
+	c = np.arange(1,c_max+1).reshape((c_max,) + (1,)*np.ndim(a))
+	with np.errstate(divide="ignore",invalid="ignore"):
+		W_q = np.where(a < c,erlang_c(a,c_max)*t_charge/(c - a),np.inf)
+	meets_target = W_q <= max_wait.to(ureg.hr).magnitude
+
+	#Smallest charger count meeting the target in every hour (c_max + 1 if none does)
+	meets_target = np.all(meets_target,axis=-1)
+	N_chargers = np.where(np.any(meets_target,axis=0),np.argmax(meets_target,axis=0) + 1,c_max + 1)
+
+	#Wait for a charger with the planned charger counts
+	index = np.minimum(N_chargers,c_max)[np.newaxis,...,np.newaxis] - 1
+	W_planned = np.take_along_axis(W_q,np.broadcast_to(index,(1,) + np.shape(W_q)[1:]),axis=0)[0]
+
+	output = {}
+	output["charger_power"] = charger_power
+	output["N_vehicles"] = np.atleast_1d(N_vehicles)
+	output["t_{charge}"] = (t_charge[:,0,0,0]*ureg.hr).to(ureg.minute)
+	output["N_chargers"] = N_chargers #(charger_power, N_vehicles, vertiports)
+	output["N_chargers_total"] = np.sum(N_chargers,axis=-1)
+	output["installed_power"] = output["N_chargers_total"]*P[:,:,0,0]*ureg.kW
+	output["W_q"] = (W_planned*ureg.hr).to(ureg.minute) #(charger_power, N_vehicles, vertiports, hours)
+	output["served_fraction"] = served_fraction[:,:,0,:] #(charger_power, N_vehicles, hours)
+	output["charger_utilization"] = a/np.minimum(N_chargers,c_max)[...,np.newaxis]
+	return output
+
+
+def test():
+	#Erlang C against a hand calculation: c = 2, a = 1 gives 1/3
+	assert abs(erlang_c(1.,2)[1] - 1./3) < 1e-12
+	assert erlang_c(3.,2)[1] == 1
+
+	data = {"t_{passenger}":5*ureg.minute,"charger_power":200*ureg.kW}
+	for mission_type in ["revenue","deadhead"]:
+		data[mission_type] = {"E_{mission}":30*ureg.kWh,"t_{flight}":15*ureg.minute}
+	trip_rate = np.array([[10,20,30],[5,5,5]])*ureg.hr**-1
+
+	charger_power = np.array([100,200,400])*ureg.kW
+	N_vehicles = np.array([5,20,100])
+	plan = plan_chargers(data,trip_rate,charger_power,N_vehicles)
+	assert np.shape(plan["N_chargers"]) == (3,3,2)
+	assert np.shape(plan["W_q"]) == (3,3,2,3)
+
+	#Waits meet the target; more charger power never needs more chargers
+	assert np.all(plan["W_q"] <= 5*ureg.minute)
+	assert np.all(np.diff(plan["N_chargers"],axis=0) <= 0)
+	#A larger fleet serves more trips, so needs at least as many chargers
+	assert np.all(np.diff(plan["N_chargers"],axis=1) >= 0)
+	assert np.all(plan["served_fraction"][:,-1] == 1)
+	assert np.all(plan["charger_utilization"] < 1)
+
+
+if __name__=="__main__":
+
+	#Concept-representative design (see aircraft_models.py)
+	from aircraft_models import test as solve_representative_design
+
+	solution = solve_representative_design()
+	data = mission_ground_data(solution)
+
+	#Hourly revenue-trip arrivals at 4 vertiports, over a day
+	daily_profile = np.array([0.1,0.1,0.1,0.1,0.2,0.5,1.,1.5,1.5,1.,0.8,0.8,0.9,0.8,0.8,1.,1.5,
+		1.8,1.5,1.,0.7,0.5,0.3,0.2])
+	trip_rate = np.outer([40,25,25,10],daily_profile)*ureg.hr**-1
+
+	charger_power = np.array([50,100,200,350,500])*ureg.kW
+	N_vehicles = np.array([50,100,200,400])
+	plan = plan_chargers(data,trip_rate,charger_power,N_vehicles)
+
+	print
+	print "Revenue mission energy: %0.1f kWh" % \
+		data["revenue"]["E_{mission}"].to(ureg.kWh).magnitude
+	print
+	print "Charger power (kW)\tCharge time (min)\tVehicles\tChargers (per vertiport)\t" \
+		+ "Installed power (MW)\tPeak demand served (%)"
+	for i,P in enumerate(charger_power):
+		for j,N in enumerate(N_vehicles):
+			print "%0.0f\t\t\t%0.1f\t\t\t%d\t\t%s\t\t\t%0.1f\t\t\t%0.0f" % (P.magnitude,
+				plan["t_{charge}"][i].magnitude,N,
+				" ".join("%d" % c for c in plan["N_chargers"][i,j]),
+				plan["installed_power"][i,j].to(ureg.MW).magnitude,
+				100*np.min(plan["served_fraction"][i,j]))
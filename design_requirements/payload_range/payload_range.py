@@ -0,0 +1,134 @@
+#Payload-range diagrams for sized aircraft. Each configuration is sized once (standard sizing,
+#revenue, and deadhead missions); its payload-range envelope is then found by off-design
+#evaluation (see mission_evaluation.py), under the sizing-mission rules (hover time and reserve).
+#Configurations are sized in parallel.
+
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.abspath(__file__)) + '/../..')
+
+import numpy as np
+from multiprocessing import Pool
+from gpkit import ureg
+from study_input_data import generic_data, configuration_data
+from on_demand_model import build_problem
+from mission_evaluation import design_from_solution, evaluate_segments, reserve_segment
+
+def size_configuration(c,g=generic_data):
+	#Sizes one configuration; returns the solution
+	return build_problem(c,g).solve(verbosity=0)
+
+def payload_range(design,t_hover,reserve_type="FAA_heli",loiter_type="level_flight",
+	N_passengers=None,mission_type="revenue"):
+	#Maximum range for each passenger count (hover, cruise, reserve, hover). The cruise energy
+	#E = P*Rt*(t/Rt)**(1/n) is inverted for the cruise time that uses the remaining energy.
+	#Passenger counts are integers from 0 up to the maximum allowed by MTOW, unless given.
+
+	d = design[mission_type]
+	if N_passengers is None:
+		N_max = (design["MTOW"] - design["W_{empty}"] - d["W_{crew}"])/d["W_{onePassenger}"]
+		N_passengers = np.arange(int(np.floor(N_max.to(ureg.dimensionless).magnitude + 1e-6)) + 1)
+	N_passengers = np.asarray(N_passengers,dtype=float)
+
+	#Mission with zero cruise range: energy for everything except cruise, and cruise power
+	segments = [{"type":"hover","t":t_hover},{"type":"cruise","range":0*ureg.nautical_mile},
+		reserve_segment(design,reserve_type,loiter_type,mission_type),{"type":"hover","t":t_hover}]
+	data = evaluate_segments(design,segments,N_passengers,mission_type)
+
+	E_available = design["C_{eff}"] - data["E_{mission}"]
+	P_cruise = data["P_{battery}"][1]
+	Rt = 1*ureg.hr
+	t_cruise = Rt*np.maximum((E_available/(P_cruise*Rt)).to(ureg.dimensionless).magnitude,
+		0)**design["n"]
+	mission_range = (d["V_{cruise}"]*t_cruise).to(ureg.nautical_mile)
+
+	feasible = (E_available.magnitude >= 0) & data["power_ok"] & data["weight_ok"] \
+		& data["tip_Mach_ok"]
+	mission_range = np.where(feasible,mission_range.magnitude,np.nan)*ureg.nautical_mile
+	return {"N_{passengers}":N_passengers,"mission_range":mission_range,"feasible":feasible}
+
+def _payload_range_configuration(config,g=generic_data):
+	#Sizes one configuration (by name, from configuration_data) and returns its envelope as plain
+	#arrays; pint quantities do not survive pickling with their unit registry intact.
+	c = configuration_data[config]
+	try:
+		solution = size_configuration(c,g)
+	except (RuntimeWarning,ValueError):
+		return config, None
+
+	design = design_from_solution(solution,n=g["n"])
+	envelope = payload_range(design,g["sizing_mission"]["t_{hover}"],g["reserve_type"],
+		c["loiter_type"])
+	return config, {"N_{passengers}":envelope["N_{passengers}"],
+		"mission_range":envelope["mission_range"].to(ureg.nautical_mile).magnitude,
+		"MTOW":design["MTOW"].to(ureg.lbf).magnitude}
+
+def payload_range_study(configs,processes=None):
+	#Payload-range envelopes for all configurations (names from configuration_data). Entries are
+	#None for configurations that could not be sized.
+	pool = Pool(processes=processes)
+	results = pool.map(_payload_range_configuration,configs)
+	pool.close()
+	pool.join()
+	return dict(results)
+
+
+def test():
+	#At the sizing-mission payload, the maximum range is the sizing-mission range
+	from aircraft_models import test as solve_representative_design
+
+	solution = solve_representative_design()
+	design = design_from_solution(solution)
+	envelope = payload_range(design,120*ureg.s)
+
+	assert list(envelope["N_{passengers}"]) == [0,1,2,3]
+	assert abs(envelope["mission_range"][3]/(87*ureg.nautical_mile) - 1) < 1e-4
+	assert np.all(np.diff(envelope["mission_range"].magnitude) < 0)
+
+	#Peukert effect (n > 1) shortens the range
+	design["n"] = 1.1
+	assert np.all(payload_range(design,120*ureg.s)["mission_range"] < envelope["mission_range"])
+
+
+if __name__=="__main__":
+
+	from matplotlib import pyplot as plt
+	import matplotlib as mpl
+	mpl.style.use("classic")
+
+	configs = configuration_data.keys()
+	results = payload_range_study(configs)
+
+	style = {}
+	style["linestyle"] = ["-","-","-","-","--","--","--","--"]
+	style["marker"] = ["s","o","^","v","s","o","^","v"]
+	style["fillstyle"] = ["full","full","full","full","none","none","none","none"]
+	style["markersize"] = 10
+
+	fig1 = plt.figure(figsize=(12,9), dpi=80)
+	for i, config in enumerate(configs):
+		r = results[config]
+		if r is None:
+			print "Configuration could not be sized: " + config
+			continue
+		print
+		print "Configuration: %s (MTOW = %0.0f lbf)" % (config,r["MTOW"])
+		print "Passengers\tMax range (nm)"
+		for N, mission_range in zip(r["N_{passengers}"],r["mission_range"]):
+			print "%d\t\t%0.1f" % (N,mission_range)
+
+		plt.plot(r["mission_range"],r["N_{passengers}"],color="black",linewidth=1.5,
+			linestyle=style["linestyle"][i],marker=style["marker"][i],
+			fillstyle=style["fillstyle"][i],markersize=style["markersize"],
+			drawstyle="steps-post",label=config)
+
+	plt.grid()
+	plt.xlim(xmin=0)
+	plt.ylim(ymin=0)
+	plt.xlabel('Maximum range (nm)', fontsize = 16)
+	plt.ylabel('Number of passengers', fontsize = 16)
+	plt.title("Payload-Range Envelope (reserve type: %s)" % generic_data["reserve_type"],
+		fontsize = 20)
+	plt.legend(numpoints = 1,loc='upper right', fontsize = 12)
+	plt.tight_layout()
+	plt.savefig(os.path.dirname(os.path.abspath(__file__)) + '/payload_range_plot_01.pdf')
@@ -0,0 +1,150 @@
+#Design of experiments for the sizing model. Latin-hypercube (space-filling) samples over chosen
+#fields of generic_data and configuration_data are solved through sweep_tools (worker pool;
+#streaming, restartable output), giving a result table with one row per configuration and
+#sample. Fields are given with their ranges, e.g.
+#	fields = OrderedDict([("C_m",(350*ureg.Wh/ureg.kg,550*ureg.Wh/ureg.kg)),("L/D",(8,14)),
+#		("sizing_mission/range",(30*ureg.nautical_mile,80*ureg.nautical_mile))])
+#Field values are stored in the table in the units of the lower bound, given in the column name.
+#The status column tells how each point ended (sweep_tools.status_names); points that could not be
+#solved, or not in time, have nan outputs.
+
+import numpy as np
+from gpkit import ureg
+from study_input_data import configuration_data
+from on_demand_model import solve_point_status, output_names
+from sweep_tools import sweep, read_sweep, status_names
+
+def latin_hypercube(N_samples,N_fields,seed=None,candidates=1):
+	#Samples in the unit hypercube (N_samples x N_fields); each field has exactly one sample in
+	#each of N_samples equal intervals. With candidates > 1, the design with the largest minimum
+	#distance between points is kept (cost grows as N_samples**2).
+	random = np.random.RandomState(seed)
+	best, best_distance = None, -1.
+	for i in range(candidates):
+		strata = np.argsort(random.uniform(size=(N_fields,N_samples)),axis=1).T
+		u = (strata + random.uniform(size=(N_samples,N_fields)))/N_samples
+		if candidates == 1:
+			return u
+		distance = _min_distance(u)
+		if distance > best_distance:
+			best, best_distance = u, distance
+	return best
+
+def _min_distance(u,chunk=1000):
+	#Smallest distance between two points (computed in chunks of rows, to limit memory)
+	distance = np.inf
+	for i in range(0,len(u),chunk):
+		d = np.sum(u[i:i+chunk]**2,axis=1)[:,np.newaxis] + np.sum(u**2,axis=1)[np.newaxis,:] \
+			- 2*np.dot(u[i:i+chunk],u.T)
+		d[np.arange(len(d)),np.arange(i,i+len(d))] = np.inf
+		distance = min(distance,np.sqrt(max(np.min(d),0.)))
+	return distance
+
+def field_column(name,low):
+	#Table column for a field: its name, with the units of the lower bound if it has any
+	if hasattr(low,"units") and not low.dimensionless:
+		return "%s (%s)" % (name,str(format(low.units,"~")))
+	return name
+
+def field_value(column,value):
+	#Inverse of field_column(): field name and value (with units)
+	if column.endswith(")") and " (" in column:
+		name, units = column.rsplit(" (",1)
+		return name, value*ureg(units[:-1])
+	return column, value
+
+def doe_points(fields,N_samples,configs,seed=None,candidates=1):
+	#Sweep points (plain floats): the same samples for each configuration. The configuration is
+	#stored by its position in configuration_data.
+	u = latin_hypercube(N_samples,len(fields),seed,candidates)
+	columns, samples = [], []
+	for j, (name, (low, high)) in enumerate(fields.items()):
+		columns += [field_column(name,low)]
+		if hasattr(low,"units"):
+			low, high = low.magnitude, high.to(low.units).magnitude
+		samples += [list(low + u[:,j]*(high - low))]
+	rows = zip(*samples)
+
+	config_names = list(configuration_data.keys())
+	points = []
+	for config in configs:
+		index = float(config_names.index(config))
+		for row in rows:
+			point = dict(zip(columns,row))
+			point["configuration"] = index
+			points += [point]
+	return points
+
+def doe_row(point):
+	#Outputs and status for one sweep point
+	config = list(configuration_data.keys())[int(point["configuration"])]
+	values = dict(field_value(column,value) for column,value in point.items() \
+		if column != "configuration")
+	status, outputs = solve_point_status(config,values=values)
+	return dict(outputs or dict((name,np.nan) for name in output_names),status=status)
+
+def run_doe(fields,N_samples,configs,filename,seed=0,candidates=1,processes=None,timeout=None):
+	#Solves the design of experiments, streaming rows to filename, with at most timeout seconds
+	#per point; returns the result table (column -> array, sorted by point index). A killed job
+	#resumes where it stopped when rerun with the same arguments (points are regenerated from
+	#the seed).
+	points = doe_points(fields,N_samples,configs,seed,candidates)
+	comments = ["Latin-hypercube design of experiments (%d samples, seed %d)" % (N_samples,seed),
+		"Configurations: %s" % ", ".join(configs),
+		"Status: %s (by position)" % ", ".join(status_names)]
+	sweep(doe_row,points,filename,output_names,comments=comments,processes=processes,
+		timeout=timeout)
+
+	table = read_sweep(filename)
+	config_names = np.array(list(configuration_data.keys()))
+	table["configuration"] = config_names[table["configuration"].astype(int)]
+	table["status"] = np.array(status_names)[table["status"]]
+	return table
+
+
+def test():
+	import os
+	import tempfile
+	from collections import OrderedDict
+
+	u = latin_hypercube(50,3,seed=0,candidates=5)
+	assert np.all(np.sort(np.floor(u*50),axis=0) == np.arange(50)[:,np.newaxis])
+	assert _min_distance(u) >= _min_distance(latin_hypercube(50,3,seed=0))
+
+	fields = OrderedDict([("C_m",(400*ureg.Wh/ureg.kg,500*ureg.Wh/ureg.kg)),
+		("sizing_mission/range",(40*ureg.nautical_mile,60*ureg.nautical_mile)),("L/D",(12,15))])
+	assert field_value(field_column("C_m",400*ureg.Wh/ureg.kg),450.) == ("C_m",450*ureg.Wh/ureg.kg)
+
+	filename = os.path.join(tempfile.mkdtemp(),"doe_test.txt")
+	table = run_doe(fields,2,["Tilt rotor"],filename,processes=2)
+	assert list(table["configuration"]) == ["Tilt rotor"]*2
+	C_m = table[field_column("C_m",400*ureg.Wh/ureg.kg)]
+	assert np.all((C_m >= 400) & (C_m <= 500))
+	assert np.all(np.isfinite(table["cost_per_trip_per_passenger"]))
+	assert list(table["status"]) == ["solved"]*2
+
+
+if __name__=="__main__":
+
+	import os
+	from collections import OrderedDict
+
+	fields = OrderedDict()
+	fields["C_m"] = (350*ureg.Wh/ureg.kg,550*ureg.Wh/ureg.kg)
+	fields["battery_cost_per_C"] = (100*ureg.kWh**-1,400*ureg.kWh**-1)
+	fields["vehicle_cost_per_weight"] = (200*ureg.lbf**-1,600*ureg.lbf**-1)
+	fields["deadhead_ratio"] = (0.2,0.5)
+	fields["sizing_mission/range"] = (30*ureg.nautical_mile,70*ureg.nautical_mile)
+
+	configs = ["Lift + cruise","Tilt rotor","Compound heli"]
+	filename = os.path.dirname(os.path.abspath(__file__)) + "/doe_data.txt"
+	table = run_doe(fields,100,configs,filename,candidates=10,timeout=120)
+
+	print
+	print "Configuration\tSolved\tInfeasible\tTimeout\tcost_per_trip_per_passenger (min, median, max)"
+	for config in configs:
+		rows = table["configuration"] == config
+		cost = table["cost_per_trip_per_passenger"][rows]
+		N = [np.sum(table["status"][rows] == status) for status in ["solved","infeasible","timeout"]]
+		print "%s\t%d/%d\t%d\t\t%d\t%0.1f\t%0.1f\t%0.1f" % (config,N[0],np.size(cost),N[1],N[2],
+			np.nanmin(cost),np.nanmedian(cost),np.nanmax(cost))
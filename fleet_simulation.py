@@ -0,0 +1,348 @@
+#Discrete-event simulation of fleet operations. Not GP-compatible. A fleet of vehicles (with the
+#trip performance of a solved design) serves a stochastic stream of trip requests between
+#vertiports, with charger queueing and repositioning (deadhead) flights.
+
+import heapq
+import math
+import numpy as np
+from collections import deque
+from gpkit import ureg
+
+#Vehicle status
+IDLE, FLYING, TURNAROUND, CHARGING, WAITING_FOR_CHARGER = range(5)
+#Request status
+PENDING, ASSIGNED, SERVED, LOST = range(4)
+#Event types
+REQUEST, ARRIVAL, READY, CHARGED, ABANDON = range(5)
+
+def design_performance(solution):
+	#Trip performance of a solved design, from its revenue and deadhead missions. Trips of any
+	#length are modelled as the two hover segments plus a cruise segment scaled with distance.
+
+	performance = {}
+	for mission_type in ["revenue","deadhead"]:
+		mission_name = "OnDemand" + mission_type.capitalize() + "Mission"
+
+		E = solution("E_" + mission_name)
+		t_hover = solution("t_{hover}_" + mission_name)
+		mission_range = solution("mission_range_" + mission_name)
+		t_flight = solution("t_{flight}_" + mission_name)
+
+		performance[mission_type] = {}
+		performance[mission_type]["E_hover"] = E[0] + E[2]
+		performance[mission_type]["E/distance"] = E[1]/mission_range
+		performance[mission_type]["t_hover"] = 2*t_hover
+		performance[mission_type]["V"] = mission_range/(t_flight - 2*t_hover)
+
+	performance["C_eff"] = solution("C_{eff}_OnDemandAircraft")
+	performance["charger_power"] = \
+		solution("charger_power_OnDemandRevenueMission/TimeOnGround")
+	performance["t_passenger"] = solution("t_{passenger}_OnDemandRevenueMission/TimeOnGround")
+	return performance
+
+def vertiport_distances(coordinates):
+	#Straight-line distances between vertiports; coordinates is an (N x 2) array of positions
+	xy = coordinates.to(ureg.nautical_mile).magnitude
+	return np.sqrt(np.sum((xy[:,np.newaxis,:] - xy[np.newaxis,:,:])**2,axis=-1))*ureg.nautical_mile
+
+def generate_demand(trip_rate,duration=24*ureg.hr,rate_profile=None,seed=None):
+	#Poisson trip requests. trip_rate is an (origins x destinations) array of mean requests per
+	#unit time; rate_profile (optional) gives hourly multipliers. Returns requests in time order.
+
+	random = np.random.RandomState(seed)
+	rate = trip_rate.to(ureg.hr**-1).magnitude
+	num_hours = int(math.ceil(duration.to(ureg.hr).magnitude))
+	if rate_profile is None:
+		rate_profile = np.ones(num_hours)
+
+	t, origin, destination = [], [], []
+	for hour in range(num_hours):
+		bin_length = min(1., duration.to(ureg.hr).magnitude - hour)
+		counts = random.poisson(rate*rate_profile[hour % len(rate_profile)]*bin_length)
+		pairs = np.repeat(np.arange(np.size(counts)),counts.ravel())
+		t += [3600*(hour + bin_length*random.uniform(size=np.size(pairs)))]
+		origin += [pairs // np.shape(counts)[1]]
+		destination += [pairs % np.shape(counts)[1]]
+
+	t, origin, destination = np.concatenate(t), np.concatenate(origin), np.concatenate(destination)
+	order = np.argsort(t,kind="mergesort")
+	return {"t":t[order]*ureg.s,"origin":origin[order],"destination":destination[order]}
+
+def simulate_fleet(performance,distances,requests,N_vehicles,N_chargers,
+	initial_locations=None,max_wait=15*ureg.minute,E_reserve=0*ureg.kWh):
+	#Event-driven simulation (heap-ordered events; vehicle state held in arrays). Requests are
+	#served by a vehicle at the origin if one has enough energy, otherwise by the nearest vehicle
+	#that can reposition in time; otherwise they wait, and are lost after max_wait.
+	#N_chargers: chargers per vertiport (one value, or one per vertiport).
+
+	#Working units: s, nautical miles, kWh, kW
+	distances = distances.to(ureg.nautical_mile).magnitude
+	num_ports = np.shape(distances)[0]
+	N_chargers = np.broadcast_to(N_chargers,(num_ports,))
+	C_eff = performance["C_eff"].to(ureg.kWh).magnitude
+	P_charger = performance["charger_power"].to(ureg.kW).magnitude/3600. #kWh per s
+	t_passenger = performance["t_passenger"].to(ureg.s).magnitude
+	max_wait = max_wait.to(ureg.s).magnitude
+	E_reserve = E_reserve.to(ureg.kWh).magnitude
+
+	#Flight time and energy between every pair of vertiports
+	flight = {}
+	for mission_type in ["revenue","deadhead"]:
+		p = performance[mission_type]
+		flight[mission_type] = {
+			"t":p["t_hover"].to(ureg.s).magnitude \
+				+ distances/p["V"].to(ureg.nautical_mile/ureg.s).magnitude,
+			"E":p["E_hover"].to(ureg.kWh).magnitude \
+				+ distances*p["E/distance"].to(ureg.kWh/ureg.nautical_mile).magnitude}
+
+	t_request = requests["t"].to(ureg.s).magnitude
+	origin = requests["origin"]
+	destination = requests["destination"]
+	num_requests = np.size(t_request)
+
+	#Vehicle state
+	if initial_locations is None:
+		initial_locations = np.arange(N_vehicles) % num_ports
+	location = np.array(initial_locations,dtype=int)
+	target = np.array(location) #destination while flying
+	status = IDLE*np.ones(N_vehicles,dtype=int)
+	energy = C_eff*np.ones(N_vehicles) #at time t_update
+	t_update = np.zeros(N_vehicles)
+	charge_rate = np.zeros(N_vehicles)
+	version = np.zeros(N_vehicles,dtype=int) #invalidates stale CHARGED events
+	assigned = -np.ones(N_vehicles,dtype=int) #request a repositioning vehicle will serve
+	vehicle_stats = dict((key,np.zeros(N_vehicles)) for key in ["t_revenue","t_deadhead",
+		"N_revenue","N_deadhead","E_used"])
+
+	#Vertiport state
+	chargers_in_use = np.zeros(num_ports,dtype=int)
+	charger_time = np.zeros(num_ports)
+	charger_queue = [deque() for i in range(num_ports)]
+	waiting = [deque() for i in range(num_ports)]
+
+	request_status = PENDING*np.ones(num_requests,dtype=int)
+	t_pickup = np.nan*np.ones(num_requests)
+
+	events = []
+	counter = [0]
+
+	def schedule(t,event_type,a=-1,b=-1):
+		counter[0] += 1
+		heapq.heappush(events,(t,counter[0],event_type,a,b))
+
+	def current_energy(v,t):
+		return np.minimum(C_eff,energy[v] + charge_rate[v]*(t - t_update[v]))
+
+	def start_charging(v,t):
+		port = location[v]
+		if energy[v] >= C_eff - 1e-9:
+			status[v] = IDLE
+		elif chargers_in_use[port] < N_chargers[port]:
+			chargers_in_use[port] += 1
+			status[v] = CHARGING
+			charge_rate[v] = P_charger
+			t_update[v] = t
+			schedule(t + (C_eff - energy[v])/P_charger,CHARGED,v,version[v])
+		else:
+			status[v] = WAITING_FOR_CHARGER
+			charger_queue[port].append(v)
+
+	def release_charger(port,t):
+		chargers_in_use[port] -= 1
+		while charger_queue[port] and chargers_in_use[port] < N_chargers[port]:
+			start_charging(charger_queue[port].popleft(),t)
+
+	def stop_charging(v,t):
+		port = location[v]
+		if status[v] == CHARGING:
+			energy[v] = current_energy(v,t)
+			charger_time[port] += t - t_update[v]
+			charge_rate[v] = 0.
+			t_update[v] = t
+			version[v] += 1
+			status[v] = IDLE
+			release_charger(port,t)
+		elif status[v] == WAITING_FOR_CHARGER:
+			charger_queue[port].remove(v)
+			status[v] = IDLE
+
+	def fly(v,port,t,mission_type,r):
+		stop_charging(v,t)
+		f = flight[mission_type]
+		energy[v] -= f["E"][location[v],port]
+		t_update[v] = t
+		vehicle_stats["t_" + mission_type][v] += f["t"][location[v],port]
+		vehicle_stats["N_" + mission_type][v] += 1
+		vehicle_stats["E_used"][v] += f["E"][location[v],port]
+		status[v] = FLYING
+		target[v] = port
+		schedule(t + f["t"][location[v],port],ARRIVAL,v,r)
+
+	def available(t):
+		#Vehicles that can be dispatched, with their current energy
+		vehicles = np.flatnonzero(((status == IDLE) | (status == CHARGING) \
+			| (status == WAITING_FOR_CHARGER)) & (assigned < 0))
+		return vehicles, current_energy(vehicles,t)
+
+	def dispatch(r,t,allow_repositioning=True):
+		#Assigns a vehicle to request r (returns False if none can serve it)
+		o, d = origin[r], destination[r]
+		vehicles, E = available(t)
+		E_trip = flight["revenue"]["E"][o,d] + E_reserve
+
+		local = (location[vehicles] == o) & (E >= E_trip)
+		if np.any(local):
+			v = vehicles[local][np.argmax(E[local])]
+			request_status[r] = SERVED
+			t_pickup[r] = t
+			fly(v,d,t,"revenue",r)
+			return True
+
+		if allow_repositioning:
+			ports = location[vehicles]
+			feasible = (ports != o) & (E >= flight["deadhead"]["E"][ports,o] + E_trip) \
+				& (t + flight["deadhead"]["t"][ports,o] + t_passenger <= t_request[r] + max_wait)
+			if np.any(feasible):
+				v = vehicles[feasible][np.argmin(distances[ports[feasible],o])]
+				request_status[r] = ASSIGNED
+				assigned[v] = r
+				fly(v,o,t,"deadhead",r)
+				return True
+		return False
+
+	def serve_waiting(t):
+		#Oldest waiting requests first, at every vertiport
+		for port in range(num_ports):
+			while waiting[port]:
+				r = waiting[port][0]
+				if request_status[r] != PENDING:
+					waiting[port].popleft()
+				elif dispatch(r,t):
+					waiting[port].popleft()
+				else:
+					break
+
+	for r in range(num_requests):
+		schedule(t_request[r],REQUEST,r)
+
+	while events:
+		t, count, event_type, a, b = heapq.heappop(events)
+
+		if event_type == REQUEST:
+			if not dispatch(a,t):
+				waiting[origin[a]].append(a)
+				schedule(t + max_wait,ABANDON,a)
+
+		elif event_type == ABANDON:
+			if request_status[a] == PENDING:
+				request_status[a] = LOST
+
+		elif event_type == ARRIVAL:
+			location[a] = target[a]
+			status[a] = TURNAROUND
+			schedule(t + t_passenger,READY,a)
+
+		elif event_type == READY:
+			r = assigned[a]
+			if r >= 0:
+				#Repositioned vehicle picks up its passengers
+				assigned[a] = -1
+				request_status[r] = SERVED
+				t_pickup[r] = t
+				fly(a,destination[r],t,"revenue",r)
+			else:
+				status[a] = IDLE
+				start_charging(a,t)
+				serve_waiting(t)
+
+		elif event_type == CHARGED:
+			if b == version[a]:
+				charger_time[location[a]] += t - t_update[a]
+				energy[a] = C_eff
+				charge_rate[a] = 0.
+				t_update[a] = t
+				version[a] += 1
+				status[a] = IDLE
+				release_charger(location[a],t)
+				serve_waiting(t)
+
+	#Statistics
+	served = request_status == SERVED
+	wait = t_pickup[served] - t_request[served]
+	duration = max(np.max(t_request) if num_requests else 0.,1.)
+	N_revenue = np.sum(vehicle_stats["N_revenue"])
+	N_deadhead = np.sum(vehicle_stats["N_deadhead"])
+
+	output = {}
+	output["N_requests"] = num_requests
+	output["N_served"] = np.sum(served)
+	output["N_lost"] = np.sum(request_status == LOST)
+	output["service_fraction"] = np.mean(served) if num_requests else 1.
+	output["wait_mean"] = (np.mean(wait) if np.size(wait) else 0.)*ureg.s
+	output["wait_95"] = (np.percentile(wait,95) if np.size(wait) else 0.)*ureg.s
+	output["deadhead_ratio"] = N_deadhead/max(N_revenue + N_deadhead,1)
+	output["vehicle_utilization"] = (vehicle_stats["t_revenue"] + vehicle_stats["t_deadhead"])/duration
+	output["charger_utilization"] = charger_time/np.maximum(N_chargers*duration,1e-9)
+	output["t_wait"] = (t_pickup - t_request)*ureg.s
+	output["request_status"] = request_status
+	output["vehicle_stats"] = vehicle_stats
+	return output
+
+
+def test():
+	#Two vertiports 20 nm apart; design performance typical of a lift + cruise aircraft
+	performance = {"C_eff":60*ureg.kWh,"charger_power":200*ureg.kW,"t_passenger":5*ureg.minute}
+	for mission_type in ["revenue","deadhead"]:
+		performance[mission_type] = {"E_hover":6*ureg.kWh,"E/distance":0.6*ureg.kWh/ureg.nautical_mile,
+			"t_hover":1*ureg.minute,"V":130*ureg.knot}
+	distances = vertiport_distances(np.array([[0,0],[20,0]])*ureg.nautical_mile)
+
+	trip_rate = np.array([[0,10],[10,0]])*ureg.hr**-1
+	requests = generate_demand(trip_rate,duration=4*ureg.hr,seed=1)
+	assert np.all(np.diff(requests["t"].magnitude) >= 0)
+
+	#Ample fleet and chargers: every request is served immediately
+	data = simulate_fleet(performance,distances,requests,N_vehicles=40,N_chargers=40)
+	assert data["N_served"] == data["N_requests"]
+	assert data["wait_mean"].magnitude == 0
+
+	#Small fleet: requests are conserved; repositioning happens; wait limit is respected
+	data = simulate_fleet(performance,distances,requests,N_vehicles=3,N_chargers=1,
+		initial_locations=[0,0,0],max_wait=20*ureg.minute)
+	assert data["N_served"] + data["N_lost"] == data["N_requests"]
+	assert data["N_lost"] > 0
+	assert data["deadhead_ratio"] > 0
+	served = data["request_status"] == SERVED
+	assert np.all(data["t_wait"][served] <= 20*ureg.minute + 1e-6*ureg.s)
+
+
+if __name__=="__main__":
+
+	#Concept-representative design (see aircraft_models.py); 5 vertiports; one day of demand
+	import time
+	from aircraft_models import test as solve_representative_design
+
+	solution = solve_representative_design()
+	performance = design_performance(solution)
+
+	coordinates = np.array([[0,0],[30,0],[0,30],[30,30],[15,15]])*ureg.nautical_mile
+	distances = vertiport_distances(coordinates)
+
+	trip_rate = 25*(np.ones([5,5]) - np.eye(5))*ureg.hr**-1
+	rate_profile = np.array([0.1,0.1,0.1,0.1,0.2,0.5,1.,1.5,1.5,1.,0.8,0.8,0.9,0.8,0.8,1.,1.5,
+		1.8,1.5,1.,0.7,0.5,0.3,0.2]) #hourly demand multipliers
+
+	requests = generate_demand(trip_rate,duration=24*ureg.hr,rate_profile=rate_profile,seed=0)
+
+	print
+	print "%d trip requests over 24 hours" % np.size(requests["t"])
+	print
+	print "Vehicles\tChargers/port\tServed (%)\tMean wait (min)\tDeadhead ratio\tRun time (s)"
+	for N_vehicles in [100,200,300]:
+		for N_chargers in [5,10,20]:
+			start_time = time.time()
+			data = simulate_fleet(performance,distances,requests,N_vehicles,N_chargers)
+			run_time = time.time() - start_time
+			print "%d\t\t%d\t\t%0.1f\t\t%0.1f\t\t%0.3f\t\t%0.2f" % (N_vehicles,N_chargers,
+				100*data["service_fraction"],data["wait_mean"].to(ureg.minute).magnitude,
+				data["deadhead_ratio"],run_time)
@@ -0,0 +1,322 @@
+#Closed-form (off-design) evaluation of a fixed, already-sized aircraft over many missions. Not
+#GP-compatible. Segment relations are those of the GP models in aircraft_models.py, with the
+#design variables (MTOW, battery capacity, rotor size, etc.) frozen at the values of a prior
+#solution; each mission is evaluated in a few array operations instead of one GP solve.
+
+import numpy as np
+from gpkit import ureg
+from aircraft_models import reserve_segment_spec
+
+mission_names = {"revenue":"OnDemandRevenueMission","deadhead":"OnDemandDeadheadMission"}
+mission_cost_names = {"revenue":"RevenueMissionCost","deadhead":"DeadheadMissionCost"}
+
+#Relative tolerance on feasibility checks; design values from a GP solution are only this accurate
+tolerance = 1e-6
+
+def _find(solution,name,models=()):
+	#Value of the first variable with the given name, whose model path includes the given models
+	#(in order). Used where segment numbering makes the full variable name unpredictable.
+	#Dimensionless values are returned as floats.
+	for key in solution["variables"]:
+		if key.name == name:
+			path = iter(key.models)
+			if all(model in path for model in models):
+				value = solution(key)
+				if hasattr(value,"units") and value.dimensionless:
+					value = value.to(ureg.dimensionless).magnitude
+				return value
+	raise KeyError("No variable %s in models %s" % (name,"/".join(models)))
+
+def design_from_solution(solution,n=1.):
+	#Fixed design data from a solved OnDemandAircraft problem (with revenue and deadhead missions,
+	#and OnDemandMissionCost). n is the battery discharge parameter; it is not a GP variable.
+
+	design = {}
+	for name in ["MTOW","W_{empty}","C_{eff}","L_D_cruise","L_D_loiter","\eta_{cruise}"]:
+		design[name] = _find(solution,name,["OnDemandAircraft"])
+	for name in ["N","A","s","Cl_{mean_{max}}"]:
+		design[name] = _find(solution,name,["Rotors"])
+	design["P_{max}"] = _find(solution,"P_{max}",["Battery"])
+	design["\eta_{electric}"] = _find(solution,"\eta",["ElectricalSystem"])
+	design["n"] = n
+	design["N_{deadhead}/N_{typical}"] = _find(solution,"N_{deadhead}/N_{typical}")
+
+	for mission_type in ["revenue","deadhead"]:
+		mission_name = mission_names[mission_type]
+		cost_name = mission_cost_names[mission_type]
+		d = {}
+
+		d["V_{cruise}"] = _find(solution,"V",[mission_name,"LevelFlight"])
+		d["t_{hover}"] = _find(solution,"t_{hover}",[mission_name])
+		d["N_{passengers}"] = _find(solution,"N_{passengers}",[mission_name])
+		d["W_{onePassenger}"] = _find(solution,"W_{onePassenger}",[mission_name])
+		d["W_{crew}"] = _find(solution,"W",[mission_name,"Crew"])
+		d["tailRotor_power_fraction_hover"] = _find(solution,"tailRotor_power_fraction",
+			[mission_name,"Hover"])
+		d["tailRotor_power_fraction_levelFlight"] = _find(solution,"tailRotor_power_fraction",
+			[mission_name,"LevelFlight"])
+		for name in ["ki","Cd0","MT_max"]:
+			d[name] = _find(solution,name,[mission_name,"RotorsAero"])
+		d["\rho"] = _find(solution,"\rho",[mission_name,"FlightState"])
+		d["a"] = _find(solution,"a",[mission_name,"FlightState"])
+		d["t_{passenger}"] = _find(solution,"t_{passenger}",[mission_name,"TimeOnGround"])
+		d["charger_power"] = _find(solution,"charger_power",[mission_name,"TimeOnGround"])
+
+		#Cost rates that do not depend on the mission flown
+		d["capital_cost_per_time"] = \
+			_find(solution,"cost_per_time",[cost_name,"VehicleAcquisitionCost"]) \
+			+ _find(solution,"cost_per_time",[cost_name,"AvionicsAcquisitionCost"])
+		d["battery_cost_per_mission"] = _find(solution,"cost_per_mission",
+			[cost_name,"BatteryAcquisitionCost"])
+		d["pilot_cost_per_time"] = _find(solution,"cost_per_time",[cost_name,"PilotCost"])
+		d["maintenance_cost_per_time"] = _find(solution,"cost_per_time",
+			[cost_name,"MaintenanceCost"])
+		d["cost_per_energy"] = _find(solution,"cost_per_energy",[cost_name,"EnergyCost"]) \
+			/_find(solution,"\eta_{charger}",[cost_name,"EnergyCost"])
+		d["IOC_fraction"] = _find(solution,"IOC_fraction",[cost_name,"IndirectOperatingCost"])
+
+		design[mission_type] = d
+	return design
+
+def battery_energy(P,t,n=1.,Rt=1*ureg.hr):
+	#Energy drawn from the battery (BatteryPerformance; Peukert effect for n > 1)
+	return (P*Rt*(t/Rt).to(ureg.dimensionless)**(1./n)).to(ureg.kWh)
+
+def hover_power(design,mission_type,W):
+	#Battery power in hover at weight W. Hover power falls with tip speed, so the tip speed is
+	#at its lower limit, set by the mean lift coefficient (Cl_mean = 3*CT/s <= Cl_mean_max).
+	d = design[mission_type]
+	N, A, s = design["N"], design["A"], design["s"]
+
+	CT = s*design["Cl_{mean_{max}}"]/3.
+	VT = ((W/N)/(0.5*d["\rho"]*A*CT))**0.5
+	CP = d["ki"]*0.5*CT**1.5 + 0.25*s*d["Cd0"]
+	P_rotors = N*0.5*d["\rho"]*A*(VT**3)*CP
+
+	P_battery = P_rotors*(1 + d["tailRotor_power_fraction_hover"])/design["\eta_{electric}"]
+	return P_battery.to(ureg.kW), (VT/d["a"]).to(ureg.dimensionless)
+
+def cruise_power(design,mission_type,W,V,L_D=None):
+	#Battery power in level flight at weight W and speed V (cruise L/D unless given)
+	d = design[mission_type]
+	if L_D is None:
+		L_D = design["L_D_cruise"]
+	P_cruise = W*V/(L_D*design["\eta_{cruise}"])
+	P_battery = P_cruise*(1 + d["tailRotor_power_fraction_levelFlight"])/design["\eta_{electric}"]
+	return P_battery.to(ureg.kW)
+
+def mission_cost(design,mission_type,E_mission,t_mission):
+	#Cost per mission (CapitalExpenses plus OperatingExpenses, including IOC)
+	d = design[mission_type]
+	capital_cost = t_mission*d["capital_cost_per_time"] + d["battery_cost_per_mission"]
+	DOC = t_mission*(d["pilot_cost_per_time"] + d["maintenance_cost_per_time"]) \
+		+ E_mission*d["cost_per_energy"]
+	return (capital_cost + DOC*(1 + d["IOC_fraction"])).to(ureg.dimensionless).magnitude
+
+def standard_segments(mission_range,t_hover):
+	#Hover (takeoff), cruise, hover (landing), as in OnDemandRevenueMission
+	return [{"type":"hover","t":t_hover},{"type":"cruise","range":mission_range},
+		{"type":"hover","t":t_hover}]
+
+def reserve_segment(design,reserve_type="FAA_heli",loiter_type="level_flight",
+	mission_type="revenue"):
+	#Reserve segment, as in OnDemandSizingMission (see reserve_segment_spec), with its speed
+	V_cruise = design[mission_type]["V_{cruise}"]
+	segment = reserve_segment_spec(reserve_type,loiter_type)
+	if segment["type"] == "loiter":
+		segment["V"] = ((1/3.)**(1/4.))*V_cruise
+	elif segment["type"] == "cruise":
+		segment["V"] = V_cruise
+	return segment
+
+def evaluate_segments(design,segments,N_passengers=None,mission_type="revenue"):
+	#Off-design evaluation of an arbitrary list of flight segments. Each segment is a dict:
+	#	{"type":"hover","t":...}
+	#	{"type":"cruise","range":...} or {"type":"cruise","t":...} (optional "V")
+	#	{"type":"loiter","t":...} (optional "V"; uses the loiter L/D)
+	#Segment values can be arrays (one value per mission); all are broadcast against each other.
+	#Crew, passenger weight, speed defaults, and tail-rotor fractions come from mission_type.
+	d = design[mission_type]
+	if N_passengers is None:
+		N_passengers = d["N_{passengers}"]
+	N_passengers = np.asarray(N_passengers,dtype=float)
+
+	#Shape of the batch of missions
+	shape = np.broadcast(*[np.empty(np.shape(value.magnitude)) for segment in segments
+		for value in segment.values() if hasattr(value,"units")] + [N_passengers]).shape
+
+	W = design["W_{empty}"] + N_passengers*d["W_{onePassenger}"] + d["W_{crew}"]
+
+	t, P_battery, segment_range, MT = [], [], [], []
+	for segment in segments:
+		if segment["type"] == "hover":
+			P, MT_segment = hover_power(design,mission_type,W)
+			t_segment = segment["t"]
+			MT += [MT_segment]
+			segment_range += [0*ureg.nautical_mile]
+		elif segment["type"] in ["cruise","loiter"]:
+			V = segment.get("V",d["V_{cruise}"])
+			L_D = design["L_D_cruise"] if segment["type"] == "cruise" else design["L_D_loiter"]
+			P = cruise_power(design,mission_type,W,V,L_D)
+			if "range" in segment:
+				t_segment = segment["range"]/V
+			else:
+				t_segment = segment["t"]
+			segment_range += [(V*t_segment).to(ureg.nautical_mile)]
+		else:
+			raise ValueError("Unknown segment type: %s" % segment["type"])
+		t += [t_segment.to(ureg.s)]
+		P_battery += [P.to(ureg.kW)]
+
+	#Stack segments along the first axis, broadcast over missions
+	def stack(values,units):
+		return np.array([np.broadcast_to(v.to(units).magnitude,shape) for v in values])*units
+	t = stack(t,ureg.s)
+	P_battery = stack(P_battery,ureg.kW)
+	E = battery_energy(P_battery,t,design["n"])
+
+	data = {"N_{passengers}":N_passengers,"segment_types":[s["type"] for s in segments]}
+	data["W_{mission}"] = (W*np.ones(shape)).to(ureg.lbf)
+	data["t"] = t
+	data["P_{battery}"] = P_battery
+	data["E"] = E
+	data["segment_range"] = stack(segment_range,ureg.nautical_mile)
+	data["E_{mission}"] = np.sum(E,axis=0)
+	data["t_{flight}"] = np.sum(t,axis=0).to(ureg.minute)
+	data["E_{remaining}"] = design["C_{eff}"] - np.cumsum(E,axis=0) #after each segment
+
+	#Feasibility checks, by mission
+	data["energy_ok"] = data["E_{mission}"] <= (1 + tolerance)*design["C_{eff}"]
+	data["power_ok"] = np.all(P_battery <= (1 + tolerance)*design["P_{max}"],axis=0)
+	data["weight_ok"] = data["W_{mission}"] <= (1 + tolerance)*design["MTOW"]
+	data["tip_Mach_ok"] = np.ones(shape,dtype=bool)
+	if MT:
+		data["MT"] = stack(MT,ureg.dimensionless).magnitude
+		data["tip_Mach_ok"] = np.all(data["MT"] <= (1 + tolerance)*d["MT_max"],axis=0)
+	data["feasible"] = data["energy_ok"] & data["power_ok"] & data["weight_ok"] \
+		& data["tip_Mach_ok"]
+	return data
+
+def evaluate_missions(design,mission_type,mission_range,t_hover=None,N_passengers=None):
+	#Revenue or deadhead missions (standard segments, time on ground, and cost). Inputs are arrays
+	#(or scalars) and are broadcast against each other; missing inputs take the values of the
+	#design's own mission.
+	d = design[mission_type]
+	if t_hover is None:
+		t_hover = d["t_{hover}"]
+
+	data = evaluate_segments(design,standard_segments(mission_range,t_hover),N_passengers,
+		mission_type)
+	data["mission_range"] = data["segment_range"][1]
+	data["t_{hover}"] = data["t"][0]
+	data["P_{hover}"] = data["P_{battery}"][0]
+	data["P_{cruise}"] = data["P_{battery}"][1]
+	data["MT"] = data["MT"][0]
+
+	data["t_{charge}"] = (data["E_{mission}"]/d["charger_power"]).to(ureg.minute)
+	data["t_{ground}"] = np.maximum(data["t_{charge}"].magnitude,
+		d["t_{passenger}"].to(ureg.minute).magnitude)*ureg.minute
+	data["t_{mission}"] = data["t_{flight}"] + data["t_{ground}"]
+	data["cost_per_mission"] = mission_cost(design,mission_type,data["E_{mission}"],
+		data["t_{mission}"])
+	return data
+
+def evaluate_routes(design,routes,deadhead_ratio=None):
+	#Per-trip results for a table of routes (dict of arrays: "mission_range", and optionally
+	#"t_{hover}" and "N_{passengers}"). Each revenue trip carries its share of deadhead trips of the
+	#same length, as in OnDemandMissionCost.
+	if deadhead_ratio is None:
+		NdNr = design["N_{deadhead}/N_{typical}"]
+	else:
+		NdNr = deadhead_ratio/(1. - deadhead_ratio)
+
+	revenue = evaluate_missions(design,"revenue",routes["mission_range"],
+		routes.get("t_{hover}"),routes.get("N_{passengers}"))
+	deadhead = evaluate_missions(design,"deadhead",routes["mission_range"],
+		routes.get("t_{hover}"))
+
+	data = revenue
+	data["deadhead_cost_per_trip"] = NdNr*deadhead["cost_per_mission"]
+	data["cost_per_trip"] = revenue["cost_per_mission"] + data["deadhead_cost_per_trip"]
+	data["cost_per_trip_per_passenger"] = data["cost_per_trip"]/revenue["N_{passengers}"]
+	data["cost_per_seat_mile"] = data["cost_per_trip_per_passenger"] \
+		/revenue["mission_range"].to(ureg.mile)
+	data["feasible"] = revenue["feasible"] & deadhead["feasible"]
+	return data
+
+
+def test():
+	#Closed-form results must match the GP solution for the design's own missions
+	from aircraft_models import test as solve_representative_design
+
+	solution = solve_representative_design()
+	design = design_from_solution(solution)
+
+	routes = {"mission_range":np.array([30.,30.])*ureg.nautical_mile}
+	data = evaluate_routes(design,routes)
+
+	for name in ["E_{mission}","t_{flight}","t_{mission}"]:
+		GP_value = solution(name + "_OnDemandRevenueMission")
+		assert np.all(np.abs((data[name]/GP_value).to(ureg.dimensionless) - 1) < 1e-4)
+	assert np.all(np.abs(data["cost_per_trip"]/solution("cost_per_trip_OnDemandMissionCost") - 1)
+		< 1e-4)
+	assert np.all(data["feasible"])
+
+	#Longer routes cost more, and are eventually infeasible
+	routes = {"mission_range":np.linspace(5,200,40)*ureg.nautical_mile}
+	data = evaluate_routes(design,routes)
+	assert np.all(np.diff(data["cost_per_trip"]) > 0)
+	assert data["feasible"][0] and not data["feasible"][-1]
+
+	#Off-design: the sizing mission (with its reserve) uses the full effective battery capacity
+	segments = [{"type":"hover","t":120*ureg.s},{"type":"cruise","range":87*ureg.nautical_mile},
+		reserve_segment(design),{"type":"hover","t":120*ureg.s}]
+	data = evaluate_segments(design,segments,N_passengers=3)
+	GP_value = solution("E_OnDemandSizingMission")
+	assert np.all(np.abs((data["E"]/GP_value).to(ureg.dimensionless) - 1) < 1e-4)
+	try:
+		reserve_segment(design,loiter_type="glide")
+		assert False
+	except ValueError as e:
+		assert str(e) == "Unknown loiter type: glide"
+
+	#Batched over missions: the same mission is flyable at shorter range, or with fewer passengers
+	segments[1] = {"type":"cruise","range":np.array([80.,95.,95.])*ureg.nautical_mile}
+	data = evaluate_segments(design,segments,N_passengers=np.array([3,3,1]))
+	assert np.shape(data["E"]) == (4,3)
+	assert list(data["feasible"]) == [True,False,True]
+	assert np.all(data["E_{remaining}"][-1][data["feasible"]] >= 0)
+
+
+if __name__=="__main__":
+
+	#Concept-representative design over a synthetic city network (e.g. new_york_heli routes)
+	import time
+	from aircraft_models import test as solve_representative_design
+
+	solution = solve_representative_design()
+	design = design_from_solution(solution)
+
+	random = np.random.RandomState(0)
+	num_routes = 10000
+	routes = {}
+	routes["mission_range"] = random.uniform(5,60,num_routes)*ureg.nautical_mile
+	routes["t_{hover}"] = random.choice([30,60,90],num_routes)*ureg.s
+	routes["N_{passengers}"] = random.randint(1,4,num_routes)
+
+	start_time = time.time()
+	data = evaluate_routes(design,routes)
+	run_time = time.time() - start_time
+
+	print
+	print "%d routes evaluated in %0.3f s (%d infeasible)" % (num_routes,run_time,
+		np.sum(~data["feasible"]))
+	print
+	print "Range (nm)\tt_hover (s)\tPassengers\tE_mission (kWh)\tt_flight (min)\t" \
+		+ "t_ground (min)\tCost per trip ($)"
+	for i in range(10):
+		print "%0.1f\t\t%0.0f\t\t%d\t\t%0.1f\t\t%0.1f\t\t%0.1f\t\t%0.2f" % (
+			routes["mission_range"][i].magnitude,routes["t_{hover}"][i].magnitude,
+			routes["N_{passengers}"][i],data["E_{mission}"][i].magnitude,
+			data["t_{flight}"][i].magnitude,data["t_{ground}"][i].magnitude,
+			data["cost_per_trip"][i])
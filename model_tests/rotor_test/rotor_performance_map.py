@@ -0,0 +1,165 @@
+#Precomputed rotor performance map, for fast evaluation of the GP-compatible rotor model.
+#The map is generated (in parallel) with rotors_analysis_function() on a grid of tip speed,
+#thrust per rotor, radius, solidity, and altitude; it is saved to disk and reloaded thereafter.
+#Quantities are interpolated in log space (the rotor model is a set of power laws).
+
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.abspath(__file__)) + '/../..')
+
+import itertools
+import numpy as np
+from multiprocessing import Pool
+from scipy.interpolate import RegularGridInterpolator
+from gpkit import ureg
+from rotor_test import rotors_analysis_function
+
+default_map_file = os.path.dirname(os.path.abspath(__file__)) + "/rotor_performance_map.npz"
+
+#Default grid. Units: VT in ft/s, T_perRotor in lbf, R in ft, h in ft.
+default_grid = {"VT":np.linspace(300,900,13),
+	"T_perRotor":np.logspace(np.log10(20),np.log10(2000),11),
+	"R":np.logspace(np.log10(0.5),np.log10(10),9),
+	"s":np.linspace(0.05,0.2,4),
+	"h":np.linspace(0,10000,3)}
+
+grid_keys = ["VT","T_perRotor","R","s","h"]
+output_keys = ["CT","CP","P_perRotor","SPL"]
+
+def _analyze_point(point):
+	#One GP solve per grid point (single rotor). Failed solves are stored as NaN.
+	VT, T_perRotor, R, s, h = point
+
+	try:
+		[VT,P,FOM,Cl_mean,SPL] = rotors_analysis_function(T=T_perRotor*ureg.lbf,
+			VT=VT*ureg.ft/ureg.s,h=h*ureg.ft,N=1,R=R*ureg.ft,s=s,Cl_mean_max=100.,
+			SPL_requirement=200.)
+	except (RuntimeWarning,ValueError):#infeasible or unsolvable point
+		return [np.nan]*len(output_keys)
+
+	CT = Cl_mean*s/3
+	CP = 0.5*(CT**1.5)/FOM
+	return [CT,CP,P.to(ureg.kW).magnitude,SPL]
+
+def generate_performance_map(filename=default_map_file,grid=default_grid,processes=None):
+	#Solves every grid point (in a process pool) and saves the map to filename
+
+	points = list(itertools.product(*[grid[key] for key in grid_keys]))
+
+	if processes == 1:
+		results = map(_analyze_point,points)
+	else:
+		pool = Pool(processes=processes)
+		results = pool.map(_analyze_point,points,chunksize=max(1,len(points)//100))
+		pool.close()
+		pool.join()
+
+	shape = tuple(np.size(grid[key]) for key in grid_keys)
+	results = np.array(results,dtype=float).reshape(shape + (len(output_keys),))
+
+	data = dict(("grid_" + key, np.array(grid[key],dtype=float)) for key in grid_keys)
+	for i,key in enumerate(output_keys):
+		data[key] = results[...,i]
+	np.savez(filename,**data)
+
+	return load_performance_map(filename)
+
+def load_performance_map(filename=default_map_file,processes=None):
+	#Loads the map (generating it first if the file does not exist), and sets up interpolants
+
+	if not os.path.isfile(filename):
+		return generate_performance_map(filename,processes=processes)
+
+	data = np.load(filename)
+	grid = dict((key, data["grid_" + key]) for key in grid_keys)
+
+	#Log-space axes, except altitude (which can be zero)
+	axes = tuple(np.log(grid[key]) if key != "h" else grid[key] for key in grid_keys)
+
+	performance_map = {"grid":grid,"filename":filename,"interpolants":{}}
+	for key in output_keys:
+		values = data[key] if key == "SPL" else np.log(data[key])
+		performance_map["interpolants"][key] = RegularGridInterpolator(axes,values,
+			bounds_error=False,fill_value=np.nan)
+
+	return performance_map
+
+def rotor_performance(performance_map,T=2000*ureg.lbf,VT=700*ureg.ft/ureg.s,h=0*ureg.ft,
+	N=12,R=1.804*ureg.ft,s=0.1):
+	#Interpolated rotor performance; inputs can be arrays (they are broadcast against each other).
+	#Same inputs as rotors_analysis_function() (T is total thrust). Points outside the map
+	#(or in regions where the GP solves failed) are returned as NaN.
+
+	VT = VT.to(ureg.ft/ureg.s).magnitude
+	T_perRotor = (T/N).to(ureg.lbf).magnitude
+	R = R.to(ureg.ft).magnitude
+	h = h.to(ureg.ft).magnitude
+	VT, T_perRotor, R, s, h, N = np.broadcast_arrays(VT,T_perRotor,R,s,h,N)
+
+	points = np.stack([np.log(VT),np.log(T_perRotor),np.log(R),np.log(s),h],axis=-1)
+
+	output = {}
+	for key in output_keys:
+		values = performance_map["interpolants"][key](points)
+		output[key] = values if key == "SPL" else np.exp(values)
+
+	output["FOM"] = 0.5*(output["CT"]**1.5)/output["CP"]
+	output["Cl_mean"] = 3*output["CT"]/s
+
+	#Scale from one rotor to N rotors (noise scales with the square root of N)
+	output["P"] = N*output.pop("P_perRotor")*ureg.kW
+	output["SPL"] = output["SPL"] + 10*np.log10(N)
+	output["VT"] = VT*ureg.ft/ureg.s
+	return output
+
+
+def test():
+	#Small map; interpolated values must match a direct GP solve at an off-grid point
+	import tempfile
+
+	grid = {"VT":np.array([500.,700.]),"T_perRotor":np.array([200.,300.]),
+		"R":np.array([1.5,2.5]),"s":np.array([0.08,0.12]),"h":np.array([0.,2000.])}
+	filename = os.path.join(tempfile.mkdtemp(),"rotor_performance_map.npz")
+	performance_map = generate_performance_map(filename,grid,processes=1)
+	os.remove(filename)
+
+	T = 1000*ureg.lbf
+	VT = 600*ureg.ft/ureg.s
+	N = 4
+	R = 2*ureg.ft
+	s = 0.1
+	h = 1000*ureg.ft
+
+	interpolated = rotor_performance(performance_map,T=T,VT=VT,h=h,N=N,R=R,s=s)
+	[VT,P,FOM,Cl_mean,SPL] = rotors_analysis_function(T=T,VT=VT,h=h,N=N,R=R,s=s,
+		Cl_mean_max=100.,SPL_requirement=200.)
+
+	assert abs(interpolated["Cl_mean"]/Cl_mean - 1) < 0.01
+	assert abs(interpolated["FOM"]/FOM - 1) < 0.03
+	assert abs((interpolated["P"]/P).to(ureg.dimensionless).magnitude - 1) < 0.03
+	assert abs(interpolated["SPL"] - SPL) < 0.1
+
+
+if __name__ == "__main__":
+
+	#Tip-speed sweep for the Joby S2 (see joby_S2_rotor_analysis.py), using the map
+	import time
+
+	performance_map = load_performance_map()
+
+	VT_array = np.linspace(400,900,1000)*ureg.ft/ureg.s
+
+	start_time = time.time()
+	data = rotor_performance(performance_map,T=2000*ureg.lbf,VT=VT_array,h=0*ureg.ft,
+		N=12,R=1.804*ureg.ft,s=0.1)
+	run_time = time.time() - start_time
+
+	print
+	print "Map evaluation: %d points in %0.2f ms (%0.2f microseconds per point)" \
+		% (np.size(VT_array), 1e3*run_time, 1e6*run_time/np.size(VT_array))
+	print
+	print "VT (ft/s)\tP (hp)\tFOM\tCl_mean\tSPL (dB)"
+	for i in range(0,np.size(VT_array),100):
+		print "%0.0f\t\t%0.0f\t%0.3f\t%0.3f\t%0.1f" % (VT_array[i].to(ureg.ft/ureg.s).magnitude,
+			data["P"][i].to(ureg.hp).magnitude, data["FOM"][i], data["Cl_mean"][i],
+			data["SPL"][i])
@@ -30,8 +30,8 @@ def rotors_analysis_function(T=2000*ureg("lbf"),VT="unconstrained",h=0*ureg.ft,
 	if print_summary=="Yes":
 		print testSolution.summary()
 
-	VT = testSolution["variables"]["VT_RotorsAero"]
-	P = testSolution["variables"]["P_RotorsAero"]
+	VT = testSolution("VT_RotorsAero")
+	P = testSolution("P_RotorsAero")
 	FOM = testSolution["variables"]["FOM_RotorsAero"]
 	Cl_mean = testSolution["variables"]["Cl_mean_RotorsAero"]
 	SPL = 20*np.log10(testSolution["variables"]["p_{ratio}_RotorsAero"])
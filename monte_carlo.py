@@ -0,0 +1,180 @@
+#Monte Carlo propagation of input uncertainty (study_input_data.uncertainty_data) to per-trip
+#cost, MTOW and noise. Samples are solved across a worker pool, either in full (one GP solve per
+#sample) or with a sensitivity-based approximation: each output is fitted in log space to a
+#quadratic in the log of each input factor (central differences; 2k + 1 solves per
+#configuration for k uncertain inputs, interactions neglected), which is then evaluated for all
+#samples at once. The same samples are used for every configuration.
+
+import numpy as np
+from multiprocessing import Pool
+from study_input_data import uncertainty_data
+from on_demand_model import solve_point, output_names
+
+#Outputs approximated in absolute terms (already logarithmic); the others are fitted in log space
+linear_outputs = ["SPL (dB)","SPL_A (dBA)"]
+
+def sample_factors(uncertainty,N_samples,seed=None):
+	#Random input factors: name -> array of N_samples values
+	random = np.random.RandomState(seed)
+	samples = {}
+	for name, d in uncertainty.items():
+		if d["distribution"] == "triangular":
+			samples[name] = random.triangular(d["min"],d["mode"],d["max"],size=N_samples)
+		elif d["distribution"] == "uniform":
+			samples[name] = random.uniform(d["min"],d["max"],size=N_samples)
+		else:
+			raise ValueError("Unknown distribution: %s" % d["distribution"])
+	return samples
+
+def _solve_task(args):
+	config, factors = args
+	return solve_point(config,factors)
+
+def _pool_map(tasks,processes):
+	pool = Pool(processes=processes)
+	try:
+		results = pool.map(_solve_task,tasks,chunksize=max(1,len(tasks)//(4*(processes or 8))))
+		pool.close()
+	except:
+		pool.terminate()
+		raise
+	finally:
+		pool.join()
+	return results
+
+def _transform(name,values):
+	return np.asarray(values) if name in linear_outputs else np.log(values)
+
+def _inverse_transform(name,values):
+	return values if name in linear_outputs else np.exp(values)
+
+def sensitivity_model(base,plus,minus,step):
+	#Log-space quadratic (no interactions) from the outputs of the base point and of points with
+	#each factor scaled by exp(+step) and exp(-step). plus, minus: name -> outputs.
+	model = {"base":base,"gradient":{},"curvature":{}}
+	for output in output_names:
+		y0 = _transform(output,base[output])
+		model["gradient"][output] = {}
+		model["curvature"][output] = {}
+		for name in plus:
+			yp, ym = _transform(output,plus[name][output]), _transform(output,minus[name][output])
+			model["gradient"][output][name] = (yp - ym)/(2*step)
+			model["curvature"][output][name] = (yp - 2*y0 + ym)/step**2
+	return model
+
+def approximate_outputs(model,samples):
+	#Outputs at the given factors (name -> array), from sensitivity_model()
+	output = {}
+	for name in output_names:
+		y = _transform(name,model["base"][name])
+		for factor, values in samples.items():
+			x = np.log(values)
+			y = y + model["gradient"][name][factor]*x + 0.5*model["curvature"][name][factor]*x**2
+		output[name] = _inverse_transform(name,y)
+	return output
+
+def fit_sensitivity_models(configs,names,step=0.1,processes=None):
+	#sensitivity_model() for each configuration (None if any of its points could not be solved)
+	tasks = []
+	for config in configs:
+		tasks += [(config,{})]
+		tasks += [(config,{name:np.exp(step)}) for name in names]
+		tasks += [(config,{name:np.exp(-step)}) for name in names]
+	outputs = _pool_map(tasks,processes)
+
+	k = len(names)
+	models = {}
+	for j, config in enumerate(configs):
+		o = outputs[j*(2*k+1):(j+1)*(2*k+1)]
+		if any(x is None for x in o):
+			models[config] = None
+			continue
+		models[config] = sensitivity_model(o[0],dict(zip(names,o[1:k+1])),
+			dict(zip(names,o[k+1:])),step)
+	return models
+
+def monte_carlo(configs,N_samples,method="sensitivity",uncertainty=uncertainty_data,step=0.1,
+	processes=None,seed=0):
+	#Output samples for each configuration (name -> output -> array of N_samples values), or
+	#None for configurations that could not be solved. With method="solve", samples whose
+	#problem could not be solved are nan.
+	samples = sample_factors(uncertainty,N_samples,seed)
+	names = list(uncertainty.keys())
+	results = {"samples":samples}
+
+	if method == "solve":
+		tasks = [(config,dict((name,samples[name][i]) for name in names)) \
+			for config in configs for i in range(N_samples)]
+		outputs = _pool_map(tasks,processes)
+		for j, config in enumerate(configs):
+			config_outputs = outputs[j*N_samples:(j+1)*N_samples]
+			if all(o is None for o in config_outputs):
+				results[config] = None
+				continue
+			results[config] = dict((output,np.array([np.nan if o is None else o[output] \
+				for o in config_outputs])) for output in output_names)
+
+	elif method == "sensitivity":
+		models = fit_sensitivity_models(configs,names,step,processes)
+		for config in configs:
+			results[config] = None if models[config] is None \
+				else approximate_outputs(models[config],samples)
+	else:
+		raise ValueError("Unknown method: %s" % method)
+	return results
+
+def percentiles(values,q=[10,50,90]):
+	#P10/P50/P90 (by default) of an array of samples, ignoring failed samples
+	return np.nanpercentile(values,q)
+
+
+def test():
+	names = ["C_m","battery_cost_per_C"]
+	uncertainty = dict((name,uncertainty_data[name]) for name in names)
+	samples = sample_factors(uncertainty,10000,seed=0)
+	assert np.all(samples["C_m"] >= 0.85) and np.all(samples["C_m"] <= 1.15)
+	assert abs(np.mean(samples["C_m"]) - 1) < 0.01
+
+	#Sensitivity-based approximation against a full solve
+	model = fit_sensitivity_models(["Tilt rotor"],names,processes=2)["Tilt rotor"]
+	factors = {"C_m":0.9,"battery_cost_per_C":1.3}
+	exact = solve_point("Tilt rotor",factors)
+	approximate = approximate_outputs(model,dict((name,np.array([factors[name]])) for name in names))
+	for output in output_names:
+		assert abs(approximate[output][0]/exact[output] - 1) < 0.005
+
+	data = approximate_outputs(model,samples)
+	P10, P50, P90 = percentiles(data["cost_per_trip_per_passenger"])
+	assert P10 < model["base"]["cost_per_trip_per_passenger"] < P90
+
+	#Full solves (two samples)
+	results = monte_carlo(["Tilt rotor"],2,method="solve",uncertainty=uncertainty,processes=2)
+	assert np.all(np.isfinite(results["Tilt rotor"]["MTOW (lbf)"]))
+
+
+if __name__=="__main__":
+
+	#P10/P50/P90 outputs per configuration, from the sensitivity-based approximation
+	import time
+	from study_input_data import configuration_data
+
+	configs = configuration_data.copy()
+	del configs["Tilt duct"]
+	del configs["Multirotor"]
+	configs = list(configs.keys())
+	N_samples = 10000
+
+	t0 = time.time()
+	results = monte_carlo(configs,N_samples)
+	print
+	print "%d samples per configuration; uncertain inputs: %s (%0.0f s)" % (N_samples,
+		", ".join(uncertainty_data.keys()),time.time() - t0)
+
+	for output in ["cost_per_trip_per_passenger","MTOW (lbf)","SPL (dB)"]:
+		print
+		print "%s\tP10\tP50\tP90" % output
+		for config in configs:
+			if results[config] is None:
+				print "%s\t(could not be solved)" % config
+				continue
+			print "%s\t%0.1f\t%0.1f\t%0.1f" % ((config,) + tuple(percentiles(results[config][output])))
@@ -12,6 +12,7 @@ from aircraft_models import OnDemandSizingMission, OnDemandRevenueMission
 from aircraft_models import OnDemandDeadheadMission, OnDemandMissionCost
 from study_input_data import generic_data, configuration_data
 from noise_models import rotational_noise, vortex_noise, noise_weighting
+from sweep_tools import load_checkpoint, checkpoint_solve
 
 import matplotlib as mpl
 mpl.style.use("classic")
@@ -58,6 +59,18 @@ del configs["Autogyro"]
 del configs["Helicopter"]
 del configs["Coaxial heli"]
 
+#Solved points are checkpointed; rerun with --resume to skip them. Points that cannot be solved
+#(or not within solve_timeout) are reported once the others are solved, and left out of the
+#noise computations and plots.
+solve_timeout = 300*ureg.s
+failed_points = []
+checkpoint = load_checkpoint(os.path.join(os.path.dirname(os.path.abspath(__file__)),
+	"config_tradeStudy_noise_analysis_checkpoint.txt"),
+	resume="--resume" in sys.argv)
+saved_variables = ["T_perRotor_OnDemandSizingMission","Q_perRotor_OnDemandSizingMission","R",
+	"VT_OnDemandSizingMission","s","Cl_{mean_{max}}","N","t_{loiter}_OnDemandSizingMission"]
+saved_constants = ["R_{divert}_OnDemandSizingMission"]
+
 #Optimize remaining configurations
 for config in configs:
 	
@@ -106,10 +119,26 @@ for config in configs:
 	problem = Model(MissionCost["cost_per_trip"],
 		[Aircraft, SizingMission, RevenueMission, DeadheadMission, MissionCost])
 	
-	solution = problem.solve(verbosity=0)
+	solution = checkpoint_solve(checkpoint,config,problem,saved_variables,saved_constants,
+		timeout=solve_timeout.to(ureg.s).magnitude)
+	if solution["status"] != "solved":
+		failed_points += ["%s: %s" % (config,solution["status"])]
+		continue
 	configs[config]["solution"] = solution
 	
 
+if failed_points:
+	print
+	print "Not solved (points that timed out are solved again with --resume):"
+	for point in failed_points:
+		print "\t" + point
+for config in list(configs):
+	if "solution" not in configs[config]:
+		del configs[config]
+if not configs:
+	sys.exit("No configuration was solved")
+solution = configs[list(configs)[-1]]["solution"] #for the reserve data, below
+
 #Noise computations for varying theta (delta-S = constant)
 print
 print "Noise computations for varying theta"
@@ -480,4 +509,7 @@ for i, theta_desired in enumerate(theta_plot_values):
 plt.suptitle(title_str,fontsize = 13)
 plt.tight_layout()
 plt.subplots_adjust(left=0.06,right=0.94,bottom=0.08,top=0.87)
-plt.savefig('config_tradeStudy_noise_analysis_plot_04.pdf')
\ No newline at end of file
+plt.savefig('config_tradeStudy_noise_analysis_plot_04.pdf')
+
+if failed_points:
+	sys.exit(1)
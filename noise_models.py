@@ -131,6 +131,274 @@ def noise_weighting(f,SPL,type="A"):
 	dBA = SPL + A
 	return dBA
 
+#Normalized vortex-noise spectrum (frequency ratios and offsets from the overall SPL)
+vortex_spectrum = {}
+vortex_spectrum["fr"] = np.array([0.5,1,2,4,8,16])
+vortex_spectrum["offsets_dB"] = np.array([7.92,4.17,8.33,8.75,12.92,13.33])
+
+def frequency_bands(band_type="one-third-octave",f_min=20*ureg.turn/ureg.s,
+	f_max=20000*ureg.turn/ureg.s):
+	#Standard (base-10) octave or one-third-octave bands, as per ANSI S1.11. Bands are included
+	#if their center frequencies lie between f_min and f_max.
+
+	if band_type == "octave":
+		bands_per_octave = 1
+	elif band_type == "one-third-octave":
+		bands_per_octave = 3
+	else:
+		raise ValueError("Band type %s not recognized." % band_type)
+
+	f_min = f_min.to(ureg.turn/ureg.s).magnitude
+	f_max = f_max.to(ureg.turn/ureg.s).magnitude
+
+	#Band center frequencies are 1000 Hz * 10^(3k/(10b)). The tolerance allows for the difference
+	#between exact and nominal center frequencies (e.g. 19.95 Hz vs. 20 Hz).
+	k_min = int(np.ceil(10.*bands_per_octave*np.log10(f_min/1000.)/3. - 0.05))
+	k_max = int(np.floor(10.*bands_per_octave*np.log10(f_max/1000.)/3. + 0.05))
+	k = np.arange(k_min,k_max+1)
+
+	f_center = 1000.*10**(3.*k/(10.*bands_per_octave))
+	band_ratio = 10**(3./(20.*bands_per_octave)) #ratio of band edges to center frequency
+
+	bands = {}
+	bands["type"] = band_type
+	bands["f_center"] = f_center*ureg.turn/ureg.s
+	bands["f_lower"] = (f_center/band_ratio)*ureg.turn/ureg.s
+	bands["f_upper"] = (f_center*band_ratio)*ureg.turn/ureg.s
+	return bands
+
+def rotational_noise_spectra(T_perRotor,Q_perRotor,R,VT,s,N,B,theta=175*ureg.degree,
+	delta_S=500*ureg.ft,h=0*ureg.ft,t_c=0.12,num_harmonics=10,weighting="None"):
+	#Vectorized version of rotational_noise(). Inputs are either scalars or arrays (one entry
+	#per design); spectrum arrays are (designs x harmonics).
+
+	pi = math.pi
+	P_ref = 2e-5 #Pa
+
+	atmospheric_data = stdatmo(h)
+	rho = atmospheric_data["\rho"].to(ureg.kg/ureg.m**3).magnitude
+	a = atmospheric_data["a"].to(ureg.m/ureg.s).magnitude
+
+	T_perRotor, Q_perRotor, R, VT, s, N, B, theta, delta_S, rho, a, t_c = _design_arrays(
+		_magnitude(T_perRotor,ureg.N), _magnitude(Q_perRotor,ureg.N*ureg.m),
+		_magnitude(R,ureg.m), _magnitude(VT,ureg.m/ureg.s), s, N, B,
+		_magnitude(theta,ureg.rad), _magnitude(delta_S,ureg.m), rho, a, t_c)
+
+	R_eff = 0.8*R #Effective rotor radius
+	c = (pi*s*R)/B #Rotor blade chord
+	omega = VT/R #blade angular velocity (rad/s)
+	t = t_c*c #blade thickness
+
+	m = np.arange(1,num_harmonics+1)[np.newaxis,:]
+	f = m*B*omega #rad/s
+
+	bessel_term = jv(m*B,(f/a)*R_eff*np.sin(theta))
+
+	#RMS acoustic pressures
+	P_mL = (f/(2*np.sqrt(2)*pi*a*delta_S))*(T_perRotor*np.cos(theta) \
+		- Q_perRotor*a/(omega*R_eff**2))*bessel_term #loading
+	P_mT = ((-rho*(f**2)*B)/(3*np.sqrt(2)*pi*delta_S))*c*t*R_eff*bessel_term #thickness
+
+	spectrum = {}
+	spectrum["m"] = m[0]
+	spectrum["f"] = f*ureg.rad/ureg.s
+	spectrum["SPL"] = 10*np.log10(N*((P_mL/P_ref)**2 + (P_mT/P_ref)**2))
+
+	#Apply weighting schemes
+	if weighting == "A":
+		spectrum["SPL"] = noise_weighting(spectrum["f"],spectrum["SPL"],type="A")
+
+	#Calculate overall SPL
+	SPL = 10*np.log10(np.sum(10**(spectrum["SPL"]/10),axis=1))
+
+	f_fundamental = spectrum["f"][:,0]
+	return f_fundamental, SPL, spectrum
+
+def vortex_noise_spectra(T_perRotor,R,VT,s,Cl_mean,N,B,delta_S=500*ureg.ft,h=0*ureg.ft,t_c=0.12,
+	St=0.28,weighting="None"):
+	#Vectorized version of vortex_noise(). Inputs are either scalars or arrays (one entry per
+	#design); spectrum arrays are (designs x 6).
+
+	k2 = 1.206e-2 * ureg.s**3/ureg.ft**3
+	k2 = k2.to(ureg.s**3/ureg.m**3).magnitude
+	pi = math.pi
+
+	atmospheric_data = stdatmo(h)
+	rho = atmospheric_data["\rho"].to(ureg.kg/ureg.m**3).magnitude
+
+	T_perRotor, R, VT, s, Cl_mean, N, B, delta_S, rho, t_c, St = _design_arrays(
+		_magnitude(T_perRotor,ureg.N), _magnitude(R,ureg.m), _magnitude(VT,ureg.m/ureg.s),
+		s, Cl_mean, N, B, _magnitude(delta_S,ureg.m), rho, t_c, St)
+
+	V_07 = 0.7*VT
+	A = pi*(R**2) #rotor disk area
+	c = (pi*s*R)/B #Rotor blade chord
+	alpha = Cl_mean/(2*pi) #Angle of attack (average)
+	t_proj = t_c*c*np.cos(alpha) + c*np.sin(alpha) #blade projected thickness
+
+	f_peak = 2*pi*St*V_07/t_proj #peak frequency (rad/s)
+
+	p_ratio = k2*(VT/(rho*delta_S))*np.sqrt((T_perRotor*N/s)*(T_perRotor/A))
+	SPL = 20*np.log10(p_ratio)
+
+	spectrum = {}
+	spectrum["f"] = f_peak*vortex_spectrum["fr"]*ureg.rad/ureg.s
+	spectrum["SPL"] = SPL - vortex_spectrum["offsets_dB"]
+
+	SPL = SPL[:,0]
+	f_peak = f_peak[:,0]*ureg.rad/ureg.s
+
+	if weighting == "A":
+
+		#Apply A-weighting to the spectrum, and integrate it
+		spectrum["SPL"] = noise_weighting(spectrum["f"],spectrum["SPL"],type="A")
+
+		fr = np.tile(vortex_spectrum["fr"],(np.size(SPL),1))
+		weighted_p_ratio_squared = _power_law_integral(fr,spectrum["SPL"],
+			fr[:,:1],fr[:,-1:])
+		SPL = 10*np.log10(weighted_p_ratio_squared[:,0])
+
+	return f_peak, SPL, spectrum
+
+def band_spectrum(f,SPL,bands,spectrum_type="tonal",f_peak=None):
+	#Maps spectra into frequency bands; output is (designs x bands). Tonal spectra (e.g.
+	#rotational noise) are summed by band. Broadband spectra (e.g. vortex noise) are integrated
+	#over each band, assuming SPL varies linearly with log(f) between spectrum points; this is the
+	#same convention used for the A-weighted vortex-noise SPL. Empty bands are -inf dB.
+
+	f = np.atleast_2d(f.to(ureg.turn/ureg.s).magnitude)
+	SPL = np.atleast_2d(SPL)
+	f_lower = bands["f_lower"].to(ureg.turn/ureg.s).magnitude
+	f_upper = bands["f_upper"].to(ureg.turn/ureg.s).magnitude
+
+	num_designs = np.shape(SPL)[0]
+	num_bands = np.size(f_lower)
+
+	if spectrum_type == "tonal":
+
+		band_edges = np.append(f_lower,f_upper[-1])
+		band_index = np.digitize(f,band_edges) - 1 #-1 and num_bands are out of range
+		in_band = (band_index >= 0) & (band_index < num_bands)
+		design_index = np.tile(np.arange(num_designs)[:,np.newaxis],(1,np.shape(f)[1]))
+
+		p_ratio_squared = np.zeros((num_designs,num_bands))
+		np.add.at(p_ratio_squared,(design_index[in_band],band_index[in_band]),
+			10**(SPL[in_band]/10))
+
+	elif spectrum_type == "broadband":
+
+		if f_peak is None:
+			f_peak = f[:,0]
+		else:
+			f_peak = f_peak.to(ureg.turn/ureg.s).magnitude
+		f_peak = np.reshape(f_peak,(-1,1))
+
+		fr = f/f_peak #frequency ratio array
+		p_ratio_squared = _power_law_integral(fr,SPL,f_lower[np.newaxis,:]/f_peak,
+			f_upper[np.newaxis,:]/f_peak)
+
+	else:
+		raise ValueError("Spectrum type %s not recognized." % spectrum_type)
+
+	with np.errstate(divide="ignore"):
+		band_SPL = 10*np.log10(p_ratio_squared)
+	return band_SPL
+
+def noise_band_spectra(T_perRotor,Q_perRotor,R,VT,s,Cl_mean,N,B,theta=175*ureg.degree,
+	delta_S=500*ureg.ft,h=0*ureg.ft,t_c=0.12,St=0.28,num_harmonics=10,weighting="None",
+	band_type="one-third-octave",f_min=20*ureg.turn/ureg.s,f_max=20000*ureg.turn/ureg.s):
+	#Rotational, vortex, and combined band spectra (designs x bands), for many designs at once.
+
+	bands = frequency_bands(band_type=band_type,f_min=f_min,f_max=f_max)
+
+	f_fund, SPL_rotational, rotational_spectrum = rotational_noise_spectra(T_perRotor,Q_perRotor,
+		R,VT,s,N,B,theta=theta,delta_S=delta_S,h=h,t_c=t_c,num_harmonics=num_harmonics,
+		weighting=weighting)
+	f_peak, SPL_vortex, vortex_spectrum = vortex_noise_spectra(T_perRotor,R,VT,s,Cl_mean,N,B,
+		delta_S=delta_S,h=h,t_c=t_c,St=St,weighting=weighting)
+
+	band_SPL = {}
+	band_SPL["rotational"] = band_spectrum(rotational_spectrum["f"],rotational_spectrum["SPL"],
+		bands,spectrum_type="tonal")
+	band_SPL["vortex"] = band_spectrum(vortex_spectrum["f"],vortex_spectrum["SPL"],
+		bands,spectrum_type="broadband",f_peak=f_peak)
+	with np.errstate(divide="ignore"):
+		band_SPL["total"] = 10*np.log10(10**(band_SPL["rotational"]/10) \
+			+ 10**(band_SPL["vortex"]/10))
+
+	return bands, band_SPL
+
+def _magnitude(quantity,units):
+	#Magnitude of a pint quantity in the given units (no-op for plain numbers)
+	if hasattr(quantity,"to"):
+		return quantity.to(units).magnitude
+	return quantity
+
+def _design_arrays(*args):
+	#Broadcast per-design inputs against each other; returns (designs x 1) column arrays
+	arrays = np.broadcast_arrays(*[np.atleast_1d(np.asarray(arg,dtype=float)) for arg in args])
+	return [np.reshape(array,(-1,1)) for array in arrays]
+
+def _power_law_integral(fr,SPL,fr_lower,fr_upper):
+	#Integrates 10^(SPL/10) with respect to fr, between fr_lower and fr_upper (designs x bands).
+	#SPL varies linearly with log10(fr) between spectrum points; nothing outside of them.
+
+	fr1 = fr[:,np.newaxis,:-1]
+	fr2 = fr[:,np.newaxis,1:]
+	SPL1 = SPL[:,np.newaxis,:-1]
+	SPL2 = SPL[:,np.newaxis,1:]
+
+	a = (SPL2-SPL1)/(np.log10(fr2)-np.log10(fr1))
+	b = SPL2 - a*np.log10(fr2)
+	exponent = (a/10) + 1
+
+	x1 = np.minimum(np.maximum(fr1,fr_lower[:,:,np.newaxis]),fr2)
+	x2 = np.maximum(np.minimum(fr2,fr_upper[:,:,np.newaxis]),fr1)
+	x2 = np.maximum(x1,x2)
+
+	with np.errstate(divide="ignore",invalid="ignore"):
+		fr_term = np.where(np.abs(exponent) > 1e-9,
+			(x2**exponent - x1**exponent)/exponent, np.log(x2/x1))
+	return np.sum((10**(b/10))*fr_term,axis=2)
+
+
+def test():
+	#Vectorized noise spectra must match the scalar functions, and the band spectra must
+	#conserve acoustic energy when the bands cover the full spectrum.
+
+	T_perRotor = [200.,250.,300.]*ureg.lbf
+	Q_perRotor = [60.,75.,90.]*ureg.lbf*ureg.ft
+	R = [2.,2.2,2.4]*ureg.ft
+	VT = [500.,550.,600.]*ureg.ft/ureg.s
+	s = 0.1
+	Cl_mean = [0.8,0.9,1.0]
+	N = 8
+	B = 5
+	theta = 91.*ureg.degree
+
+	for weighting in ["None","A"]:
+		f_fund, SPL_rotational, rotational_spectrum = rotational_noise_spectra(T_perRotor,
+			Q_perRotor,R,VT,s,N,B,theta=theta,weighting=weighting)
+		f_peak, SPL_vortex, vortex_spectrum = vortex_noise_spectra(T_perRotor,R,VT,s,Cl_mean,
+			N,B,weighting=weighting)
+
+		for i in range(np.size(Cl_mean)):
+			f_fund_i, SPL_i, spectrum_i = rotational_noise(T_perRotor[i],Q_perRotor[i],R[i],
+				VT[i],s,N,B,theta=theta,weighting=weighting)
+			assert abs(SPL_rotational[i] - SPL_i) < 1e-6
+			f_peak_i, SPL_i, spectrum_i = vortex_noise(T_perRotor[i],R[i],VT[i],s,Cl_mean[i],
+				N,B,weighting=weighting)
+			assert abs(SPL_vortex[i] - SPL_i) < 1e-6
+
+	bands, band_SPL = noise_band_spectra(T_perRotor,Q_perRotor,R,VT,s,Cl_mean,N,B,theta=theta,
+		weighting="A",f_min=1*ureg.turn/ureg.s,f_max=100000*ureg.turn/ureg.s)
+	assert np.shape(band_SPL["total"]) == (np.size(Cl_mean),np.size(bands["f_center"]))
+
+	SPL_rotational_bands = 10*np.log10(np.sum(10**(band_SPL["rotational"]/10),axis=1))
+	SPL_vortex_bands = 10*np.log10(np.sum(10**(band_SPL["vortex"]/10),axis=1))
+	assert np.all(np.abs(SPL_rotational_bands - SPL_rotational) < 1e-6)
+	assert np.all(np.abs(SPL_vortex_bands - SPL_vortex) < 1e-6)
+
 
 if __name__=="__main__":
 	
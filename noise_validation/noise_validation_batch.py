@@ -0,0 +1,98 @@
+#Batch validation of the vortex-noise model against hover test data. All test points (from any
+#number of data files) are evaluated in a single vectorized call.
+
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.abspath(__file__)) + '/..')
+
+import math
+import numpy as np
+from gpkit import ureg
+from noise_models import vortex_noise_spectra
+
+#Columns of the test-data files (see noise_validation_data.txt)
+data_columns = [("aircraft","S32"),("D","f8"),("B","f8"),("s","f8"),("t_c","f8"),("St","f8"),
+	("omega","f8"),("T","f8"),("delta_S","f8"),("rho","f8"),("SPL_measured","f8")]
+
+default_data_file = os.path.dirname(os.path.abspath(__file__)) + "/noise_validation_data.txt"
+
+def load_test_data(*filenames):
+	#Reads (and concatenates) test-data files. Each row is one test point.
+	if not filenames:
+		filenames = [default_data_file]
+
+	data = [np.atleast_1d(np.genfromtxt(filename,dtype=data_columns,delimiter="\t",
+		comments="#")) for filename in filenames]
+	return np.concatenate(data)
+
+def batch_vortex_noise(test_data,weighting="None"):
+	#Vortex-noise SPL (dB) for every test point, computed in one call
+
+	pi = math.pi
+
+	R = (test_data["D"]/2)*ureg.ft
+	A = pi*R**2
+	omega = (test_data["omega"]*ureg.rpm).to(ureg.rad/ureg.s).magnitude
+	VT = omega*R/ureg.s
+	T = test_data["T"]*ureg.lbf
+	rho = test_data["rho"]*ureg.kg/ureg.m**3
+
+	CT = (T/(0.5*rho*(VT**2)*A)).to(ureg.dimensionless).magnitude
+	Cl_mean = 3*CT/test_data["s"]
+
+	f_peak, SPL, spectrum = vortex_noise_spectra(T_perRotor=T,R=R,VT=VT,s=test_data["s"],
+		Cl_mean=Cl_mean,N=1,B=test_data["B"],delta_S=test_data["delta_S"]*ureg.ft,h=0*ureg.ft,
+		t_c=test_data["t_c"],St=test_data["St"],weighting=weighting)
+	return SPL
+
+def residual_statistics(test_data,SPL_calculated):
+	#Residual (calculated - measured) statistics, by aircraft and overall
+
+	residuals = SPL_calculated - test_data["SPL_measured"]
+	groups = [(aircraft, test_data["aircraft"] == aircraft) \
+		for aircraft in np.unique(test_data["aircraft"])]
+	groups += [("All", np.ones(np.size(residuals),dtype=bool))]
+
+	statistics = []
+	for name, mask in groups:
+		r = residuals[mask]
+		statistics += [{"aircraft":name,"N_points":np.size(r),"mean":np.mean(r),
+			"std":np.std(r),"RMS":np.sqrt(np.mean(r**2)),"max_abs":np.max(np.abs(r))}]
+	return statistics
+
+
+def test():
+	#Batch evaluation must match the point-by-point vortex_noise() calls
+	from noise_models import vortex_noise
+
+	test_data = load_test_data()
+	SPL_calculated = batch_vortex_noise(test_data)
+
+	for i,point in enumerate(test_data):
+		R = (point["D"]/2)*ureg.ft
+		VT = (point["omega"]*ureg.rpm).to(ureg.rad/ureg.s).magnitude*R/ureg.s
+		CT = (point["T"]*ureg.lbf/(0.5*point["rho"]*ureg.kg/ureg.m**3*(VT**2)*math.pi*R**2))
+		Cl_mean = 3*CT.to(ureg.dimensionless).magnitude/point["s"]
+		f_peak, SPL, spectrum = vortex_noise(T_perRotor=point["T"]*ureg.lbf,R=R,VT=VT,
+			s=point["s"],Cl_mean=Cl_mean,N=1,B=point["B"],delta_S=point["delta_S"]*ureg.ft,
+			h=0*ureg.ft,t_c=point["t_c"],St=point["St"],weighting="None")
+		assert abs(SPL - SPL_calculated[i]) < 1e-6
+
+	statistics = residual_statistics(test_data,SPL_calculated)
+	assert statistics[-1]["N_points"] == np.size(test_data)
+
+
+if __name__=="__main__":
+
+	#Usage: python noise_validation_batch.py [data_file_1 data_file_2 ...]
+	test_data = load_test_data(*sys.argv[1:])
+	SPL_calculated = batch_vortex_noise(test_data)
+	statistics = residual_statistics(test_data,SPL_calculated)
+
+	print "Vortex-noise model residuals (calculated - measured), %d test points" \
+		% np.size(test_data)
+	print
+	print "Aircraft\tPoints\tMean (dB)\tStd (dB)\tRMS (dB)\tMax |error| (dB)"
+	for s in statistics:
+		print "%s\t\t%d\t%0.2f\t\t%0.2f\t\t%0.2f\t\t%0.2f" % (s["aircraft"],s["N_points"],
+			s["mean"],s["std"],s["RMS"],s["max_abs"])
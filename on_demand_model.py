@@ -0,0 +1,143 @@
+#Standard on-demand aviation problem (sizing, revenue, and deadhead missions; mission cost),
+#built from study input data. Used by studies that solve it for many sets of inputs; outputs are
+#returned as plain floats, so that they can be passed between processes.
+
+from gpkit import Model, ureg
+from aircraft_models import OnDemandAircraft
+from aircraft_models import OnDemandSizingMission, OnDemandRevenueMission
+from aircraft_models import OnDemandDeadheadMission, OnDemandMissionCost
+from study_input_data import generic_data, configuration_data
+from noise_models import vortex_noise
+from sweep_tools import time_limit, SolveTimeout
+
+output_names = ["cost_per_trip_per_passenger","cost_per_trip","MTOW (lbf)","W_{battery} (lbf)",
+	"SPL (dB)","SPL_A (dBA)"]
+
+def build_problem(c,g=generic_data,peukert_mode="exponent"):
+	#Problem for one configuration (c: configuration data; g: generic data; peukert_mode: see
+	#BatteryPerformance)
+
+	Aircraft = OnDemandAircraft(N=c["N"],L_D_cruise=c["L/D"],eta_cruise=g["\eta_{cruise}"],
+		C_m=g["C_m"],Cl_mean_max=c["Cl_{mean_{max}}"],weight_fraction=c["weight_fraction"],
+		n=g["n"],eta_electric=g["\eta_{electric}"],cost_per_weight=g["vehicle_cost_per_weight"],
+		cost_per_C=g["battery_cost_per_C"],autonomousEnabled=g["autonomousEnabled"],
+		peukert_mode=peukert_mode)
+
+	SizingMission = OnDemandSizingMission(Aircraft,mission_range=g["sizing_mission"]["range"],
+		V_cruise=c["V_{cruise}"],N_passengers=g["sizing_mission"]["N_passengers"],
+		t_hover=g["sizing_mission"]["t_{hover}"],reserve_type=g["reserve_type"],
+		mission_type=g["sizing_mission"]["type"],loiter_type=c["loiter_type"],
+		tailRotor_power_fraction_hover=c["tailRotor_power_fraction_hover"],
+		tailRotor_power_fraction_levelFlight=c["tailRotor_power_fraction_levelFlight"])
+	SizingMission.substitutions.update({SizingMission.fs0.topvar("T/A"):c["T/A"]})
+
+	RevenueMission = OnDemandRevenueMission(Aircraft,mission_range=g["revenue_mission"]["range"],
+		V_cruise=c["V_{cruise}"],N_passengers=g["revenue_mission"]["N_passengers"],
+		t_hover=g["revenue_mission"]["t_{hover}"],charger_power=g["charger_power"],
+		mission_type=g["revenue_mission"]["type"],
+		tailRotor_power_fraction_hover=c["tailRotor_power_fraction_hover"],
+		tailRotor_power_fraction_levelFlight=c["tailRotor_power_fraction_levelFlight"])
+
+	DeadheadMission = OnDemandDeadheadMission(Aircraft,mission_range=g["deadhead_mission"]["range"],
+		V_cruise=c["V_{cruise}"],N_passengers=g["deadhead_mission"]["N_passengers"],
+		t_hover=g["deadhead_mission"]["t_{hover}"],charger_power=g["charger_power"],
+		mission_type=g["deadhead_mission"]["type"],
+		tailRotor_power_fraction_hover=c["tailRotor_power_fraction_hover"],
+		tailRotor_power_fraction_levelFlight=c["tailRotor_power_fraction_levelFlight"])
+
+	MissionCost = OnDemandMissionCost(Aircraft,RevenueMission,DeadheadMission,
+		pilot_wrap_rate=g["pilot_wrap_rate"],mechanic_wrap_rate=g["mechanic_wrap_rate"],
+		MMH_FH=g["MMH_FH"],deadhead_ratio=g["deadhead_ratio"])
+
+	return Model(MissionCost["cost_per_trip"],
+		[Aircraft, SizingMission, RevenueMission, DeadheadMission, MissionCost])
+
+def solution_outputs(solution,g=generic_data):
+	#Cost, weight and noise outputs of a solved problem (plain floats). Noise is computed for the
+	#first hover segment of the sizing mission, as in config_tradeStudy.
+	output = {}
+	output["cost_per_trip_per_passenger"] = float(solution("cost_per_trip_per_passenger"))
+	output["cost_per_trip"] = float(solution("cost_per_trip"))
+	output["MTOW (lbf)"] = solution("MTOW").to(ureg.lbf).magnitude
+	output["W_{battery} (lbf)"] = solution("W_OnDemandAircraft/Battery").to(ureg.lbf).magnitude
+
+	noise_inputs = {"T_perRotor":solution("T_perRotor_OnDemandSizingMission")[0],
+		"R":solution("R"),"VT":solution("VT_OnDemandSizingMission")[0],"s":solution("s"),
+		"Cl_mean":solution("Cl_{mean_{max}}"),"N":solution("N")}
+	for name, weighting in [("SPL (dB)","None"),("SPL_A (dBA)","A")]:
+		f_peak, SPL, spectrum = vortex_noise(B=g["B"],delta_S=g["delta_S"],h=0*ureg.ft,t_c=0.12,
+			St=0.28,weighting=weighting,**noise_inputs)
+		output[name] = float(SPL)
+	return output
+
+def apply_factors(c,g,factors):
+	#Copies of configuration and generic data with some values scaled by the given factors
+	#(name -> factor). Names are keys of either dict; configuration data take precedence.
+	c, g = dict(c), dict(g)
+	for name, factor in factors.items():
+		if name in c:
+			c[name] = c[name]*factor
+		elif name in g:
+			g[name] = g[name]*factor
+		else:
+			raise KeyError("Unknown input: %s" % name)
+	return c, g
+
+def apply_values(c,g,values):
+	#Copies of configuration and generic data with some values replaced (name -> value). Names
+	#are keys of either dict; nested generic data are addressed by path (e.g.
+	#"sizing_mission/range"). Configuration data take precedence.
+	c, g = dict(c), dict(g)
+	for name, value in values.items():
+		if name in c:
+			c[name] = value
+		elif "/" in name:
+			group, key = name.split("/",1)
+			g[group] = dict(g[group])
+			g[group][key] = value
+		elif name in g:
+			g[name] = value
+		else:
+			raise KeyError("Unknown input: %s" % name)
+	return c, g
+
+def solve_point_status(config,factors={},values={},g=generic_data,timeout=None):
+	#Solves one configuration (by name, from configuration_data) with scaled (factors) and
+	#replaced (values) inputs, in at most timeout seconds. Returns the status of the solve (one
+	#of sweep_tools.status_names) and solution_outputs() (None unless solved).
+	c, g = apply_factors(configuration_data[config],g,factors)
+	c, g = apply_values(c,g,values)
+	try:
+		with time_limit(timeout):
+			solution = build_problem(c,g).solve(verbosity=0)
+	except SolveTimeout:
+		return "timeout", None
+	except RuntimeWarning:
+		return "infeasible", None
+	except Exception:
+		return "error", None
+	return "solved", solution_outputs(solution,g)
+
+def solve_point(config,factors={},values={},g=generic_data,timeout=None):
+	#solution_outputs() of solve_point_status(), or None if the problem could not be solved
+	return solve_point_status(config,factors,values,g,timeout)[1]
+
+
+def test():
+	status, outputs = solve_point_status("Lift + cruise")
+	assert status == "solved"
+	assert set(outputs.keys()) == set(output_names)
+	assert abs(outputs["cost_per_trip_per_passenger"]*2/outputs["cost_per_trip"] - 1) < 1e-6
+
+	#Better batteries make a lighter, cheaper aircraft
+	better = solve_point("Lift + cruise",{"C_m":1.1})
+	assert better["MTOW (lbf)"] < outputs["MTOW (lbf)"]
+	assert better["cost_per_trip"] < outputs["cost_per_trip"]
+
+	#Points that are not solved in time (the limit expires while the problem is built)
+	assert solve_point_status("Lift + cruise",timeout=1e-3) == ("timeout",None)
+
+	c, g = apply_values(configuration_data["Lift + cruise"],generic_data,
+		{"L/D":12,"sizing_mission/range":60*ureg.nautical_mile})
+	assert c["L/D"] == 12 and g["sizing_mission"]["range"] == 60*ureg.nautical_mile
+	assert generic_data["sizing_mission"]["range"] == 50*ureg.nautical_mile
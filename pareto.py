@@ -0,0 +1,223 @@
+#Cost vs noise trade-off of each configuration of the on-demand problem (see on_demand_model.py),
+#by epsilon-constraint: cost_per_trip is minimized with the hover noise of every mission bounded,
+#for bounds between the two anchors of the frontier (least cost; least noise). The noise axis is
+#the rotational-noise monomial of RotorsAero (p_{ratio}, bounded by p_{ratio_max}), in dB; it is
+#not A-weighted. A-weighted SPL (vortex noise, as in solution_outputs) is only reported for each
+#solution. The points that are not dominated in (cost_per_trip, hover SPL) are returned. Design
+#inputs can be released to the optimizer within bounds (freedoms), e.g.
+#	freedoms = {"T/A":(5*ureg.lbf/ureg.ft**2,20*ureg.lbf/ureg.ft**2)}
+#Without freedoms, the noise of a configuration is nearly fixed by its inputs. Configurations are
+#solved across a worker pool; each is built once, and every point is a separate (cold) solve.
+
+import numpy as np
+from multiprocessing import Pool
+from gpkit import Variable, Model, ureg
+from gpkit.nomials import Monomial
+from study_input_data import generic_data, configuration_data
+from on_demand_model import build_problem, solution_outputs
+from doe import field_column
+
+def non_dominated(cost,noise):
+	#Whether each point is on the Pareto frontier (no other point has both lower or equal cost
+	#and noise, one of them strictly lower). Of identical points, only the first is kept; points
+	#with nan values are not.
+	cost, noise = np.asarray(cost,dtype=float), np.asarray(noise,dtype=float)
+	front = np.zeros(np.shape(cost),dtype=bool)
+	valid = np.nonzero(np.isfinite(cost) & np.isfinite(noise))[0]
+	order = valid[np.lexsort((noise[valid],cost[valid]))]
+	quietest = np.minimum.accumulate(np.concatenate([[np.inf],noise[order][:-1]]))
+	front[order] = noise[order] < quietest
+	return front
+
+def release(problem,freedoms):
+	#Substituted inputs of the problem released to the optimizer, within bounds (name -> (low,
+	#high), with units if any); returns the bounding constraints, and the released keys (name ->
+	#list)
+	constraints, released = [], {}
+	for name, (low, high) in freedoms.items():
+		keys = [key for key in problem.substitutions if key.name == name]
+		if not keys:
+			raise KeyError("Unknown input: %s" % name)
+		released[name] = keys
+		for key in keys:
+			del problem.substitutions[key]
+			constraints += [Monomial(key) >= low, Monomial(key) <= high]
+	return constraints, released
+
+def _hover_SPL(solution):
+	#Loudest hover segment of any mission, in the noise metric of the bound (dB)
+	p_ratio = [np.max(value) for key, value in solution["variables"].items() \
+		if key.name == "p_{ratio}"]
+	return 20*np.log10(float(max(p_ratio)))
+
+def _quantity(value):
+	#Plain (value, units) pairs are used between processes
+	return value if np.isscalar(value) else value[0]*ureg(value[1])
+
+def _solve(model):
+	#Default solver of frontier
+	return model.solve(verbosity=0)
+
+def frontier(config,freedoms={},N_points=8,g=generic_data,max_cost_ratio=10.,constraints=None,
+	solver=_solve):
+	#Solutions of one configuration along its frontier (column -> array), from the least-cost to
+	#the least-noise anchor (points that could not be solved are left out; if the least-noise anchor
+	#cannot be solved, only the least-cost anchor is returned), or None if the configuration could
+	#not be solved. Freedom values are given in the units of their lower bound. The least-noise
+	#anchor is searched among designs costing at most max_cost_ratio times the least cost (the
+	#noise is otherwise minimized at any cost). constraints, if given, is a function of the problem
+	#that returns additional constraints (e.g. a cost of quieter rotors, which the model lacks);
+	#solver solves each model.
+	problem = build_problem(configuration_data[config],g)
+	bounds, released = release(problem,freedoms)
+	if constraints is not None:
+		bounds += constraints(problem)
+	noise_keys = [key for key in problem.substitutions if key.name == "p_{ratio_max}"]
+	for key in noise_keys:
+		del problem.substitutions[key]
+	least_cost = Model(problem.cost,[problem,bounds])
+
+	columns = ["hover SPL (dB)"] + [field_column(name,low) for name,(low,high) in freedoms.items()]
+	rows = []
+	def solve(model,SPL_bound):
+		for key in noise_keys:
+			model.substitutions[key] = 10**(SPL_bound/20.)
+		try:
+			solution = solver(model)
+		except (RuntimeWarning,ValueError):
+			return None
+		row = solution_outputs(solution,g)
+		row["hover SPL (dB)"] = _hover_SPL(solution)
+		for name, (low, high) in freedoms.items():
+			value = solution(released[name][0])
+			row[field_column(name,low)] = value.to(low.units).magnitude if hasattr(low,"units") \
+				else float(value)
+		rows.append(row)
+		return solution
+
+	#Anchors. The least-noise anchor minimizes the noise bound itself; its cost is not minimized,
+	#so the last point of the sweep re-solves for least cost at (just above) that bound.
+	solution = solve(least_cost,150.)
+	if solution is None:
+		return None
+	SPL_max = _hover_SPL(solution)
+	p_max = Variable("p_{ratio_{bound}}","-","Bound on hover sound pressure ratio")
+	least_noise = Model(p_max,[problem,bounds,[Monomial(key) <= p_max for key in noise_keys],
+		problem.cost <= max_cost_ratio*solution["cost"]])
+	try:
+		SPL_min = 20*np.log10(float(solver(least_noise)(p_max)))
+	except (RuntimeWarning,ValueError):
+		SPL_min = SPL_max
+
+	if SPL_max - SPL_min > 0.01:
+		for SPL_bound in np.linspace(SPL_max,SPL_min + 1e-3,N_points)[1:]:
+			solve(least_cost,SPL_bound)
+
+	output_columns = columns + [name for name in rows[0] if name not in columns]
+	return dict((name,np.array([row[name] for row in rows])) for name in output_columns)
+
+def _frontier_task(args):
+	config, freedoms, N_points, constraints = args
+	freedoms = dict((name,(_quantity(low),_quantity(high))) for name,(low,high) in freedoms.items())
+	return frontier(config,freedoms,N_points,constraints=constraints)
+
+def pareto_fronts(configs,freedoms={},N_points=8,processes=None,constraints=None):
+	#Non-dominated (cost_per_trip, hover SPL) solutions of each configuration (name -> column ->
+	#array, sorted by cost), or None for configurations that could not be solved. constraints is
+	#passed to frontier (a module-level function, so that it can be sent to the workers).
+	plain = lambda q: (q.magnitude,str(q.units)) if hasattr(q,"units") else q
+	freedoms = dict((name,(plain(low),plain(high))) for name,(low,high) in freedoms.items())
+	tasks = [(config,freedoms,N_points,constraints) for config in configs]
+	pool = Pool(processes=processes)
+	try:
+		results = pool.map(_frontier_task,tasks,chunksize=1)
+		pool.close()
+	except:
+		pool.terminate()
+		raise
+	finally:
+		pool.join()
+
+	fronts = {}
+	for config, points in zip(configs,results):
+		if points is None:
+			fronts[config] = None
+			continue
+		front = non_dominated(points["cost_per_trip"],points["hover SPL (dB)"])
+		order = np.argsort(points["cost_per_trip"][front])
+		fronts[config] = dict((name,values[front][order]) for name,values in points.items())
+	return fronts
+
+def _solidity_cost(problem):
+	#Cost that grows with rotor solidity (a stand-in for the rotor weight model, not implemented
+	#yet), so that quieter rotors are more expensive
+	return [2600*Monomial(key)**2 <= problem.cost for key in problem.varkeys if key.name == "s"]
+
+def _no_least_noise(model):
+	#Solver for which the least-noise anchor cannot be solved
+	if any(key.name == "p_{ratio_{bound}}" for key in model.cost.varkeys):
+		raise RuntimeWarning("Least-noise anchor not solved")
+	return _solve(model)
+
+
+def test():
+	cost = np.array([3.,1.,2.,2.,4.,np.nan,1.])
+	noise = np.array([1.,3.,2.,2.5,1.,0.,3.])
+	assert list(non_dominated(cost,noise)) == [True,True,True,False,False,False,False]
+
+	#Without a cost of quieter rotors in the model, a larger disk is both cheaper and quieter:
+	#the frontier collapses to the released disk loading's lower bound
+	freedoms = {"T/A":(10*ureg.lbf/ureg.ft**2,15*ureg.lbf/ureg.ft**2)}
+	front = pareto_fronts(["Tilt rotor"],freedoms,processes=1)["Tilt rotor"]
+	assert len(front["cost_per_trip"]) == 1
+	assert abs(front["T/A (lbf / ft ** 2)"][0]/10. - 1) < 1e-3
+
+	#With a cost of solidity, higher solidity is quieter but more expensive: every point of the
+	#sweep is on the frontier, from the least-cost to the least-noise anchor
+	freedoms_s = {"s":(0.05,0.3)}
+	front = pareto_fronts(["Tilt rotor"],freedoms_s,N_points=4,processes=1,
+		constraints=_solidity_cost)["Tilt rotor"]
+	assert len(front["cost_per_trip"]) == 4
+	assert np.all(np.diff(front["cost_per_trip"]) > 0)
+	assert np.all(np.diff(front["hover SPL (dB)"]) < 0)
+	assert np.all(np.diff(front["s"]) > 0)
+	assert abs(front["s"][-1]/0.3 - 1) < 1e-3
+
+	#Least-noise anchor that cannot be solved: the least-cost anchor is kept
+	points = frontier("Tilt rotor",freedoms,solver=_no_least_noise)
+	assert len(points["cost_per_trip"]) == 1
+	assert abs(points["T/A (lbf / ft ** 2)"][0]/10. - 1) < 1e-3
+
+
+if __name__=="__main__":
+
+	#Frontier of each configuration with disk loading and solidity released, and the designs that
+	#are not dominated by any other configuration's. Without a cost of quieter rotors in the model,
+	#each frontier collapses to one design (see test).
+	configs = configuration_data.copy()
+	del configs["Tilt duct"]
+	del configs["Multirotor"]
+	configs = list(configs.keys())
+	freedoms = {"T/A":(5*ureg.lbf/ureg.ft**2,20*ureg.lbf/ureg.ft**2),"s":(0.05,0.15)}
+	fronts = pareto_fronts(configs,freedoms)
+
+	solved = [config for config in configs if fronts[config] is not None]
+	cost = np.concatenate([fronts[config]["cost_per_trip"] for config in solved])
+	SPL = np.concatenate([fronts[config]["hover SPL (dB)"] for config in solved])
+	names = np.concatenate([[config]*len(fronts[config]["cost_per_trip"]) for config in solved])
+	overall = non_dominated(cost,SPL)
+
+	print
+	print "Configuration\tcost_per_trip\thover SPL (dB)\tSPL_A (dBA)\tT/A (lbf/ft^2)\ts\t" \
+		+ "Non-dominated overall"
+	i = 0
+	for config in configs:
+		if fronts[config] is None:
+			print "%s\t(could not be solved)" % config
+			continue
+		front = fronts[config]
+		for j in range(len(front["cost_per_trip"])):
+			print "%s\t%0.2f\t\t%0.1f\t\t%0.1f\t\t%0.1f\t\t%0.3f\t%s" % (config,
+				front["cost_per_trip"][j],front["hover SPL (dB)"][j],front["SPL_A (dBA)"][j],
+				front["T/A (lbf / ft ** 2)"][j],front["s"][j],"yes" if overall[i] else "")
+			i += 1
@@ -0,0 +1,94 @@
+#Least-squares calibration of the rotor-model parameters (ki, Cd0) against hover test data.
+#Uses the closed-form relations of RotorsAero (CPi = 0.5*CT^1.5; CPp = 0.25*s*Cd0;
+#CP = ki*CPi + CPp), which are linear in ki and Cd0; no GP solves are needed.
+
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.abspath(__file__)) + '/..')
+
+import numpy as np
+from rotor_test_data import test_data
+
+def rotor_coefficients(CT,ki,Cd0,s):
+	#CP and FOM from the rotor model. Inputs are broadcast against each other.
+	CPi = 0.5*CT**1.5
+	CP = ki*CPi + 0.25*s*Cd0
+	return CP, CPi/CP
+
+def calibrate_rotor_model(test_data=test_data,use_FOM=True,fit_solidity=False,Cd0=0.01):
+	#Fits ki and Cd0 to the test data (CT, CP, and optionally FOM arrays). Residuals are
+	#relative, so that low-thrust points count as much as high-thrust ones.
+	#With fit_solidity, Cd0 is held at the given value and a solidity correction factor
+	#(s_eff = s_factor*s) is fitted instead. Solidity only enters the model through the
+	#product s*Cd0, so the two cannot be fitted together.
+
+	s = test_data["s"]
+	CT = test_data["CT"]
+	CP = test_data["CP"]
+	if use_FOM:
+		#Each FOM measurement is also a measurement of CP
+		CT = np.concatenate([CT,test_data["CT"]])
+		CP = np.concatenate([CP,0.5*(test_data["CT"]**1.5)/test_data["FOM"]])
+
+	A = np.stack([0.5*CT**1.5,0.25*s*np.ones(np.size(CT))],axis=-1)/CP[:,np.newaxis]
+	x = np.linalg.lstsq(A,np.ones(np.size(CT)),rcond=None)[0]
+
+	fit = {"ki":x[0],"s":s}
+	if fit_solidity:
+		fit["Cd0"] = Cd0
+		fit["s_factor"] = x[1]/Cd0
+	else:
+		fit["Cd0"] = x[1]
+		fit["s_factor"] = 1.
+
+	CP_model, FOM_model = rotor_coefficients(test_data["CT"],fit["ki"],fit["Cd0"],
+		fit["s_factor"]*s)
+	fit["CP_RMS_error"] = np.sqrt(np.mean((CP_model/test_data["CP"] - 1)**2))
+	fit["FOM_RMS_error"] = np.sqrt(np.mean((FOM_model - test_data["FOM"])**2))
+	return fit
+
+def calibration_error_map(ki,Cd0,test_data=test_data):
+	#RMS relative CP error over a (ki, Cd0) grid, evaluated in one vectorized call
+	ki, Cd0 = np.meshgrid(ki,Cd0,indexing="ij")
+	CP, FOM = rotor_coefficients(test_data["CT"],ki[...,np.newaxis],Cd0[...,np.newaxis],
+		test_data["s"])
+	return np.sqrt(np.mean((CP/test_data["CP"] - 1)**2,axis=-1))
+
+
+def test():
+	#Parameters used to generate synthetic data must be recovered exactly
+	CT = np.linspace(0.002,0.02,20)
+	CP, FOM = rotor_coefficients(CT,1.17,0.011,0.1)
+	synthetic_data = {"s":0.1,"CT":CT,"CP":CP,"FOM":FOM}
+
+	fit = calibrate_rotor_model(synthetic_data)
+	assert abs(fit["ki"] - 1.17) < 1e-8
+	assert abs(fit["Cd0"] - 0.011) < 1e-8
+
+	fit = calibrate_rotor_model(synthetic_data,fit_solidity=True,Cd0=0.01)
+	assert abs(fit["s_factor"] - 1.1) < 1e-8
+
+	#Fit to the test data must be physical, and at least as good as any point on a grid
+	fit = calibrate_rotor_model(use_FOM=False)
+	assert 1 < fit["ki"] < 1.5
+	assert 0 < fit["Cd0"] < 0.05
+
+	errors = calibration_error_map(np.linspace(1.05,1.3,26),np.linspace(0.005,0.015,21))
+	assert fit["CP_RMS_error"] <= np.min(errors) + 1e-12
+
+
+if __name__=="__main__":
+
+	for use_FOM in [False,True]:
+		fit = calibrate_rotor_model(use_FOM=use_FOM)
+		print
+		print "Calibration against %s data (s = %0.3f)" % ("CP and FOM" if use_FOM else "CP",
+			fit["s"])
+		print "ki = %0.3f; Cd0 = %0.4f" % (fit["ki"],fit["Cd0"])
+		print "RMS CP error = %0.1f%%; RMS FOM error = %0.3f" % (100*fit["CP_RMS_error"],
+			fit["FOM_RMS_error"])
+
+	fit = calibrate_rotor_model(fit_solidity=True,Cd0=0.01)
+	print
+	print "Calibration with solidity correction (Cd0 = %0.3f)" % fit["Cd0"]
+	print "ki = %0.3f; s_eff/s = %0.3f" % (fit["ki"],fit["s_factor"])
@@ -0,0 +1,22 @@
+#Rotor test data, from Leishman textbook
+
+import numpy as np
+from gpkit import ureg
+
+test_data = {}
+
+test_data["N"] = 1
+test_data["s"] = 0.098
+test_data["R"] = 32.5*ureg.inch
+
+test_data["CT_oldConvention"] = np.array([0.0019, 0.0026, 0.0027, 0.0033, 0.0041, 0.0042,\
+	0.005, 0.0051, 0.0061, 0.0062, 0.0065, 0.0067, 0.0072, 0.0073, 0.0078, 0.008, 0.0083,\
+	0.0084, 0.0088])
+test_data["FOM"] = np.array([0.31, 0.42, 0.45, 0.51, 0.57, 0.59, 0.63, 0.64, 0.66, 0.69,\
+	0.67, 0.68, 0.7, 0.7, 0.7, 0.71, 0.7, 0.71, 0.71])
+test_data["CP_oldConvention"] = np.array([0.00019, 0.00022, 0.00022, 0.00026, 0.00032,\
+	0.00032, 0.00039, 0.0004, 0.0005, 0.00049, 0.00055, 0.00056, 0.00063, 0.00063, 0.0007,\
+	0.00071, 0.00077, 0.00076, 0.00082])
+
+test_data["CT"] = 2*test_data["CT_oldConvention"]
+test_data["CP"] = 2*test_data["CP_oldConvention"]
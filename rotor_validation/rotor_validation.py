@@ -5,30 +5,10 @@ import sys
 sys.path.append(os.path.abspath(os.path.dirname(__file__) + '/..'))
 
 import numpy as np
-from gpkit import Variable, Model, Vectorize, ureg
+from gpkit import ureg
 from matplotlib import pyplot as plt
-from aircraft_models import Rotors, FlightState, RotorsAero
-
-#Test data, from Leishman textbook
-
-test_data = {}
-
-test_data["N"] = 1
-test_data["s"] = 0.098
-test_data["R"] = 32.5*ureg.inch
-
-test_data["CT_oldConvention"] = np.array([0.0019, 0.0026, 0.0027, 0.0033, 0.0041, 0.0042,\
-	0.005, 0.0051, 0.0061, 0.0062, 0.0065, 0.0067, 0.0072, 0.0073, 0.0078, 0.008, 0.0083,\
-	0.0084, 0.0088])
-test_data["FOM"] = np.array([0.31, 0.42, 0.45, 0.51, 0.57, 0.59, 0.63, 0.64, 0.66, 0.69,\
-	0.67, 0.68, 0.7, 0.7, 0.7, 0.71, 0.7, 0.71, 0.71])
-test_data["CP_oldConvention"] = np.array([0.00019, 0.00022, 0.00022, 0.00026, 0.00032,\
-	0.00032, 0.00039, 0.0004, 0.0005, 0.00049, 0.00055, 0.00056, 0.00063, 0.00063, 0.0007,\
-	0.00071, 0.00077, 0.00076, 0.00082])
-
-test_data["CT"] = 2*test_data["CT_oldConvention"]
-test_data["CP"] = 2*test_data["CP_oldConvention"]
-
+from rotor_test_data import test_data
+from rotor_validation_sweep import rotor_validation_sweep
 
 #Data from GPKit analysis
 gp_model_data = {}
@@ -41,26 +21,11 @@ gp_model_data["s"] = test_data["s"]
 gp_model_data["R"] = test_data["R"]
 
 gp_model_data["CT"] = np.linspace(0.002,0.02,16)
-gp_model_data["FOM"] = np.zeros([np.size(gp_model_data["CT"]),np.size(gp_model_data["ki"])])
-gp_model_data["CP"] = np.zeros([np.size(gp_model_data["CT"]),np.size(gp_model_data["ki"])])
-
-gp_model_Rotor = Rotors(N=gp_model_data["N"],s=gp_model_data["s"])
-gp_model_Rotor.substitutions.update({"R":gp_model_data["R"]})
-
-gp_model_State = FlightState(h=0*ureg.ft)
-
-for i,CT in enumerate(gp_model_data["CT"]):
-	for j,ki in enumerate(gp_model_data["ki"]):
-		gp_model_Rotor_AeroAnalysis = gp_model_Rotor.performance(gp_model_State,
-			ki=ki,Cd0=gp_model_data["Cd0"])
-		gp_model_Rotor_AeroAnalysis.substitutions.update({"CT":CT})
-		gp_model_Rotor_AeroAnalysis.substitutions.update({"VT":20*ureg.ft/ureg.s})
-		gp_model_Model = Model(gp_model_Rotor_AeroAnalysis["P"],\
-			[gp_model_Rotor,gp_model_Rotor_AeroAnalysis,gp_model_State])
-		gp_model_Solution = gp_model_Model.solve(verbosity=0)
-
-		gp_model_data["FOM"][i,j] = gp_model_Solution("FOM")
-		gp_model_data["CP"][i,j] = gp_model_Solution("CP")
+
+sweep_data = rotor_validation_sweep(gp_model_data["CT"],gp_model_data["ki"],
+	gp_model_data["Cd0"],s=gp_model_data["s"],R=gp_model_data["R"],N=gp_model_data["N"])
+gp_model_data["FOM"] = sweep_data["FOM"][:,:,0]
+gp_model_data["CP"] = sweep_data["CP"][:,:,0]
 
 
 #Plotting commands
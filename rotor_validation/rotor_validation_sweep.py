@@ -0,0 +1,74 @@
+#Batched evaluation of the GP rotor model over a grid of CT, ki, and Cd0. The whole grid is
+#solved as one vectorized model (split into chunks for very large grids; chunks can be solved
+#in parallel).
+
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.abspath(__file__)) + '/..')
+
+import numpy as np
+from multiprocessing import Pool
+from gpkit import Model, Vectorize, ureg
+from aircraft_models import Rotors, FlightState
+from rotor_test_data import test_data
+
+def rotor_validation_sweep(CT,ki,Cd0,s=test_data["s"],R=test_data["R"],N=test_data["N"],
+	VT=20*ureg.ft/ureg.s,chunk_size=1000,processes=1):
+	#Returns CP and FOM arrays of shape (len(CT),len(ki),len(Cd0)). The coefficients do not
+	#depend on VT; it only needs to be low enough for the tip-Mach and noise constraints.
+
+	CT, ki, Cd0 = np.atleast_1d(CT,ki,Cd0)
+	grid = np.meshgrid(CT,ki,Cd0,indexing="ij")
+	points = np.stack([g.ravel() for g in grid],axis=-1)
+
+	chunks = [(points[i:i+chunk_size],s,R,N,VT) for i in range(0,len(points),chunk_size)]
+
+	if processes == 1:
+		results = map(_solve_chunk,chunks)
+	else:
+		pool = Pool(processes=processes)
+		results = pool.map(_solve_chunk,chunks)
+		pool.close()
+		pool.join()
+
+	results = np.concatenate(results)
+
+	data = {"CT":CT,"ki":ki,"Cd0":Cd0,"s":s}
+	data["CP"] = results[:,0].reshape(np.shape(grid[0]))
+	data["FOM"] = results[:,1].reshape(np.shape(grid[0]))
+	return data
+
+def _solve_chunk(args):
+	#One vectorized solve; columns of points are CT, ki, Cd0
+	points, s, R, N, VT = args
+	num_points = np.shape(points)[0]
+
+	rotor = Rotors(N=N,s=s)
+	rotor.substitutions.update({"R":R})
+	state = FlightState(h=0*ureg.ft)
+
+	with Vectorize(num_points):
+		rotor_AeroAnalysis = rotor.performance(state)
+
+	rotor_AeroAnalysis.substitutions.update({rotor_AeroAnalysis["CT"]:points[:,0],
+		rotor_AeroAnalysis["ki"]:points[:,1],rotor_AeroAnalysis["Cd0"]:points[:,2],
+		rotor_AeroAnalysis["VT"]:VT.to(ureg.ft/ureg.s).magnitude*np.ones(num_points)})
+
+	model = Model(rotor_AeroAnalysis["P"].sum(),[rotor,rotor_AeroAnalysis])
+	solution = model.solve(verbosity=0)
+
+	CP = solution("CP_RotorsAero").magnitude
+	FOM = solution("FOM_RotorsAero").magnitude
+	return np.stack([CP,FOM],axis=-1)
+
+
+def test():
+	#Batched solve must match the closed-form rotor relations, point by point
+	data = rotor_validation_sweep(np.linspace(0.002,0.02,5),[1.1,1.2],[0.008,0.01,0.012],
+		chunk_size=12)
+	CT, ki, Cd0 = np.meshgrid(data["CT"],data["ki"],data["Cd0"],indexing="ij")
+
+	CPi = 0.5*CT**1.5
+	CP = ki*CPi + 0.25*data["s"]*Cd0
+	assert np.all(np.abs(data["CP"]/CP - 1) < 1e-4)
+	assert np.all(np.abs(data["FOM"]/(CPi/CP) - 1) < 1e-4)
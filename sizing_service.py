@@ -0,0 +1,185 @@
+#Local HTTP service for the on-demand problem (see on_demand_model.py). A configuration, with
+#replaced (values) and scaled (factors) inputs, is POSTed as JSON to /size, e.g.
+#	curl -d '{"configuration":"Tilt rotor","values":{"sizing_mission/range":[60,"nautical_mile"],
+#		"L/D":12},"factors":{"C_m":1.1}}' http://localhost:8000/size
+#Inputs with units are given as [value, units]. The response holds solution_outputs() (MTOW,
+#costs and noise), or an error. Problems are solved by a pool of worker processes, forked once
+#the models are imported; concurrent identical requests share one solve, and solutions are
+#cached, so that repeated requests are answered without solving. Each solve is given at most
+#timeout seconds; problems that are not solved in time are not cached.
+#Requests with different inputs are solved separately: one GP holding several problems takes
+#cvxopt longer than the separate GPs (about 27 s for two Tilt rotor problems, vs. 11 s), and the
+#model cannot be vectorized with Vectorize (its variables are given values with units).
+
+import json
+import threading
+from multiprocessing import TimeoutError
+from collections import OrderedDict
+from multiprocessing import Pool
+from BaseHTTPServer import HTTPServer, BaseHTTPRequestHandler
+from SocketServer import ThreadingMixIn
+from gpkit import ureg
+from study_input_data import configuration_data
+from on_demand_model import solve_point, solve_point_status
+
+def request_key(request):
+	#Canonical form of a request, used as its cache key
+	if request.get("configuration") not in configuration_data:
+		raise KeyError("Unknown configuration: %s" % request.get("configuration"))
+	unknown = set(request) - set(["configuration","values","factors"])
+	if unknown:
+		raise KeyError("Unknown field: %s" % ", ".join(sorted(unknown)))
+	return json.dumps({"configuration":request["configuration"],
+		"values":request.get("values",{}),"factors":request.get("factors",{})},sort_keys=True)
+
+def _solve_request(args):
+	#Outputs of one request, or an error for invalid inputs (e.g. unknown names or units) or
+	#problems that are not solved (with the status of the solve)
+	key, timeout = args
+	request = json.loads(key)
+	try:
+		values = dict((str(name),value[0]*ureg(value[1]) if isinstance(value,list) else value) \
+			for name, value in request["values"].items())
+		factors = dict((str(name),factor) for name, factor in request["factors"].items())
+		status, outputs = solve_point_status(str(request["configuration"]),factors,values,
+			timeout=timeout)
+		if status != "solved":
+			return {"error":"The problem could not be solved (%s)" % status,"status":status}
+		return {"outputs":outputs}
+	except KeyError as e:
+		return {"error":e.args[0]}
+	except Exception as e:
+		return {"error":"%s: %s" % (type(e).__name__,e)}
+
+class SizingService(object):
+	#Worker pool and solution cache (the max_cache most recent requests). A solve that does not
+	#return within timeout seconds, plus a margin (its worker is stuck in compiled code), is
+	#answered with an error; its worker is not recovered.
+	def __init__(self,processes=None,max_cache=10000,timeout=300.):
+		self.pool = Pool(processes=processes)
+		self.max_cache = max_cache
+		self.timeout = timeout
+		self.cache = OrderedDict()
+		self.pending = {}
+		self.lock = threading.Lock()
+
+	def size(self,request):
+		#Response to one request; "cached" marks responses that did not need a solve
+		key = request_key(request)
+		with self.lock:
+			if key in self.cache:
+				response = self.cache.pop(key)
+				self.cache[key] = response
+				return dict(response,cached=True)
+			if key not in self.pending:
+				self.pending[key] = self.pool.apply_async(_solve_request,((key,self.timeout),))
+			result = self.pending[key]
+
+		try:
+			response = result.get(None if self.timeout is None else self.timeout + 60.)
+		except TimeoutError:
+			response = {"error":"The problem could not be solved (timeout)","status":"timeout"}
+		finally:
+			with self.lock:
+				self.pending.pop(key,None)
+		if response.get("status") != "timeout":
+			with self.lock:
+				self.cache[key] = response
+				while len(self.cache) > self.max_cache:
+					self.cache.popitem(last=False)
+		return dict(response,cached=False)
+
+	def close(self):
+		self.pool.terminate()
+		self.pool.join()
+
+class _RequestHandler(BaseHTTPRequestHandler):
+	def do_POST(self):
+		if self.path != "/size":
+			return self._reply(404,{"error":"Unknown path: %s" % self.path})
+		try:
+			request = json.loads(self.rfile.read(int(self.headers.getheader("Content-Length",0))))
+			request_key(request)
+		except (ValueError,KeyError,AttributeError) as e:
+			return self._reply(400,{"error":str(e.args[0]) if e.args else "Invalid request"})
+		response = self.server.service.size(request)
+		self._reply(200 if "outputs" in response else 422,response)
+
+	def _reply(self,status,response):
+		body = json.dumps(response)
+		self.send_response(status)
+		self.send_header("Content-Type","application/json")
+		self.send_header("Content-Length",str(len(body)))
+		self.end_headers()
+		self.wfile.write(body)
+
+	def log_message(self,format,*args):
+		if self.server.verbose:
+			BaseHTTPRequestHandler.log_message(self,format,*args)
+
+class _ThreadedHTTPServer(ThreadingMixIn,HTTPServer):
+	daemon_threads = True
+
+def make_server(port=8000,processes=None,max_cache=10000,timeout=300.,verbose=True):
+	#Server on localhost (port 0: any free port, see server.server_port); serve with
+	#server.serve_forever(), stop with server.shutdown() and server.service.close()
+	service = SizingService(processes,max_cache,timeout)
+	server = _ThreadedHTTPServer(("127.0.0.1",port),_RequestHandler)
+	server.service = service
+	server.verbose = verbose
+	return server
+
+
+def test():
+	import urllib2
+
+	server = make_server(port=0,processes=1,verbose=False)
+	thread = threading.Thread(target=server.serve_forever)
+	thread.daemon = True
+	thread.start()
+	url = "http://127.0.0.1:%d/size" % server.server_port
+
+	def post(request):
+		try:
+			reply = urllib2.urlopen(url,json.dumps(request))
+			return reply.getcode(), json.loads(reply.read())
+		except urllib2.HTTPError as e:
+			return e.code, json.loads(e.read())
+
+	try:
+		request = {"configuration":"Tilt rotor","values":{"sizing_mission/range":[60,"nautical_mile"]}}
+		status, response = post(request)
+		assert status == 200 and not response["cached"]
+		exact = solve_point("Tilt rotor",values={"sizing_mission/range":60*ureg.nautical_mile})
+		assert response["outputs"] == exact
+
+		status, response = post(request)
+		assert status == 200 and response["cached"] and response["outputs"] == exact
+
+		assert post({"configuration":"Zeppelin"})[0] == 400
+		assert post({"configuration":"Tilt rotor","values":{"range":1}})[0] == 422
+		assert post({"configuration":"Tilt rotor","values":{"L/D":[12,"furlongs"]}})[0] == 422
+
+		#Problems not solved in time are answered with an error, and not cached
+		server.service.timeout = 1e-3
+		request = {"configuration":"Tilt rotor","factors":{"C_m":1.1}}
+		assert post(request) == (422,{"error":"The problem could not be solved (timeout)",
+			"status":"timeout","cached":False})
+		assert not post(request)[1]["cached"]
+	finally:
+		server.shutdown()
+		server.service.close()
+
+
+if __name__=="__main__":
+
+	import sys
+	port = int(sys.argv[1]) if len(sys.argv) > 1 else 8000
+	server = make_server(port)
+	print "Serving on http://127.0.0.1:%d/size" % port
+	try:
+		server.serve_forever()
+	except KeyboardInterrupt:
+		pass
+	finally:
+		server.service.close()
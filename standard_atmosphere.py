@@ -7,9 +7,11 @@ from gpkit import ureg
 import os
 import sys
 
+#resolved at import time, so that later changes of working directory do not matter
+data_file_path = os.path.abspath(os.path.dirname(__file__)) + "/stdatmo_table.txt"
+
 def stdatmo(h):
 	
-	data_file_path = os.path.abspath(os.path.dirname(__file__)) + "/stdatmo_table.txt"
 	data_from_file = np.loadtxt(data_file_path,skiprows=2)
 
 	#units set manually to those in the lookup table
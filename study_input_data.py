@@ -155,3 +155,14 @@ configuration_data["Coaxial heli"] = deepcopy(configs_OutOfOrder["Coaxial heli"]
 configuration_data["Multirotor"] = deepcopy(configs_OutOfOrder["Multirotor"])
 configuration_data["Autogyro"] = deepcopy(configs_OutOfOrder["Autogyro"])
 configuration_data["Tilt duct"] = deepcopy(configs_OutOfOrder["Tilt duct"])
+
+
+#Uncertain assumptions (for Monte Carlo studies), as multiplicative factors on the point values
+#above. Names are keys of generic_data or of the configuration data.
+uncertainty_data = OrderedDict()
+uncertainty_data["C_m"] = {"distribution":"triangular","min":0.85,"mode":1.,"max":1.15}
+uncertainty_data["L/D"] = {"distribution":"triangular","min":0.85,"mode":1.,"max":1.1}
+uncertainty_data["weight_fraction"] = {"distribution":"triangular","min":0.9,"mode":1.,"max":1.15}
+uncertainty_data["pilot_wrap_rate"] = {"distribution":"triangular","min":0.8,"mode":1.,"max":1.3}
+uncertainty_data["mechanic_wrap_rate"] = {"distribution":"triangular","min":0.8,"mode":1.,"max":1.3}
+uncertainty_data["battery_cost_per_C"] = {"distribution":"triangular","min":0.5,"mode":1.,"max":1.5}
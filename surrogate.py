@@ -0,0 +1,178 @@
+#Surrogate models of the on-demand problem (see on_demand_model.py), for queries that cannot wait
+#for a GP solve. Each output is fitted, per configuration, to a polynomial in the log of the
+#inputs (log-space polynomials are exact for monomials and close to the posynomial structure of
+#the model), by least squares on sweep data (e.g. from doe.run_doe). Error is estimated on
+#held-out points; queries can fall back to an exact solve when the surrogate is not accurate
+#enough, or outside its training data.
+
+import itertools
+import numpy as np
+from on_demand_model import solve_point
+from doe import field_value
+
+def _features(surrogate,X):
+	#Polynomial features (N x terms) of inputs X (column -> array), scaled to [-1, 1]
+	x = []
+	for column, log, (low, high) in zip(surrogate["inputs"],surrogate["log"],surrogate["bounds"]):
+		values = np.asarray(X[column],dtype=float)
+		if log:
+			values, low, high = np.log(values), np.log(low), np.log(high)
+		x += [(2*values - (low + high))/max(high - low,1e-300)]
+	x = np.array(x)
+	return np.array([np.prod(x[list(term)],axis=0) for term in surrogate["terms"]]).T
+
+def fit_surrogate(table,config,inputs,outputs=["cost_per_trip","cost_per_trip_per_passenger",
+	"MTOW (lbf)"],degree=2,holdout=0.2,seed=0):
+	#Fits the outputs of one configuration to the inputs (table columns). A fraction (holdout) of
+	#the solved points is kept out of the fit, to estimate the error. Inputs (and outputs) that
+	#are positive are fitted in log space.
+	rows = table["configuration"] == config
+	for output in outputs:
+		rows = rows & np.isfinite(table[output])
+	X = dict((column,table[column][rows]) for column in inputs)
+	Y = dict((output,table[output][rows]) for output in outputs)
+	N = np.sum(rows)
+
+	surrogate = {"config":config,"inputs":list(inputs),"outputs":list(outputs),"degree":degree}
+	surrogate["log"] = [bool(np.all(X[column] > 0)) for column in inputs]
+	surrogate["log_outputs"] = [bool(np.all(Y[output] > 0)) for output in outputs]
+	surrogate["bounds"] = [(np.min(X[column]),np.max(X[column])) for column in inputs]
+	surrogate["terms"] = [term for d in range(degree+1) \
+		for term in itertools.combinations_with_replacement(range(len(inputs)),d)]
+
+	random = np.random.RandomState(seed)
+	test = np.zeros(N,dtype=bool)
+	test[random.permutation(N)[:int(round(holdout*N))]] = True
+	if N - np.sum(test) < len(surrogate["terms"]):
+		raise ValueError("%d training points for %d terms; more sweep data is needed" \
+			% (N - np.sum(test),len(surrogate["terms"])))
+
+	A = _features(surrogate,X)
+	Y = np.array([np.log(Y[o]) if log else Y[o] for o,log in zip(outputs,surrogate["log_outputs"])]).T
+	surrogate["coefficients"] = np.linalg.lstsq(A[~test],Y[~test],rcond=None)[0]
+	surrogate["N_train"] = N - np.sum(test)
+
+	surrogate["error"] = {}
+	if np.any(test):
+		X_test = dict((column,X[column][test]) for column in inputs)
+		Y_test = dict((output,table[output][rows][test]) for output in outputs)
+		surrogate["error"] = validation_report(surrogate,X_test,Y_test)
+	return surrogate
+
+def evaluate_surrogate(surrogate,X):
+	#Outputs (output -> array) at inputs X (column -> array, in the units of the table columns)
+	Y = np.dot(_features(surrogate,X),surrogate["coefficients"])
+	return dict((output,np.exp(Y[:,i]) if log else Y[:,i]) \
+		for i,(output,log) in enumerate(zip(surrogate["outputs"],surrogate["log_outputs"])))
+
+def validation_report(surrogate,X,Y):
+	#Relative error (RMS and maximum) of each output, against exact outputs Y at inputs X
+	prediction = evaluate_surrogate(surrogate,X)
+	report = {}
+	for output in surrogate["outputs"]:
+		error = prediction[output]/np.asarray(Y[output]) - 1
+		error = error[np.isfinite(error)]
+		report[output] = {"rms":np.sqrt(np.mean(error**2)),"max":np.max(np.abs(error)),
+			"N":np.size(error)}
+	return report
+
+def in_bounds(surrogate,X):
+	#Whether each query lies within the range of the training data
+	inside = True
+	for column, (low, high) in zip(surrogate["inputs"],surrogate["bounds"]):
+		values = np.asarray(X[column],dtype=float)
+		inside = inside & (values >= low) & (values <= high)
+	return np.broadcast_to(inside,np.shape(np.asarray(X[surrogate["inputs"][0]])))
+
+def predict(surrogate,X,tolerance=None):
+	#Drop-in replacement for exact solutions: outputs at inputs X, from the surrogate. With a
+	#tolerance (relative), queries are solved exactly (solve_point) if the surrogate's held-out
+	#maximum error exceeds the tolerance, or if they lie outside the training data. The "exact"
+	#entry marks the queries that were solved; queries that could not be solved are nan.
+	output = evaluate_surrogate(surrogate,X)
+	exact = np.zeros(np.shape(output[surrogate["outputs"][0]]),dtype=bool)
+	if tolerance is not None:
+		error = max([surrogate["error"][o]["max"] if surrogate["error"] else np.inf \
+			for o in surrogate["outputs"]])
+		exact = ~in_bounds(surrogate,X) if error <= tolerance else ~exact
+		for i in np.nonzero(exact)[0]:
+			values = dict(field_value(column,float(np.asarray(X[column])[i])) \
+				for column in surrogate["inputs"])
+			solution = solve_point(surrogate["config"],values=values)
+			for name in surrogate["outputs"]:
+				output[name][i] = np.nan if solution is None else solution[name]
+	output["exact"] = exact
+	return output
+
+
+def test():
+	#Exact for a monomial in the inputs
+	random = np.random.RandomState(0)
+	C_m = random.uniform(400,500,size=40)
+	L_D = random.uniform(12,15,size=40)
+	table = {"configuration":np.array(["Tilt rotor"]*40),"C_m (Wh / kg)":C_m,"L/D":L_D,
+		"MTOW (lbf)":3000*(C_m/450.)**-0.8*(L_D/14.)**-0.3,"cost_per_trip":60*(C_m/450.)**-0.5}
+	surrogate = fit_surrogate(table,"Tilt rotor",["C_m (Wh / kg)","L/D"],
+		outputs=["MTOW (lbf)","cost_per_trip"],degree=2)
+	assert surrogate["error"]["MTOW (lbf)"]["max"] < 1e-10
+	X = {"C_m (Wh / kg)":np.array([420.,480.]),"L/D":np.array([13.,14.5])}
+	Y = evaluate_surrogate(surrogate,X)
+	assert np.allclose(Y["MTOW (lbf)"],3000*(X["C_m (Wh / kg)"]/450.)**-0.8*(X["L/D"]/14.)**-0.3)
+
+	#Queries within tolerance use the surrogate; queries outside the training data are solved
+	X = {"C_m (Wh / kg)":np.array([450.,410.,550.]),"L/D":np.array([14.,14.,14.])}
+	Y = predict(surrogate,X,tolerance=0.01)
+	assert list(Y["exact"]) == [False,False,True]
+	assert abs(Y["MTOW (lbf)"][0]/3000. - 1) < 1e-10
+	exact = solve_point("Tilt rotor",values=dict(field_value(column,X[column][2]) for column in X))
+	assert Y["MTOW (lbf)"][2] == exact["MTOW (lbf)"]
+
+
+if __name__=="__main__":
+
+	#Surrogate for the tilt-rotor configuration, trained on a design of experiments and validated
+	#against exact solves at new points
+	import os
+	import time
+	from collections import OrderedDict
+	from gpkit import ureg
+	from doe import run_doe, field_column
+
+	config = "Tilt rotor"
+	fields = OrderedDict()
+	fields["C_m"] = (350*ureg.Wh/ureg.kg,550*ureg.Wh/ureg.kg)
+	fields["battery_cost_per_C"] = (100*ureg.kWh**-1,400*ureg.kWh**-1)
+	fields["deadhead_ratio"] = (0.2,0.5)
+	fields["sizing_mission/range"] = (30*ureg.nautical_mile,70*ureg.nautical_mile)
+
+	directory = os.path.dirname(os.path.abspath(__file__))
+	training = run_doe(fields,60,[config],directory + "/surrogate_training_data.txt",seed=0,
+		candidates=10)
+	validation = run_doe(fields,20,[config],directory + "/surrogate_validation_data.txt",seed=1)
+
+	inputs = [field_column(name,low) for name,(low,high) in fields.items()]
+	surrogate = fit_surrogate(training,config,inputs)
+
+	X = dict((column,validation[column]) for column in inputs)
+	report = validation_report(surrogate,X,validation)
+
+	N_queries = 10000
+	random = np.random.RandomState(2)
+	queries = dict((column,low + (high - low)*random.uniform(size=N_queries)) \
+		for column,(low,high) in zip(inputs,surrogate["bounds"]))
+	t0 = time.time()
+	evaluate_surrogate(surrogate,queries)
+	t_query = time.time() - t0
+
+	print
+	print "Configuration: %s; inputs: %s" % (config,", ".join(inputs))
+	print "%d training points; %d terms (degree %d)" % (surrogate["N_train"],
+		len(surrogate["terms"]),surrogate["degree"])
+	print
+	print "Output\t\t\t\tHeld-out error (RMS, max)\tValidation error (RMS, max)"
+	for output in surrogate["outputs"]:
+		print "%-30s\t%0.2f%%, %0.2f%%\t\t\t%0.2f%%, %0.2f%%" % (output,
+			100*surrogate["error"][output]["rms"],100*surrogate["error"][output]["max"],
+			100*report[output]["rms"],100*report[output]["max"])
+	print
+	print "%d queries evaluated in %0.1f ms" % (N_queries,1000*t_query)
@@ -0,0 +1,498 @@
+#Parallel parameter sweeps with streaming, restartable output. Each point is solved by a worker
+#pool; its row is written to a tab-separated file (and flushed) as soon as it finishes, in order of
+#completion. The output file is also the checkpoint: rerunning a sweep with the same file skips
+#points that already have a row, so a killed job resumes where it stopped.
+#Points and results are dicts of plain floats (pint quantities do not pickle across processes).
+#Points are isolated from each other: a point whose function raises, or runs past the time limit,
+#gets nan results, and the status column of each row records how its point ended (status_names);
+#the error of a point whose function raised is written as a comment before its row.
+#Sweeps too large for one machine can be distributed through an SQLite queue instead (see
+#submit_queue); any number of worker processes, on any node that shares the queue file, solve its
+#points with the same per-point function.
+
+import os
+import json
+import time
+import socket
+import signal
+import sqlite3
+import numpy as np
+from contextlib import contextmanager
+from multiprocessing import Pool
+
+#Status of a point, stored in sweep files by position. Functions may return their own status
+#(e.g. "infeasible"); gpkit's RuntimeWarning (not solved to optimality) is also "infeasible".
+status_names = ["solved","infeasible","timeout","error"]
+
+class SolveTimeout(Exception):
+	pass
+
+@contextmanager
+def time_limit(seconds):
+	#Raises SolveTimeout in the block once it has run for the given time (None: no limit). Uses
+	#SIGALRM, so it works in the main thread of a process only (e.g. a pool worker), and is checked
+	#between Python bytecodes (a long call into compiled code finishes first). Limits can be
+	#nested; the sooner one applies.
+	outer = signal.getitimer(signal.ITIMER_REAL)[0]
+	if seconds is None or (outer and outer <= seconds):
+		yield
+		return
+	def handler(signum,frame):
+		raise SolveTimeout("Time limit (%0.0f s) exceeded" % seconds)
+	t0 = time.time()
+	old_handler = signal.signal(signal.SIGALRM,handler)
+	signal.setitimer(signal.ITIMER_REAL,seconds)
+	try:
+		yield
+	finally:
+		signal.setitimer(signal.ITIMER_REAL,0)
+		signal.signal(signal.SIGALRM,old_handler)
+		if outer:
+			signal.setitimer(signal.ITIMER_REAL,max(outer - (time.time() - t0),1e-3))
+
+def grid_points(**axes):
+	#Full-factorial grid; one dict per point. Axes are given as name=array (plain floats).
+	names = sorted(axes.keys())
+	mesh = np.meshgrid(*[np.asarray(axes[name],dtype=float) for name in names],indexing="ij")
+	return [dict(zip(names,[float(m.flat[i]) for m in mesh])) for i in range(mesh[0].size)]
+
+def _read_rows(filename):
+	#Header and complete rows of a sweep file. A partial last line (job killed mid-write) is
+	#dropped. Complete lines starting with "#" are comments.
+	if not os.path.isfile(filename):
+		return [], [], []
+	with open(filename,"r") as f:
+		lines = f.readlines()
+	comments = [line for line in lines if line.startswith("#") and line.endswith("\n")]
+	lines = [line for line in lines if not line.startswith("#")]
+	if not lines or not lines[0].endswith("\n"):
+		return comments, [], []
+	header = lines[0].rstrip("\n").split("\t")
+	rows = [line for line in lines[1:] if line.endswith("\n") \
+		and len(line.rstrip("\n").split("\t")) == len(header)]
+	return comments, header, rows
+
+def read_sweep(filename):
+	#Completed rows of a sweep file as a dict of arrays, sorted by point index
+	comments, header, rows = _read_rows(filename)
+	values = np.array([[float(x) for x in row.rstrip("\n").split("\t")] for row in rows])
+	values = values.reshape((len(rows),len(header)))
+	values = values[np.argsort(values[:,0])] if len(rows) else values
+	data = dict((name,values[:,i]) for i,name in enumerate(header))
+	data["index"] = data["index"].astype(int) if "index" in data else np.array([],dtype=int)
+	if "status" in data:
+		data["status"] = data["status"].astype(int)
+	return data
+
+def _isolated(function,point,columns,timeout):
+	#Result of function(point), with its status; nan results if the point failed, and the error
+	#(one line) if it raised
+	error = None
+	try:
+		with time_limit(timeout):
+			result = dict(function(point))
+		status = result.pop("status","solved")
+	except SolveTimeout:
+		result, status = {}, "timeout"
+	except RuntimeWarning:
+		result, status = {}, "infeasible"
+	except Exception as e:
+		result, status = {}, "error"
+		error = " ".join(("%s: %s" % (type(e).__name__,e)).split())
+	row = dict((name,result.get(name,np.nan)) for name in columns)
+	row["status"] = status_names.index(status)
+	if error:
+		row["error"] = error
+	return row
+
+def _evaluate(args):
+	function, index, point, columns, timeout = args
+	return index, _isolated(function,point,columns,timeout)
+
+def _format_row(index,point,inputs,result,columns):
+	error = "# Point %d: %s\n" % (index,result["error"]) if "error" in result else ""
+	return error + "\t".join(["%d" % index] + ["%0.10g" % point[name] for name in inputs] \
+		+ ["%0.10g" % result[name] for name in columns]) + "\n"
+
+def sweep(function,points,filename,columns,comments=[],processes=None,timeout=None):
+	#Solves function(point) for every point and streams one row per point to filename. function
+	#must be a module-level function (so it can be pickled) returning a dict with the given
+	#columns (and optionally a status). Each point is given at most timeout seconds. Columns
+	#are: index, the point's keys (sorted), the result columns, then status. Returns the number
+	#of points solved in this call.
+	inputs = sorted(points[0].keys())
+	header = ["index"] + inputs + list(columns) + ["status"]
+
+	old_comments, old_header, rows = _read_rows(filename)
+	if old_header and old_header != header:
+		raise ValueError("Sweep file %s has a different header; cannot resume" % filename)
+	done = set(int(row.split("\t")[0]) for row in rows)
+	pending = [(function,i,point,columns,timeout) for i,point in enumerate(points) if i not in done]
+
+	#Rewrite the completed rows, so that a partial last line is discarded
+	text_file = open(filename,"w")
+	for line in (old_comments if old_header else ["# %s\n" % c for c in comments]):
+		text_file.write(line)
+	text_file.write("\t".join(header) + "\n")
+	text_file.writelines(rows)
+	text_file.flush()
+
+	if pending:
+		pool = Pool(processes=processes)
+		try:
+			for i, result in pool.imap_unordered(_evaluate,pending):
+				text_file.write(_format_row(i,points[i],inputs,result,list(columns) + ["status"]))
+				text_file.flush()
+			pool.close()
+		except:
+			pool.terminate()
+			raise
+		finally:
+			pool.join()
+			text_file.close()
+	else:
+		text_file.close()
+	return len(pending)
+
+
+#Distributed sweeps. The queue is an SQLite database holding the sweep's points and results; put
+#it on a filesystem shared by the worker nodes (with working file locks; SQLite is not safe on
+#some network filesystems). A worker claims a point for a lease time; points whose worker crashed
+#are claimed again once their lease has expired, up to a number of claims after which the point
+#is failed. Results are written once per point (later writes of a re-claimed point are ignored),
+#so the results do not depend on the number of workers.
+#Workers are started on each node with
+#	python sweep_tools.py <module> <function> <queue database>
+#e.g. python sweep_tools.py doe doe_row doe_queue.db
+
+def _connect(database):
+	connection = sqlite3.connect(database,timeout=60.,isolation_level=None)
+	connection.execute("PRAGMA busy_timeout = 60000")
+	return connection
+
+def _read_meta(connection):
+	return dict((key,json.loads(value)) for key,value in \
+		connection.execute("SELECT key, value FROM meta").fetchall())
+
+def _function_name(function):
+	#By name only: a coordinator run as a script sees its module as __main__
+	return function.__name__
+
+def submit_queue(function,points,database,columns,comments=[]):
+	#Writes the sweep to a queue (coordinator). Resubmitting the same sweep is a no-op for
+	#points already in the queue. Returns the number of points added.
+	meta = {"function":_function_name(function),"inputs":sorted(points[0].keys()),
+		"columns":list(columns),"comments":list(comments)}
+	connection = _connect(database)
+	try:
+		connection.execute("BEGIN IMMEDIATE")
+		connection.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+		connection.execute("CREATE TABLE IF NOT EXISTS tasks (id INTEGER PRIMARY KEY, point TEXT, "
+			"state TEXT, worker TEXT, lease_until REAL, attempts INTEGER, result TEXT)")
+		old = dict(connection.execute("SELECT key, value FROM meta").fetchall())
+		if old and any(json.loads(old[key]) != meta[key] for key in ["function","inputs","columns"]):
+			raise ValueError("Queue %s holds a different sweep" % database)
+		for key, value in meta.items():
+			connection.execute("INSERT OR IGNORE INTO meta VALUES (?, ?)",(key,json.dumps(value)))
+		N = connection.execute("SELECT COUNT(*) FROM tasks").fetchone()[0]
+		connection.executemany("INSERT OR IGNORE INTO tasks VALUES (?, ?, 'pending', NULL, 0, 0, NULL)",
+			[(i,json.dumps(point)) for i,point in enumerate(points)])
+		N = connection.execute("SELECT COUNT(*) FROM tasks").fetchone()[0] - N
+		connection.execute("COMMIT")
+	except:
+		connection.rollback()
+		raise
+	finally:
+		connection.close()
+	return N
+
+def _claim(connection,worker,lease,max_attempts):
+	#Next point to solve (index, point), or None; claimable points are pending, or claimed with
+	#an expired lease. Points with an expired lease that were claimed max_attempts times are failed.
+	now = time.time()
+	connection.execute("BEGIN IMMEDIATE")
+	try:
+		connection.execute("UPDATE tasks SET state = 'failed' WHERE state = 'claimed' AND "
+			"lease_until < ? AND attempts >= ?",(now,max_attempts))
+		task = connection.execute("SELECT id, point FROM tasks WHERE (state = 'pending' OR "
+			"(state = 'claimed' AND lease_until < ?)) AND attempts < ? ORDER BY id LIMIT 1",
+			(now,max_attempts)).fetchone()
+		if task is not None:
+			connection.execute("UPDATE tasks SET state = 'claimed', worker = ?, lease_until = ?, "
+				"attempts = attempts + 1 WHERE id = ?",(worker,now + lease,task[0]))
+		connection.execute("COMMIT")
+	except:
+		connection.rollback()
+		raise
+	return None if task is None else (task[0],json.loads(task[1]))
+
+def work_queue(function,database,lease=3600.,wait=True,poll=10.,max_attempts=3,worker=None,
+	timeout=None):
+	#Solves points from a queue until none is left (worker); function must be the one the
+	#sweep was submitted with. Each point is given at most timeout seconds, and the lease must
+	#exceed the time to solve one point. Points that fail are done, with their status. With wait,
+	#the worker stays until the points claimed by other workers are done (or failed), to take
+	#over those whose worker crashed. Points whose lease expires after max_attempts claims are
+	#failed. Returns the number of points solved by this worker.
+	worker = worker or "%s:%d" % (socket.gethostname(),os.getpid())
+	connection = _connect(database)
+	try:
+		meta = _read_meta(connection)
+		if meta["function"] != _function_name(function):
+			raise ValueError("Queue %s was submitted for %s" % (database,meta["function"]))
+
+		N = 0
+		while True:
+			task = _claim(connection,worker,lease,max_attempts)
+			if task is None:
+				claimed = connection.execute("SELECT COUNT(*) FROM tasks WHERE state = 'claimed'"
+					).fetchone()[0]
+				if not (wait and claimed):
+					return N
+				time.sleep(poll)
+				continue
+			index, point = task
+			result = _isolated(function,point,meta["columns"],timeout)
+			connection.execute("UPDATE tasks SET state = 'done', worker = ?, result = ? "
+				"WHERE id = ? AND state != 'done'",(worker,json.dumps(result),index))
+			N += 1
+	finally:
+		connection.close()
+
+def queue_status(database):
+	#Number of points in each state (pending, claimed, done, or failed after max_attempts claims)
+	connection = _connect(database)
+	try:
+		return dict(connection.execute("SELECT state, COUNT(*) FROM tasks GROUP BY state").fetchall())
+	finally:
+		connection.close()
+
+def export_queue(database,filename):
+	#Writes the completed points of a queue to a sweep file (the format written by sweep(), in
+	#order of index), with the failed points as comments; returns the number of points still to
+	#be solved
+	connection = _connect(database)
+	try:
+		meta = _read_meta(connection)
+		tasks = connection.execute("SELECT id, point, state, result, attempts FROM tasks "
+			"ORDER BY id").fetchall()
+	finally:
+		connection.close()
+	with open(filename,"w") as text_file:
+		for comment in meta["comments"]:
+			text_file.write("# %s\n" % comment)
+		text_file.write("\t".join(["index"] + meta["inputs"] + meta["columns"] + ["status"]) + "\n")
+		for index, point, state, result, attempts in tasks:
+			if state == "done":
+				text_file.write(_format_row(index,json.loads(point),meta["inputs"],
+					json.loads(result),meta["columns"] + ["status"]))
+			elif state == "failed":
+				text_file.write("# Point %d: failed (not solved in %d claims)\n" % (index,attempts))
+	return len([1 for task in tasks if task[2] not in ["done","failed"]])
+
+
+#Checkpoints for study scripts that solve a series of design points and keep the solutions in
+#memory. Each solved point is appended to a checkpoint file, with the values the script uses from
+#its solution (gpkit solutions cannot be pickled, so these are listed); resumed runs read them back
+#instead of solving the point again.
+
+class SolutionRecord(dict):
+	#Saved values of a solution, queried as the solution is: record(name), record["constants"][name].
+	#record["status"] tells whether the point was solved (status_names).
+	def __call__(self,name):
+		return self["variables"][name]
+
+def _plain(value):
+	if hasattr(value,"units"):
+		return [np.asarray(value.magnitude).tolist(),str(value.units)]
+	return np.asarray(value).tolist()
+
+def _from_plain(value):
+	#Values as a solution gives them: floats are numpy floats (plain floats, with units, are not
+	#taken as numbers by matplotlib)
+	if isinstance(value,list) and len(value) == 2 and isinstance(value[1],basestring):
+		from gpkit import ureg
+		return _from_plain(value[0])*ureg(value[1])
+	if isinstance(value,list):
+		return np.asarray(value)
+	return np.float64(value) if isinstance(value,float) else value
+
+def _record(point):
+	return SolutionRecord(status=point.get("status","solved"),
+		variables=dict((name,_from_plain(value)) for name,value in point["variables"].items()),
+		constants=dict((name,_from_plain(value)) for name,value in point["constants"].items()))
+
+def load_checkpoint(filename,resume=False):
+	#Checkpoint of a study: the points saved in filename (key -> SolutionRecord) if resuming; the
+	#file is cleared otherwise. A partial last line (job killed mid-write) is dropped.
+	checkpoint = {"filename":filename,"points":{}}
+	if not resume or not os.path.isfile(filename):
+		open(filename,"w").close()
+		return checkpoint
+	with open(filename,"r") as f:
+		lines = f.readlines()
+	for line in lines:
+		if not line.endswith("\n"):
+			continue
+		point = json.loads(line)
+		checkpoint["points"][point["key"]] = _record(point)
+	with open(filename,"w") as f:
+		f.writelines([line for line in lines if line.endswith("\n")])
+	return checkpoint
+
+def checkpoint_solve(checkpoint,key,problem,variables,constants=[],timeout=None):
+	#Saved solution of the point (key: string) if it is in the checkpoint; otherwise solves the
+	#problem (in at most timeout seconds) and saves the given variables and constants (names, as
+	#passed to the solution) of its solution; names not in the solution are skipped. Points that
+	#cannot be solved are saved with their status and no values; those that timed out are solved
+	#again when resuming. Returns a SolutionRecord either way, so that resumed runs match fresh
+	#ones.
+	if key not in checkpoint["points"] or checkpoint["points"][key]["status"] == "timeout":
+		point = {"key":key,"status":"solved","variables":{},"constants":{}}
+		try:
+			with time_limit(timeout):
+				solution = problem.solve(verbosity=0)
+		except SolveTimeout:
+			point["status"] = "timeout"
+		except RuntimeWarning:
+			point["status"] = "infeasible"
+		except Exception:
+			point["status"] = "error"
+		for name in (variables if point["status"] == "solved" else []):
+			try:
+				point["variables"][name] = _plain(solution(name))
+			except (KeyError,ValueError):
+				pass
+		for name in (constants if point["status"] == "solved" else []):
+			if name in solution["constants"]:
+				point["constants"][name] = _plain(solution["constants"][name])
+		with open(checkpoint["filename"],"a") as f:
+			f.write(json.dumps(point) + "\n")
+		checkpoint["points"][key] = _record(point)
+	return checkpoint["points"][key]
+
+
+def _test_function(point):
+	if point["x"] < 0:
+		raise ValueError("Negative x")
+	if point["y"] < 0:
+		time.sleep(10)
+	return {"z":point["x"]**2 + point["y"]}
+
+class _FailingProblem(object):
+	#Stands for a solver failure other than gpkit's (e.g. cvxopt's arithmetic errors)
+	def solve(self,verbosity=0):
+		raise ZeroDivisionError("float division by zero")
+
+def test():
+	import tempfile
+	filename = os.path.join(tempfile.mkdtemp(),"sweep_test.txt")
+	points = grid_points(x=[1,2,3],y=[0,10])
+	assert len(points) == 6
+
+	assert sweep(_test_function,points,filename,["z"],comments=["Test sweep"],processes=2) == 6
+	data = read_sweep(filename)
+	assert list(data["index"]) == range(6)
+	assert np.all(data["z"] == data["x"]**2 + data["y"])
+
+	#Simulate a job killed mid-write: keep 3 rows and part of a 4th, then resume
+	with open(filename,"r") as f:
+		lines = f.readlines()
+	with open(filename,"w") as f:
+		f.writelines(lines[:5] + [lines[5][:3]])
+	assert sweep(_test_function,points,filename,["z"],processes=2) == 3
+	data = read_sweep(filename)
+	assert list(data["index"]) == range(6)
+	assert np.all(data["z"] == data["x"]**2 + data["y"])
+	assert np.all(data["status"] == status_names.index("solved"))
+	assert open(filename).readline() == "# Test sweep\n"
+
+	#Completed sweeps are not re-solved
+	assert sweep(_test_function,points,filename,["z"]) == 0
+
+	#Distributed: a worker crashes after claiming a point, two workers solve the queue
+	from multiprocessing import Process
+	database = os.path.join(tempfile.mkdtemp(),"sweep_test.db")
+	assert submit_queue(_test_function,points,database,["z"],comments=["Test sweep"]) == 6
+	assert submit_queue(_test_function,points,database,["z"]) == 0
+	connection = _connect(database)
+	assert _claim(connection,"crashed",-1.,3) == (0,points[0])
+	connection.close()
+	workers = [Process(target=work_queue,args=(_test_function,database),kwargs={"poll":0.1}) \
+		for i in range(2)]
+	for worker in workers:
+		worker.start()
+	for worker in workers:
+		worker.join()
+	assert queue_status(database) == {"done":6}
+	queue_filename = os.path.join(tempfile.mkdtemp(),"sweep_queue_test.txt")
+	assert export_queue(database,queue_filename) == 0
+	assert open(queue_filename).read() == "".join(open(filename).readlines()[:2] \
+		+ sorted(open(filename).readlines()[2:],key=lambda line: int(line.split("\t")[0])))
+
+	#A point whose worker crashes in each of its claims is failed
+	database = os.path.join(tempfile.mkdtemp(),"sweep_failed_queue_test.db")
+	submit_queue(_test_function,points[:2],database,["z"])
+	connection = _connect(database)
+	assert _claim(connection,"crashed",-1.,1) == (0,points[0])
+	connection.close()
+	assert work_queue(_test_function,database,max_attempts=1,poll=0.1) == 1
+	assert queue_status(database) == {"done":1,"failed":1}
+	assert export_queue(database,queue_filename) == 0
+	assert "# Point 0: failed (not solved in 1 claims)\n" in open(queue_filename).readlines()
+	assert list(read_sweep(queue_filename)["index"]) == [1]
+
+	#Failed points (raising, or past the time limit) get nan results and their status
+	failed_filename = os.path.join(tempfile.mkdtemp(),"sweep_failed_test.txt")
+	t0 = time.time()
+	assert sweep(_test_function,grid_points(x=[-1,1],y=[-1,1]),failed_filename,["z"],
+		processes=2,timeout=0.5) == 4
+	assert time.time() - t0 < 5
+	data = read_sweep(failed_filename)
+	assert [status_names[i] for i in data["status"]] == ["error","error","timeout","solved"]
+	assert np.all(np.isnan(data["z"][:3])) and data["z"][3] == 2
+	errors = [line for line in open(failed_filename) if line.startswith("# Point")]
+	assert sorted(errors) == ["# Point 0: ValueError: Negative x\n",
+		"# Point 1: ValueError: Negative x\n"]
+	with time_limit(5):
+		with time_limit(0.1):
+			t0 = time.time()
+			try:
+				time.sleep(1)
+			except SolveTimeout:
+				pass
+		assert time.time() - t0 < 0.5
+		assert 4 < signal.getitimer(signal.ITIMER_REAL)[0] < 5
+
+	#Checkpoints: solved points are saved, and read back (instead of solved) when resuming
+	from gpkit import Variable, VectorVariable, Model, ureg
+	x = Variable("x","ft")
+	y = VectorVariable(2,"y",[1.,2.],"ft")
+	problem = Model(x,[x >= y[0] + y[1]])
+	filename = os.path.join(tempfile.mkdtemp(),"checkpoint_test.txt")
+	checkpoint = load_checkpoint(filename)
+	solution = checkpoint_solve(checkpoint,"point 1",problem,["x","z"],["y"])
+	assert abs(solution("x")/(3*ureg.ft) - 1) < 1e-6 and "z" not in solution["variables"]
+	with open(filename,"a") as f:
+		f.write('{"key": "point 2", "vari')
+	checkpoint = load_checkpoint(filename,resume=True)
+	assert list(checkpoint["points"].keys()) == ["point 1"]
+	resumed = checkpoint_solve(checkpoint,"point 1",None,["x"],["y"])
+	assert resumed("x") == solution("x") and resumed["status"] == "solved"
+	assert isinstance(resumed("x").magnitude,np.float64)
+	failed = checkpoint_solve(checkpoint,"point 3",Model(x,[x <= y[0],x >= y[1]]),["x"])
+	assert failed["status"] == "infeasible" and failed["variables"] == {}
+	assert checkpoint_solve(checkpoint,"point 4",_FailingProblem(),["x"])["status"] == "error"
+	assert np.all(resumed["constants"]["y"] == solution["constants"]["y"])
+	assert load_checkpoint(filename)["points"] == {}
+
+
+
+if __name__=="__main__":
+
+	#Queue worker: solves points of a distributed sweep with function (module.function)
+	import sys
+	import importlib
+	module, function, database = sys.argv[1:4]
+	function = getattr(importlib.import_module(module),function)
+	print "%d points solved" % work_queue(function,database)
@@ -0,0 +1,147 @@
+#Batched sweep of the battery discharge parameter (Peukert effect). Each configuration is built
+#once, with the Peukert effect as a substituted factor (peukert_mode="factor"); only the factors
+#change between solves. Configurations are solved in parallel.
+
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.abspath(__file__)) + '/../..')
+
+import numpy as np
+from multiprocessing import Pool
+from gpkit import ureg
+from study_input_data import generic_data, configuration_data
+from on_demand_model import build_problem
+
+segment_type_names = ["hover","cruise","reserve"]
+
+def peukert_factors(t,n_array,Rt=1*ureg.hr):
+	#Energy factors E/(P*t) = (t/Rt)**(1/n - 1), as an (n values x segments) table
+	t_Rt = (t/Rt).to(ureg.dimensionless).magnitude
+	exponent = 1/np.asarray(n_array,dtype=float) - 1
+	return t_Rt[np.newaxis,:]**exponent[:,np.newaxis]
+
+def flight_segments(problem):
+	#All flight segments of a problem from build_problem, labelled by type
+	SizingMission, RevenueMission, DeadheadMission = problem[1:4]
+	segments = []
+	segment_types = []
+	for mission in [SizingMission, RevenueMission, DeadheadMission]:
+		for segment in mission.flight_segments:
+			segments += [segment]
+			if any(segment is s for s in mission.hover_segments):
+				segment_types += ["hover"]
+			elif mission is SizingMission and segment is SizingMission.fs2:
+				segment_types += ["reserve"]
+			else:
+				segment_types += ["cruise"]
+	return segments, segment_types
+
+def peukert_sweep(c,n_array,g=generic_data,max_iterations=5,tolerance=1e-6):
+	#Sweeps n for one configuration. Segment times are taken from the previous solve; if they
+	#change (they are fixed in the standard missions), the factors are updated and re-solved.
+
+	problem = build_problem(c,g,peukert_mode="factor")
+	segments, segment_types = flight_segments(problem)
+	segment_types = np.array(segment_types)
+
+	results = {"n":np.array(n_array),"segment_types":segment_types}
+	for key in ["MTOW","W_{battery}","cost_per_trip_per_passenger"]:
+		results[key] = np.zeros(np.size(n_array))
+	results["E"] = np.zeros([np.size(n_array),len(segments)])
+	results["f_{Peukert}"] = np.zeros([np.size(n_array),len(segments)])
+
+	t = None
+	for i,n in enumerate(n_array):
+		for iteration in range(max_iterations):
+			if t is None:
+				f = np.ones(len(segments))
+			else:
+				f = peukert_factors(t*ureg.s,[n])[0]
+			problem.substitutions.update(dict((segment.batteryPerf.f_Peukert,f[j])
+				for j,segment in enumerate(segments)))
+			solution = problem.solve(verbosity=0)
+
+			t_used = t
+			t = np.array([solution(segment.topvar("t")).to(ureg.s).magnitude
+				for segment in segments])
+			if t_used is None:
+				if n == 1:
+					break
+			elif np.max(np.abs(t/t_used - 1)) < tolerance:
+				break
+
+		results["MTOW"][i] = solution("MTOW_OnDemandAircraft").to(ureg.lbf).magnitude
+		results["W_{battery}"][i] = solution("W_OnDemandAircraft/Battery").to(ureg.lbf).magnitude
+		results["cost_per_trip_per_passenger"][i] = \
+			solution("cost_per_trip_per_passenger_OnDemandMissionCost")
+		results["E"][i] = [solution(segment.topvar("E")).to(ureg.kWh).magnitude
+			for segment in segments]
+		results["f_{Peukert}"][i] = f
+
+	#Energy penalty by segment type (including vehicle weight growth), relative to the first n value
+	results["energy_penalty"] = {}
+	for segment_type in segment_type_names:
+		mask = segment_types == segment_type
+		E = np.sum(results["E"][:,mask],axis=1)
+		results["energy_penalty"][segment_type] = E/E[0] - 1
+	return results
+
+def _sweep_configuration(args):
+	#Configuration data is looked up by name: pint quantities do not survive pickling into
+	#the worker processes with their unit registry intact
+	config, n_array = args
+	return config, peukert_sweep(configuration_data[config],n_array)
+
+def peukert_study(configs,n_array,processes=None):
+	#Sweeps all configurations (names from configuration_data) in parallel
+	pool = Pool(processes=processes)
+	results = pool.map(_sweep_configuration,[(config,n_array) for config in configs])
+	pool.close()
+	pool.join()
+	return dict(results)
+
+
+def test():
+	#The batched (factor) sweep matches the problem with the Peukert exponent built in
+	c = configuration_data["Lift + cruise"]
+	n = 1.05
+	results = peukert_sweep(c,[1.,n])
+
+	problem = build_problem(c,dict(generic_data,n=n),peukert_mode="exponent")
+	segments, segment_types = flight_segments(problem)
+	solution = problem.solve(verbosity=0)
+	MTOW = solution("MTOW_OnDemandAircraft").to(ureg.lbf).magnitude
+	E = np.array([solution(segment.topvar("E")).to(ureg.kWh).magnitude for segment in segments])
+
+	assert list(results["segment_types"]) == segment_types
+	assert abs(results["MTOW"][1]/MTOW - 1) < 1e-3
+	assert np.max(np.abs(results["E"][1]/E - 1)) < 1e-3
+	assert results["MTOW"][1] > results["MTOW"][0]
+
+
+if __name__=="__main__":
+
+	# Delete some configurations
+	configs = configuration_data.copy()
+	del configs["Tilt duct"]
+	del configs["Multirotor"]
+	del configs["Autogyro"]
+	del configs["Helicopter"]
+	del configs["Coaxial heli"]
+
+	#Data specific to study
+	n_array = np.linspace(1,1.2,10)
+
+	results = peukert_study(configs,n_array)
+
+	for config in configs:
+		r = results[config]
+		print
+		print "Configuration: " + config
+		print "n\tMTOW (lbf)\tCost per passenger ($)\tEnergy penalty (%): " \
+			+ "\t".join(segment_type_names)
+		for i,n in enumerate(n_array):
+			print "%0.3f\t%0.0f\t\t%0.2f\t\t\t" % (n, r["MTOW"][i],
+				r["cost_per_trip_per_passenger"][i]) \
+				+ "\t".join("%0.1f" % (100*r["energy_penalty"][segment_type][i])
+				for segment_type in segment_type_names)